@@ -0,0 +1,42 @@
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+
+
+def db_sync_to_async(func):
+    """
+    Run synchronous database code from coroutine in thread pool (there's no async ORM in Django 3.1).
+    Unlike default sync_to_async of Django views, calls aren't serialized in one thread, so concurrent
+    requests wait for database in parallel. Connections of pool threads are closed by CONN_MAX_AGE
+    before and after call, like Django does at start and finish of request.
+    """
+    @wraps(func)
+    def inner(*args, **kwargs):
+        close_old_connections()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            close_old_connections()
+
+    return sync_to_async(inner, thread_sensitive=False)
+
+
+def as_async_view(view):
+    """
+    Make coroutine view from synchronous one (e.g. DRF view), which runs it with rendering of response
+    by db_sync_to_async. Attributes of view (e.g. 'csrf_exempt') are kept.
+    """
+    def render(request, *args, **kwargs):
+        response = view(request, *args, **kwargs)
+        if callable(getattr(response, 'render', None)):
+            response = response.render()
+        return response
+
+    run = db_sync_to_async(render)
+
+    @wraps(view)
+    async def inner(request, *args, **kwargs):
+        return await run(request, *args, **kwargs)
+
+    return inner
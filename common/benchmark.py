@@ -0,0 +1,116 @@
+import os
+import random
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from django.core.management import call_command
+from django.db import connection
+
+
+@contextmanager
+def temporary_database():
+    """
+    Create migrated SQLite file database with settings of the current profile instead of the default one,
+    and destroy it on exit. Data of the default database isn't touched.
+    """
+    if connection.vendor != 'sqlite':
+        raise NotImplementedError('Temporary database is implemented for SQLite only.')
+
+    with tempfile.TemporaryDirectory() as directory:
+        connection.settings_dict['TEST']['NAME'] = os.path.join(directory, 'benchmark.sqlite3')
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            yield
+        finally:
+            connection.close()
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def fill_topics(topics_count: int, questions_count: int, answers_count: int):
+    """
+    Create open topics with questions and answers with predictable ids: question N belongs to topic
+    (N - 1) // questions_count + 1, its answers are (N - 1) * answers_count + 1 ... N * answers_count.
+    """
+    from interview.apps.answers.models import Answer
+    from interview.apps.questions.models import Question
+    from interview.apps.topics.models import Topic
+
+    today = datetime.now().date()
+    Topic.objects.bulk_create([
+        Topic(
+            id=topic_id,
+            title='Topic #%d.' % topic_id,
+            start_date=today - timedelta(weeks=1),
+            finish_date=today + timedelta(weeks=1),
+            description='Description.'
+        )
+        for topic_id in range(1, topics_count + 1)
+    ])
+    Question.objects.bulk_create([
+        Question(
+            id=question_id,
+            text='Question #%d.' % question_id,
+            type=Question.ONE_OPTION,
+            topic_id=(question_id - 1) // questions_count + 1
+        )
+        for question_id in range(1, topics_count * questions_count + 1)
+    ])
+    Answer.objects.bulk_create([
+        Answer(
+            id=(question_id - 1) * answers_count + i + 1,
+            text='Answer #%d.' % i,
+            question_id=question_id
+        )
+        for question_id in range(1, topics_count * questions_count + 1)
+        for i in range(answers_count)
+    ])
+
+
+def fill_users_answers(users_count: int, answered_part: float, topics_count: int, questions_count: int,
+                       answers_count: int, seed: int = 0, batch_size: int = 10000):
+    """
+    Create answers of users on random part of questions of topics created by fill_topics,
+    then rebuild progress of users in topics and picks of answers.
+    """
+    from interview.apps.users_answers.models import UserAnswer
+
+    rnd = random.Random(seed)
+    all_questions_count = topics_count * questions_count
+    users_answers = []
+    for user_id in range(1, users_count + 1):
+        for question_id in rnd.sample(range(1, all_questions_count + 1), int(all_questions_count * answered_part)):
+            users_answers.append(UserAnswer(
+                user_id=user_id,
+                question_id=question_id,
+                answer_id=(question_id - 1) * answers_count + rnd.randrange(answers_count) + 1
+            ))
+        if len(users_answers) >= batch_size:
+            UserAnswer.objects.bulk_create(users_answers)
+            users_answers = []
+    UserAnswer.objects.bulk_create(users_answers)
+
+    with open(os.devnull, 'w') as devnull:
+        call_command('rebuild_users_topics_progress', batch_size=batch_size, stdout=devnull)
+        call_command('rebuild_answers_picks', batch_size=batch_size, stdout=devnull)
+
+
+def percentile(values: list, percent: float) -> float:
+    """
+    Get percentile of sorted values (0.0 for empty ones).
+    """
+    return values[int(percent * (len(values) - 1))] if values else 0.0
+
+
+def format_latencies(latencies: list, duration: float) -> str:
+    """
+    Format count, throughput and percentiles of latencies (in seconds) measured during duration.
+    """
+    latencies = sorted(latencies)
+    return '%8d ops, %9.1f ops/s, p50: %7.2f ms, p95: %7.2f ms, p99: %7.2f ms' % (
+        len(latencies),
+        len(latencies) / duration if duration else 0.0,
+        percentile(latencies, 0.50) * 1000,
+        percentile(latencies, 0.95) * 1000,
+        percentile(latencies, 0.99) * 1000,
+    )
@@ -0,0 +1,43 @@
+import hashlib
+from functools import wraps
+from typing import Callable
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+
+def conditional_get(revision_func: Callable):
+    """
+    Decorator of view for conditional GET by cheap revision marker, like django.views.decorators.http.condition,
+    but marker is computed once for both 'ETag' and 'Last-Modified'. If request matches, view isn't called at all.
+    :param revision_func: function with view arguments, which returns marker string and last modification time
+    (or None), or returns None if conditional response can't be used.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def inner(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view_func(request, *args, **kwargs)
+
+            revision = revision_func(request, *args, **kwargs)
+            if revision is None:
+                return view_func(request, *args, **kwargs)
+
+            marker, last_modified = revision
+            etag = quote_etag(hashlib.sha1(('%s|%s' % (marker, request.get_full_path())).encode()).hexdigest())
+            timestamp = int(last_modified.timestamp()) if last_modified is not None else None
+
+            response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+            if response is None:
+                response = view_func(request, *args, **kwargs)
+
+            if 200 <= response.status_code < 300 or response.status_code == 304:
+                if not response.has_header('ETag'):
+                    response['ETag'] = etag
+                if timestamp is not None and not response.has_header('Last-Modified'):
+                    response['Last-Modified'] = http_date(timestamp)
+            return response
+
+        return inner
+
+    return decorator
@@ -0,0 +1,20 @@
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    SQLite backend, which executes PRAGMA statements from OPTIONS['pragmas'] on every new connection,
+    e.g. {'journal_mode': 'WAL', 'synchronous': 'NORMAL'}. Other OPTIONS go to sqlite3.connect() as usual
+    ('timeout' is busy timeout in seconds).
+    """
+
+    def get_connection_params(self):
+        kwargs = super().get_connection_params()
+        kwargs.pop('pragmas', None)
+        return kwargs
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.settings_dict['OPTIONS'].get('pragmas', {}).items():
+            conn.execute('PRAGMA %s = %s' % (name, value))
+        return conn
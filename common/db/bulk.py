@@ -0,0 +1,51 @@
+from typing import List, Type
+
+from django.db import connections, router
+from django.db.models import Model
+from django.db.transaction import TransactionManagementError
+
+
+def bulk_create_with_ids(model: Type[Model], objs: List[Model], batch_size: int = None) -> List[Model]:
+    """
+    Insert objects by batches and return them with primary keys set.
+    If database backend can't return rows from bulk insert (SQLite on Django < 4.0),
+    objects are saved one by one (so 'post_save' signal is sent for every object).
+    :param model: model class.
+    :param objs: not saved model objects.
+    :param batch_size: count objects in one INSERT statement.
+    :return: saved model objects.
+    """
+    connection = connections[router.db_for_write(model)]
+    if connection.features.can_return_rows_from_bulk_insert:
+        return model.objects.bulk_create(objs, batch_size=batch_size)
+
+    for obj in objs:
+        obj.save(force_insert=True)
+    return objs
+
+
+def bulk_create_in_transaction(model: Type[Model], objs: List[Model], batch_size: int = None) -> List[Model]:
+    """
+    Insert objects by batches and return them with primary keys set, 'post_save' signal is never sent.
+    If database backend can't return rows from bulk insert, but it's SQLite, keys are read back
+    by one query: SQLite holds write lock of transaction since the first insert till commit, so the inserted rows
+    have the greatest auto increment keys of table. Other backends fall back to 'bulk_create_with_ids'.
+    :param model: model class with auto increment primary key.
+    :param objs: not saved model objects.
+    :param batch_size: count objects in one INSERT statement.
+    :return: saved model objects.
+    """
+    connection = connections[router.db_for_write(model)]
+    if connection.features.can_return_rows_from_bulk_insert or not objs:
+        return model.objects.bulk_create(objs, batch_size=batch_size)
+    if connection.vendor != 'sqlite':
+        return bulk_create_with_ids(model, objs, batch_size)
+    if not connection.in_atomic_block:
+        raise TransactionManagementError('Keys of inserted objects can be read back only in transaction.')
+
+    model.objects.using(connection.alias).bulk_create(objs, batch_size=batch_size)
+    pk_name = model._meta.pk.attname
+    pks = list(model.objects.using(connection.alias).order_by('-pk').values_list('pk', flat=True)[:len(objs)])
+    for obj, pk in zip(objs, reversed(pks)):
+        setattr(obj, pk_name, pk)
+    return objs
@@ -0,0 +1,97 @@
+import contextvars
+import random
+from functools import wraps
+from typing import Callable, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.deprecation import MiddlewareMixin
+
+_use_replica = contextvars.ContextVar('use_replica', default=False)
+
+
+def _get_replicas() -> list:
+    return getattr(settings, 'REPLICA_DATABASES', [])
+
+
+def _get_pin_seconds() -> int:
+    return getattr(settings, 'REPLICA_PIN_SECONDS', 5)
+
+
+def _get_pin_cookie() -> str:
+    return getattr(settings, 'REPLICA_PIN_COOKIE', 'primary_pin')
+
+
+def __user_pin_key(user_id) -> str:
+    return 'replica-pin:user:%s' % user_id
+
+
+class ReplicaRouter:
+    """
+    Route reads to replica databases (REPLICA_DATABASES setting) only inside views decorated by 'use_replica'.
+    Everything else, i.e. writes, reads of write requests, signals and management commands, uses primary database.
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = _get_replicas()
+        if replicas and _use_replica.get():
+            return random.choice(replicas)
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # replicas are copies of primary database
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in _get_replicas()
+
+
+def pin_user(user_id):
+    """
+    Read data of user from primary database for REPLICA_PIN_SECONDS, so user reads own writes despite replica lag.
+    ATTENTION! Pins are kept in the default cache, it has to be shared by processes (e.g. not locmem) in production.
+    """
+    if _get_replicas():
+        cache.set(__user_pin_key(user_id), True, _get_pin_seconds())
+
+
+def is_user_pinned(user_id) -> bool:
+    return user_id is not None and cache.get(__user_pin_key(user_id), False)
+
+
+def use_replica(is_pinned: Optional[Callable] = None):
+    """
+    Decorator of read-only view, which allows its reads to go to replica database. Reads stay on primary,
+    if request has cookie set by ReplicaPinMiddleware after a write, or if is_pinned(request, *args, **kwargs).
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def inner(request, *args, **kwargs):
+            if request.COOKIES.get(_get_pin_cookie()) or \
+                    (is_pinned is not None and is_pinned(request, *args, **kwargs)):
+                return view_func(request, *args, **kwargs)
+
+            token = _use_replica.set(True)
+            try:
+                return view_func(request, *args, **kwargs)
+            finally:
+                _use_replica.reset(token)
+
+        return inner
+
+    return decorator
+
+
+class ReplicaPinMiddleware(MiddlewareMixin):
+    """
+    After successful write request set short-living cookie, which keeps reads of the client on primary database.
+    """
+
+    def process_response(self, request, response):
+        if _get_replicas() and request.method not in ('GET', 'HEAD', 'OPTIONS') and response.status_code < 400:
+            response.set_cookie(_get_pin_cookie(), '1', max_age=_get_pin_seconds(), httponly=True)
+        return response
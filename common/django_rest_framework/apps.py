@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class DjangoRestFrameworkConfig(AppConfig):
+    name = 'common.django_rest_framework'
+    label = 'common_django_rest_framework'
+
+    def ready(self):
+        from . import checks, signals  # noqa: F401
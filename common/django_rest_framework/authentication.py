@@ -0,0 +1,70 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import router
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+
+# only fields, which authentication and permissions need, credentials aren't cached
+USER_FIELDS = ('id', 'username', 'is_active', 'is_staff', 'is_superuser')
+
+
+def _get_cache():
+    return caches[getattr(settings, 'AUTH_TOKEN_CACHE_ALIAS', 'default')]
+
+
+def _get_user_fields() -> list:
+    # model instance is built from values in order of its fields
+    return [field.attname for field in get_user_model()._meta.concrete_fields if field.attname in USER_FIELDS]
+
+
+def _token_key(key) -> str:
+    return 'auth-token:%s' % key
+
+
+def forget_tokens(keys):
+    """
+    Delete cached tokens, so their next requests are authenticated by database.
+    """
+    _get_cache().delete_many([_token_key(key) for key in keys])
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Drop-in replacement of TokenAuthentication, which keeps user id and flags (USER_FIELDS) of resolved token
+    in cache, so authenticated requests don't query 'authtoken_token' and 'auth_user' tables.
+    User is built from cached fields, the rest of its fields are deferred (loaded from database on access).
+
+    Cached entry lives AUTH_TOKEN_CACHE_TIMEOUT seconds (5 minutes by default) and is deleted
+    on deletion of token and on any change of user (deactivation, password change, etc.).
+    ATTENTION! Deletion reaches other processes only through shared cache (AUTH_TOKEN_CACHE_ALIAS), it's checked
+    by 'manage.py check --deploy'.
+    """
+
+    def authenticate_credentials(self, key):
+        cache = _get_cache()
+        values = cache.get(_token_key(key))
+        if values is None:
+            values = self.__get_user_values(key)
+            cache.set(_token_key(key), values, getattr(settings, 'AUTH_TOKEN_CACHE_TIMEOUT', 300))
+
+        model = get_user_model()
+        user = model.from_db(router.db_for_read(model), _get_user_fields(), values)
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+
+        token_model = self.get_model()
+        token = token_model.from_db(router.db_for_read(token_model), ('key', 'user_id'), (key, user.id))
+        token.user = user
+        return user, token
+
+    def __get_user_values(self, key) -> tuple:
+        values = self.get_model().objects.filter(
+            key=key
+        ).values_list(
+            *('user__%s' % name for name in _get_user_fields())
+        ).first()
+        if values is None:
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
+        return values
@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Error, Tags, register
+
+
+@register(Tags.caches, deploy=True)
+def check_auth_token_cache(app_configs, **kwargs):
+    """
+    Deleted tokens and deactivated users are forgotten only in the cache, which the process handled the change uses,
+    so with local memory cache other worker processes keep authenticating them till timeout.
+    """
+    alias = getattr(settings, 'AUTH_TOKEN_CACHE_ALIAS', 'default')
+    if not getattr(settings, 'AUTH_TOKEN_CACHE_TIMEOUT', 300) or not isinstance(caches[alias], LocMemCache):
+        return []
+    return [Error(
+        'Cache \'%s\' of authentication tokens (AUTH_TOKEN_CACHE_ALIAS) isn\'t shared between processes.' % alias,
+        hint='Use shared cache backend (e.g. memcached, redis, database) or set AUTH_TOKEN_CACHE_TIMEOUT to 0.',
+        id='interview.E001',
+    )]
@@ -0,0 +1,38 @@
+from drf_yasg import openapi
+from drf_yasg.openapi import Parameter
+from rest_framework.pagination import CursorPagination
+
+
+class IdCursorPagination(CursorPagination):
+    """
+    Keyset pagination over primary key. Every page is a bounded range scan by 'id',
+    so pages stay stable under concurrent inserts.
+
+    Pagination is opt-in: it's applied only when request contains 'cursor' or 'page_size' parameter,
+    otherwise endpoint returns a plain list as before.
+    """
+
+    ordering = 'id'
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+
+    manual_parameters = [
+        Parameter(
+            'cursor',
+            in_=openapi.IN_QUERY,
+            description='Opaque cursor of page (from \'next\' or \'previous\' links).',
+            type=openapi.TYPE_STRING
+        ),
+        Parameter(
+            'page_size',
+            in_=openapi.IN_QUERY,
+            description='Page size (default %d, max %d).' % (page_size, max_page_size),
+            type=openapi.TYPE_INTEGER
+        ),
+    ]
+
+    @classmethod
+    def is_requested(cls, request) -> bool:
+        return cls.cursor_query_param in request.query_params or \
+               cls.page_size_query_param in request.query_params
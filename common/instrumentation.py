@@ -0,0 +1,216 @@
+import asyncio
+import contextvars
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Optional
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+logger = logging.getLogger(__name__)
+
+_metrics = contextvars.ContextVar('request_metrics', default=None)
+
+# placeholders of 'IN (%s, %s, ...)' are collapsed, so statements differing by count of values are the same
+__placeholders_pattern = re.compile(r'\(%s(?:, %s)+\)')
+
+
+def _get_header_enabled() -> bool:
+    return getattr(settings, 'SERVER_TIMING_HEADER', True)
+
+
+def _get_slow_seconds() -> float:
+    return getattr(settings, 'SLOW_REQUEST_SECONDS', 1.0)
+
+
+def _get_slow_queries() -> int:
+    return getattr(settings, 'SLOW_REQUEST_QUERIES', 50)
+
+
+def _get_top_statements() -> int:
+    return getattr(settings, 'SLOW_REQUEST_STATEMENTS', 5)
+
+
+def _normalize_sql(sql: str) -> str:
+    return __placeholders_pattern.sub('(%s, ...)', sql)
+
+
+class RequestMetrics:
+    """
+    Metrics of one request: SQL queries (count, time, repeated statements) and time of named stages.
+    Queries can be executed by other threads (e.g. by thread pool of coroutine views), so updates are locked.
+    """
+
+    def __init__(self):
+        self.queries_count = 0
+        self.db_seconds = 0.0
+        self.statements = Counter()
+        self.stages = {}
+        self.__lock = threading.Lock()
+
+    def add_query(self, sql: str, duration: float):
+        statement = _normalize_sql(sql)
+        with self.__lock:
+            self.queries_count += 1
+            self.db_seconds += duration
+            self.statements[statement] += 1
+
+    def add_stage(self, name: str, duration: float):
+        with self.__lock:
+            self.stages[name] = self.stages.get(name, 0.0) + duration
+
+    def repeated_statements(self, count: int) -> list:
+        """
+        Get the most repeated statements (executed more than once) as tuples of statement and count.
+        """
+        with self.__lock:
+            return [(sql, n) for sql, n in self.statements.most_common(count) if n > 1]
+
+
+def get_request_metrics() -> Optional[RequestMetrics]:
+    """
+    Get metrics of the current request (None, if request isn't instrumented by RequestInstrumentationMiddleware).
+    """
+    return _metrics.get()
+
+
+def _record_query(execute, sql, params, many, context):
+    metrics = _metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+
+    started_at = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.add_query(sql, time.perf_counter() - started_at)
+
+
+def _install_wrapper(connection):
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+def __on_connection_created(sender, connection, **kwargs):
+    _install_wrapper(connection)
+
+
+connection_created.connect(__on_connection_created)
+
+
+@contextmanager
+def measure(name: str):
+    """
+    Add time of block to stage of the current request metrics (if request is instrumented).
+    Time of SQL queries executed inside block is excluded, it's reported as 'db' stage.
+    """
+    metrics = _metrics.get()
+    if metrics is None:
+        yield
+        return
+
+    db_seconds = metrics.db_seconds
+    started_at = time.perf_counter()
+    try:
+        yield
+    finally:
+        duration = time.perf_counter() - started_at - (metrics.db_seconds - db_seconds)
+        metrics.add_stage(name, max(duration, 0.0))
+
+
+class RequestInstrumentationMiddleware:
+    """
+    Measure SQL queries (count and time, by execute wrapper of connections), serialization (blocks of 'measure'),
+    rendering and total time of request. Metrics are returned in Server-Timing header (SERVER_TIMING_HEADER
+    setting), requests slower than SLOW_REQUEST_SECONDS or with more than SLOW_REQUEST_QUERIES queries are logged
+    with the most repeated SQL statements, which usually means N+1 queries.
+    It has to be the first middleware. Content of streaming responses is produced after it and isn't measured.
+    Like the rest of middlewares it works in asynchronous chain (ASGI) too, so coroutine views aren't adapted
+    to the single thread of synchronous code.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(self.get_response):
+            # the same mark as of MiddlewareMixin, so the previous handler awaits the middleware
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        # connections of this thread could be created before the middleware is loaded
+        for connection in connections.all():
+            _install_wrapper(connection)
+
+        metrics = RequestMetrics()
+        token = _metrics.set(metrics)
+        started_at = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _metrics.reset(token)
+        return self.__finish(request, response, metrics, time.perf_counter() - started_at)
+
+    async def __acall__(self, request):
+        # queries are executed by threads of thread pool, the wrapper is installed to their connections on creation,
+        # and the context with metrics is copied to them
+        metrics = RequestMetrics()
+        token = _metrics.set(metrics)
+        started_at = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _metrics.reset(token)
+        return self.__finish(request, response, metrics, time.perf_counter() - started_at)
+
+    def process_template_response(self, request, response):
+        metrics = _metrics.get()
+        if metrics is None:
+            return response
+
+        started_at = time.perf_counter()
+        db_seconds = metrics.db_seconds
+
+        def measure_render(rendered_response):
+            duration = time.perf_counter() - started_at - (metrics.db_seconds - db_seconds)
+            metrics.add_stage('render', max(duration, 0.0))
+
+        response.add_post_render_callback(measure_render)
+        return response
+
+    @staticmethod
+    def __finish(request, response, metrics: RequestMetrics, total_seconds: float):
+        if _get_header_enabled():
+            response['Server-Timing'] = RequestInstrumentationMiddleware.__server_timing(metrics, total_seconds)
+        if total_seconds > _get_slow_seconds() or metrics.queries_count > _get_slow_queries():
+            RequestInstrumentationMiddleware.__log_slow_request(request, response, metrics, total_seconds)
+        return response
+
+    @staticmethod
+    def __server_timing(metrics: RequestMetrics, total_seconds: float) -> str:
+        timings = ['db;desc="%d queries";dur=%.2f' % (metrics.queries_count, metrics.db_seconds * 1000)]
+        timings.extend('%s;dur=%.2f' % (name, seconds * 1000) for name, seconds in sorted(metrics.stages.items()))
+        timings.append('total;dur=%.2f' % (total_seconds * 1000))
+        return ', '.join(timings)
+
+    @staticmethod
+    def __log_slow_request(request, response, metrics: RequestMetrics, total_seconds: float):
+        statements = ''.join(
+            '\n  %d x %s' % (count, sql) for sql, count in metrics.repeated_statements(_get_top_statements())
+        )
+        logger.warning(
+            'Slow request %s %s (%d): %.1f ms total, %d queries in %.1f ms, %s.%s',
+            request.method, request.get_full_path(), response.status_code, total_seconds * 1000,
+            metrics.queries_count, metrics.db_seconds * 1000,
+            ', '.join('%s %.1f ms' % (name, seconds * 1000) for name, seconds in sorted(metrics.stages.items()))
+            or 'no stages',
+            ('\nRepeated statements:' + statements) if statements else ''
+        )
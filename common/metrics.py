@@ -0,0 +1,432 @@
+"""
+In-process metrics registry (counters, gauges, fixed-bucket histograms) exposed in Prometheus text format.
+
+Values are kept by every process. If METRICS_DIR setting is set, processes (e.g. pre-fork workers of WSGI server)
+flush snapshots of their values to JSON files in that directory at most every METRICS_FLUSH_SECONDS,
+and the metrics view merges all of them: counters, gauges and histograms are summed by labels.
+Files of dead processes (checked by pid, so the directory must be shared only by processes of one host)
+are removed on collection: their counters and histograms are kept in the archive file, so totals don't decrease,
+their gauges (e.g. requests in progress) are dropped.
+"""
+import asyncio
+import atexit
+import bisect
+import fcntl
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Iterable, Iterator, Optional, Sequence
+
+from django.conf import settings
+from django.http import HttpResponse
+from drf_yasg.utils import swagger_auto_schema
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAdminUser
+
+from common.instrumentation import get_request_metrics
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_archive_file_name = 'metrics-archive.json'
+
+
+def _get_directory() -> Optional[str]:
+    directory = getattr(settings, 'METRICS_DIR', None)
+    return str(directory) if directory else None
+
+
+def _get_flush_seconds() -> float:
+    return getattr(settings, 'METRICS_FLUSH_SECONDS', 1.0)
+
+
+def _is_process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # the process exists, but belongs to another user
+        pass
+    return True
+
+
+def _get_pid(file_name: str) -> Optional[int]:
+    """
+    Get pid of process of snapshot file ('metrics-<pid>-<random>.json'), None for other files.
+    """
+    parts = file_name[:-len('.json')].split('-')
+    if len(parts) == 3 and parts[0] == 'metrics' and parts[1].isdigit():
+        return int(parts[1])
+    return None
+
+
+def _read_json(path: str) -> Optional[dict]:
+    try:
+        with open(path) as stream:
+            return json.load(stream)
+    except (OSError, ValueError):
+        # file doesn't exist or is being replaced by another process
+        return None
+
+
+def _write_json(path: str, data: dict):
+    with open(path + '.tmp', 'w') as stream:
+        json.dump(data, stream)
+    os.replace(path + '.tmp', path)
+
+
+@contextmanager
+def _lock_directory(directory: str) -> Iterator[None]:
+    """
+    Lock directory of snapshots exclusively between processes, so dead ones are archived once.
+    """
+    with open(os.path.join(directory, '.lock'), 'w') as stream:
+        fcntl.flock(stream, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(stream, fcntl.LOCK_UN)
+
+
+def __escape(value: str) -> str:
+    return value.replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    labels = ['%s="%s"' % (name, __escape(value)) for name, value in zip(names, values)]
+    if extra:
+        labels.append(extra)
+    return '{%s}' % ','.join(labels) if labels else ''
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if value != float('inf') else '+Inf'
+
+
+class Metric:
+    """
+    Base of metrics: values by tuples of label values, updates are locked.
+    """
+    type = None
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple:
+        if set(labels) != set(self.labelnames):
+            raise ValueError('Metric %s has labels %s, got %s.' % (self.name, self.labelnames, tuple(labels)))
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def reset(self):
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            samples = [[list(key), self._copy(value)] for key, value in self._values.items()]
+        return {
+            'type': self.type,
+            'help': self.documentation,
+            'labelnames': list(self.labelnames),
+            'samples': samples,
+        }
+
+    @staticmethod
+    def _copy(value):
+        return value
+
+    @staticmethod
+    def merge(snapshots: Iterable[dict]) -> dict:
+        """
+        Merge snapshots of the same metric from processes by summing values of the same labels.
+        """
+        merged = None
+        values = {}
+        for snapshot in snapshots:
+            merged = merged or {key: value for key, value in snapshot.items() if key != 'samples'}
+            for labels, value in snapshot['samples']:
+                key = tuple(labels)
+                if key not in values:
+                    values[key] = value
+                elif isinstance(value, dict):
+                    values[key] = {
+                        'buckets': [a + b for a, b in zip(values[key]['buckets'], value['buckets'])],
+                        'sum': values[key]['sum'] + value['sum'],
+                    }
+                else:
+                    values[key] += value
+        merged['samples'] = [[list(key), value] for key, value in sorted(values.items())]
+        return merged
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def inc(self, amount: float = 1.0, **labels):
+        if amount < 0:
+            raise ValueError('Counter can only be increased.')
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+
+class Gauge(Metric):
+    type = 'gauge'
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+
+class Histogram(Metric):
+    """
+    Histogram with fixed upper bounds of buckets, the last bucket is +Inf.
+    """
+    type = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            if key not in self._values:
+                self._values[key] = {'buckets': [0] * (len(self.buckets) + 1), 'sum': 0.0}
+            self._values[key]['buckets'][index] += 1
+            self._values[key]['sum'] += value
+
+    def snapshot(self) -> dict:
+        return {**super().snapshot(), 'buckets': list(self.buckets)}
+
+    @staticmethod
+    def _copy(value):
+        return {'buckets': list(value['buckets']), 'sum': value['sum']}
+
+
+class Registry:
+
+    def __init__(self):
+        self.__metrics = {}
+        self.__lock = threading.Lock()
+        self.__process_id = None
+        self.__flushed_at = 0.0
+        os.register_at_fork(after_in_child=self.__reset_after_fork)
+
+    def __get_or_create(self, metric_class, name: str, *args, **kwargs):
+        with self.__lock:
+            metric = self.__metrics.get(name)
+            if metric is None:
+                metric = self.__metrics[name] = metric_class(name, *args, **kwargs)
+            elif type(metric) is not metric_class:
+                raise ValueError('Metric %s is already registered as %s.' % (name, metric.type))
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.__get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.__get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.__get_or_create(Histogram, name, documentation, labelnames, buckets)
+
+    def snapshot(self) -> dict:
+        with self.__lock:
+            metrics = list(self.__metrics.values())
+        return {metric.name: metric.snapshot() for metric in metrics}
+
+    def flush(self, force: bool = False):
+        """
+        Write snapshot of the process to METRICS_DIR (if it's set) atomically, not often than METRICS_FLUSH_SECONDS.
+        """
+        directory = _get_directory()
+        now = time.monotonic()
+        if directory is None or (not force and now - self.__flushed_at < _get_flush_seconds()):
+            return
+        self.__flushed_at = now
+
+        if self.__process_id is None:
+            self.__process_id = '%d-%s' % (os.getpid(), uuid.uuid4().hex[:8])
+        os.makedirs(directory, exist_ok=True)
+        _write_json(os.path.join(directory, 'metrics-%s.json' % self.__process_id), self.snapshot())
+
+    def collect(self) -> dict:
+        """
+        Get snapshot of all processes (of the current one, if METRICS_DIR isn't set).
+        """
+        directory = _get_directory()
+        if directory is None:
+            return self.snapshot()
+
+        self.flush(force=True)
+        snapshots = {}
+        with _lock_directory(directory):
+            self.__archive_dead_processes(directory)
+            for file_name in sorted(os.listdir(directory)):
+                if not (file_name.startswith('metrics-') and file_name.endswith('.json')):
+                    continue
+                process_snapshot = _read_json(os.path.join(directory, file_name))
+                for name, metric_snapshot in (process_snapshot or {}).items():
+                    snapshots.setdefault(name, []).append(metric_snapshot)
+        return {name: Metric.merge(metric_snapshots) for name, metric_snapshots in snapshots.items()}
+
+    @staticmethod
+    def __archive_dead_processes(directory: str):
+        """
+        Merge counters and histograms of dead processes to the archive file and remove their files.
+        """
+        archive_path = os.path.join(directory, _archive_file_name)
+        archive = None
+        for file_name in os.listdir(directory):
+            pid = _get_pid(file_name)
+            if pid is None or _is_process_alive(pid):
+                continue
+            path = os.path.join(directory, file_name)
+            process_snapshot = _read_json(path)
+            if archive is None:
+                archive = _read_json(archive_path) or {}
+            for name, metric_snapshot in (process_snapshot or {}).items():
+                if metric_snapshot['type'] != Gauge.type:
+                    archive[name] = Metric.merge(filter(None, (archive.get(name), metric_snapshot)))
+            # the archive is written before removal, so values can only be lost, not counted twice
+            _write_json(archive_path, archive)
+            os.remove(path)
+
+    def render(self) -> str:
+        """
+        Render metrics of all processes in Prometheus text format (version 0.0.4).
+        """
+        lines = []
+        for name, metric in sorted(self.collect().items()):
+            lines.append('# HELP %s %s' % (name, metric['help'].replace('\\', r'\\').replace('\n', r'\n')))
+            lines.append('# TYPE %s %s' % (name, metric['type']))
+            labelnames = metric['labelnames']
+            for labels, value in metric['samples']:
+                if metric['type'] != Histogram.type:
+                    lines.append('%s%s %s' % (name, _format_labels(labelnames, labels), _format_value(value)))
+                    continue
+
+                count = 0
+                for bound, bucket_count in zip(metric['buckets'] + [float('inf')], value['buckets']):
+                    count += bucket_count
+                    lines.append('%s_bucket%s %s' % (
+                        name, _format_labels(labelnames, labels, 'le="%s"' % _format_value(bound)), _format_value(count)
+                    ))
+                lines.append('%s_sum%s %s' % (name, _format_labels(labelnames, labels), _format_value(value['sum'])))
+                lines.append('%s_count%s %s' % (name, _format_labels(labelnames, labels), _format_value(count)))
+        return '\n'.join(lines) + '\n'
+
+    def __reset_after_fork(self):
+        # values of parent process are flushed by parent itself
+        self.__lock = threading.Lock()
+        self.__process_id = None
+        self.__flushed_at = 0.0
+        for metric in self.__metrics.values():
+            metric.reset()
+
+
+registry = Registry()
+atexit.register(registry.flush, force=True)
+
+requests_total = registry.counter(
+    'http_requests_total', 'Count of HTTP requests by URL name, method and status.', ('view', 'method', 'status')
+)
+requests_in_progress = registry.gauge('http_requests_in_progress', 'Count of HTTP requests in progress.')
+request_duration = registry.histogram(
+    'http_request_duration_seconds', 'Latency of HTTP requests by URL name.', ('view',)
+)
+request_db_duration = registry.histogram(
+    'http_request_db_duration_seconds', 'Time of SQL queries of HTTP requests by URL name.', ('view',)
+)
+request_db_queries = registry.histogram(
+    'http_request_db_queries', 'Count of SQL queries of HTTP requests by URL name.', ('view',),
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500)
+)
+response_size = registry.histogram(
+    'http_response_size_bytes', 'Size of HTTP responses (not streaming) by URL name.', ('view',),
+    buckets=(100, 1000, 10000, 100000, 1000000, 10000000)
+)
+
+
+class MetricsMiddleware:
+    """
+    Feed request metrics by URL name (not path, so count of labels is bounded): count by status, latency,
+    response size, SQL queries count and time (from RequestInstrumentationMiddleware, so it has to be after it).
+    It works in both synchronous and asynchronous chains of middlewares.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(self.get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        requests_in_progress.inc()
+        started_at = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            requests_in_progress.dec()
+        self.__observe(request, response, time.perf_counter() - started_at)
+        return response
+
+    async def __acall__(self, request):
+        requests_in_progress.inc()
+        started_at = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            requests_in_progress.dec()
+        self.__observe(request, response, time.perf_counter() - started_at)
+        return response
+
+    @staticmethod
+    def __observe(request, response, duration: float):
+        resolver_match = getattr(request, 'resolver_match', None)
+        view = resolver_match.view_name if resolver_match is not None else '<unresolved>'
+        requests_total.inc(view=view, method=request.method, status=response.status_code)
+        request_duration.observe(duration, view=view)
+        if not response.streaming:
+            response_size.observe(len(response.content), view=view)
+
+        request_metrics = get_request_metrics()
+        if request_metrics is not None:
+            request_db_duration.observe(request_metrics.db_seconds, view=view)
+            request_db_queries.observe(request_metrics.queries_count, view=view)
+
+        registry.flush()
+
+
+@swagger_auto_schema(method='get', auto_schema=None)
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def metrics_view(request):
+    """
+    Metrics of all processes in Prometheus text format, only for admins (e.g. Prometheus with token of staff user).
+    """
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,197 @@
+import asyncio
+import cProfile
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from django.conf import settings
+from django.urls import Resolver404, resolve
+from rest_framework.exceptions import APIException
+from rest_framework.permissions import IsAdminUser
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from common.asynchronous import db_sync_to_async
+
+CPROFILE_MODE = 'cprofile'
+SAMPLING_MODE = 'sampling'
+MODES = (CPROFILE_MODE, SAMPLING_MODE)
+
+
+def _get_directory() -> str:
+    return str(getattr(settings, 'PROFILING_DIR', 'profiles'))
+
+
+def _get_default_mode() -> str:
+    return getattr(settings, 'PROFILING_DEFAULT_MODE', SAMPLING_MODE)
+
+
+def _get_sample_rates() -> dict:
+    return getattr(settings, 'PROFILING_SAMPLE_RATES', {})
+
+
+def _get_interval() -> float:
+    return getattr(settings, 'PROFILING_SAMPLING_INTERVAL', 0.005)
+
+
+def _is_admin(request) -> bool:
+    """
+    Check the user by authenticators of API, the request isn't passed through DRF view yet.
+    """
+    api_request = Request(request, authenticators=[auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES])
+    try:
+        return IsAdminUser().has_permission(api_request, None)
+    except APIException:
+        return False
+
+
+class StackSampler(threading.Thread):
+    """
+    Sample stack of thread every interval and count collapsed stacks ('root;...;leaf' lines of flame graph).
+    """
+
+    def __init__(self, thread_id: int, interval: float):
+        super().__init__(name='stack-sampler', daemon=True)
+        self.stacks = Counter()
+        self.__thread_id = thread_id
+        self.__interval = interval
+        self.__stopped = threading.Event()
+
+    def run(self):
+        while not self.__stopped.wait(self.__interval):
+            frame = sys._current_frames().get(self.__thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append('%s (%s:%d)' % (code.co_name, code.co_filename, code.co_firstlineno))
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def stop(self):
+        self.__stopped.set()
+        self.join()
+
+    def write(self, path: str):
+        with open(path, 'w') as stream:
+            for stack, count in self.stacks.most_common():
+                stream.write('%s %d\n' % (stack, count))
+
+
+@contextmanager
+def _profile(mode: str, path: str) -> Iterator[None]:
+    """
+    Profile the current thread in block by mode and write artifact to path.
+    """
+    if mode == CPROFILE_MODE:
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            profiler.dump_stats(path)
+    else:
+        sampler = StackSampler(threading.get_ident(), _get_interval())
+        sampler.start()
+        try:
+            yield
+        finally:
+            sampler.stop()
+            sampler.write(path)
+
+
+class ProfilingMiddleware:
+    """
+    Profile requests and write artifacts to PROFILING_DIR:
+    - '<name>.prof' of deterministic profiler (cProfile, open by pstats or snakeviz),
+    - '<name>.collapsed' of sampling profiler (collapsed stacks for flamegraph.pl or speedscope).
+    Admin requests are profiled on demand by 'X-Profile' header or 'profile' query parameter with mode as value
+    ('cprofile' or 'sampling', anything else means PROFILING_DEFAULT_MODE), name of artifact is returned
+    in 'X-Profile-Artifact' header. Flag of not admin user is ignored.
+    Besides, requests of views from PROFILING_SAMPLE_RATES ({view name: rate}) are profiled by default mode
+    with such probability, so profiling can stay enabled in production.
+    It has to be after AuthenticationMiddleware. Only the thread of request is profiled: in asynchronous chain
+    of middlewares (ASGI) it's the thread of event loop, so code run by thread pool (e.g. database code
+    of coroutine views) isn't in artifact, but coroutines of concurrent requests can be.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(self.get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        flag = self.__get_flag(request)
+        mode, is_requested = self.__get_mode(request, flag, bool(flag) and _is_admin(request))
+        if mode is None:
+            return self.get_response(request)
+
+        name = self.__get_artifact_name(request, mode)
+        with _profile(mode, os.path.join(_get_directory(), name)):
+            response = self.get_response(request)
+        if is_requested:
+            response['X-Profile-Artifact'] = name
+        return response
+
+    async def __acall__(self, request):
+        flag = self.__get_flag(request)
+        # authentication queries database, so admin is checked only if profiling is requested
+        mode, is_requested = self.__get_mode(request, flag, bool(flag) and await db_sync_to_async(_is_admin)(request))
+        if mode is None:
+            return await self.get_response(request)
+
+        name = self.__get_artifact_name(request, mode)
+        with _profile(mode, os.path.join(_get_directory(), name)):
+            response = await self.get_response(request)
+        if is_requested:
+            response['X-Profile-Artifact'] = name
+        return response
+
+    @staticmethod
+    def __get_flag(request) -> Optional[str]:
+        return request.META.get('HTTP_X_PROFILE') or request.GET.get('profile')
+
+    @staticmethod
+    def __get_mode(request, flag: Optional[str], is_admin: bool) -> tuple:
+        """
+        Get mode of profiling (None, if request isn't profiled) and whether profiling is requested by admin.
+        """
+        if flag and is_admin:
+            return (flag if flag in MODES else _get_default_mode()), True
+
+        sample_rates = _get_sample_rates()
+        if sample_rates:
+            rate = sample_rates.get(ProfilingMiddleware.__get_view_name(request), 0.0)
+            if rate and random.random() < rate:
+                return _get_default_mode(), False
+        return None, False
+
+    @staticmethod
+    def __get_artifact_name(request, mode: str) -> str:
+        os.makedirs(_get_directory(), exist_ok=True)
+        return '%s-%s-%d-%s%s' % (
+            time.strftime('%Y%m%d-%H%M%S'),
+            (ProfilingMiddleware.__get_view_name(request) or 'unknown').replace(':', '.'),
+            os.getpid(),
+            uuid.uuid4().hex[:8],
+            '.prof' if mode == CPROFILE_MODE else '.collapsed'
+        )
+
+    @staticmethod
+    def __get_view_name(request) -> Optional[str]:
+        try:
+            return resolve(request.path_info).view_name
+        except Resolver404:
+            return None
@@ -0,0 +1,100 @@
+import csv
+import io
+from typing import Callable, Iterable, Iterator, List, Sequence
+
+from django.db.models import QuerySet
+
+
+def iterate_by_chunks(queryset: QuerySet, chunk_size: int) -> Iterator:
+    """
+    Iterate queryset by chunks of primary key ranges. Every chunk is a separate bounded query,
+    so prefetch_related works for it and only one chunk is held in memory.
+    :param queryset: queryset for iteration (its ordering will be replaced by primary key).
+    :param chunk_size: count objects in chunk.
+    :return: iterator over objects.
+    """
+    last_pk = None
+    while True:
+        chunk_queryset = queryset.order_by('pk')
+        if last_pk is not None:
+            chunk_queryset = chunk_queryset.filter(pk__gt=last_pk)
+
+        chunk = list(chunk_queryset[:chunk_size])
+        yield from chunk
+
+        if len(chunk) < chunk_size:
+            return
+        last_pk = chunk[-1].pk
+
+
+def iterate_values_by_chunks(queryset: QuerySet, fields: Sequence[str], chunk_size: int) -> Iterator[List[tuple]]:
+    """
+    Iterate values of fields by chunks of primary key ranges, like iterate_by_chunks, but without model objects.
+    Every chunk is a separate bounded query, so neither rows nor cursor (and its database snapshot) are held
+    between chunks, however slow the consumer is.
+    :param queryset: queryset for iteration (its ordering will be replaced by primary key).
+    :param fields: names of fields (lookups through relations are allowed).
+    :param chunk_size: count rows in chunk.
+    :return: iterator over lists of tuples of values.
+    """
+    last_pk = None
+    while True:
+        chunk_queryset = queryset.order_by('pk')
+        if last_pk is not None:
+            chunk_queryset = chunk_queryset.filter(pk__gt=last_pk)
+
+        chunk = list(chunk_queryset.values_list('pk', *fields)[:chunk_size])
+        if chunk:
+            yield [row[1:] for row in chunk]
+
+        if len(chunk) < chunk_size:
+            return
+        last_pk = chunk[-1][0]
+
+
+def csv_stream(header: Sequence[str], chunks: Iterable[Iterable[Sequence]]) -> Iterator[bytes]:
+    """
+    Stream chunks of rows as CSV, one piece of content per chunk. Header goes out before the first chunk is loaded.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def flush() -> bytes:
+        content = buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+        return content
+
+    writer.writerow(header)
+    yield flush()
+    for chunk in chunks:
+        writer.writerows(chunk)
+        yield flush()
+
+
+def ndjson_chunks_stream(chunks: Iterable[Iterable], render: Callable[[object], bytes]) -> Iterator[bytes]:
+    """
+    Stream chunks of items as newline delimited JSON, one piece of content per chunk.
+    """
+    for chunk in chunks:
+        yield b''.join(render(item) + b'\n' for item in chunk)
+
+
+def json_array_stream(items: Iterable, render: Callable[[object], bytes]) -> Iterator[bytes]:
+    """
+    Stream items as JSON array. Opening bracket goes out before the first item is loaded.
+    """
+    yield b'['
+    separator = b''
+    for item in items:
+        yield separator + render(item)
+        separator = b','
+    yield b']'
+
+
+def ndjson_stream(items: Iterable, render: Callable[[object], bytes]) -> Iterator[bytes]:
+    """
+    Stream items as newline delimited JSON (one item per line).
+    """
+    for item in items:
+        yield render(item) + b'\n'
@@ -1,5 +1,40 @@
-from rest_framework.viewsets import ViewSet
+import os
 
+from django.conf import settings
+from django.http import FileResponse
+from django.views.decorators.http import condition
 
-class SwaggerViewSet(ViewSet):
-    pass
+
+def __get_prebuilt_schema_file(request):
+    """
+    Get path of pre-generated schema, if it should be served for request, otherwise None.
+    """
+    schema_file = getattr(settings, 'SWAGGER_SCHEMA_FILE', None)
+    if settings.DEBUG or not schema_file or request.GET.get('format') != 'openapi' or not os.path.isfile(schema_file):
+        return None
+    return schema_file
+
+
+def __get_prebuilt_schema_etag(request, *args, **kwargs):
+    schema_file = __get_prebuilt_schema_file(request)
+    if schema_file is None:
+        return None
+    stat = os.stat(schema_file)
+    return '"%x-%x"' % (stat.st_mtime_ns, stat.st_size)
+
+
+def with_prebuilt_schema(schema_ui_view):
+    """
+    Wrap drf-yasg schema UI view to serve schema (requested by UI with '?format=openapi') from the file
+    SWAGGER_SCHEMA_FILE, which is generated at build/deploy time by 'generate_swagger' command.
+    File is streamed with ETag by its modification time and size. In DEBUG mode or without the file
+    schema is generated live by wrapped view.
+    """
+    @condition(etag_func=__get_prebuilt_schema_etag)
+    def view(request, *args, **kwargs):
+        schema_file = __get_prebuilt_schema_file(request)
+        if schema_file is None:
+            return schema_ui_view(request, *args, **kwargs)
+        return FileResponse(open(schema_file, 'rb'), content_type='application/openapi+json; charset=utf-8')
+
+    return view
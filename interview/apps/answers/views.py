@@ -4,16 +4,16 @@ from drf_yasg import openapi
 from drf_yasg.openapi import Parameter
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework import status
-from rest_framework.authentication import TokenAuthentication
 from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
 from rest_framework.viewsets import ViewSet
 
+from common.django_rest_framework.authentication import CachedTokenAuthentication
 from interview.apps.answers.models import Answer, AnswerSerializer
 
 
 class AnswerViewSet(ViewSet):
-    authentication_classes = (TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,)
     permission_classes = (IsAdminUser,)
 
     __path_param_answer_id = Parameter(
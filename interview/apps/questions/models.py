@@ -1,7 +1,10 @@
-from django.db import models
+from collections import Counter
+
+from django.db import models, transaction
 from rest_framework import serializers
 from rest_framework.fields import empty
 
+from common.db.bulk import bulk_create_in_transaction
 from common.transform import trunc_to8char
 from interview.apps.topics.models import Topic
 
@@ -57,6 +60,58 @@ class QuestionSerializer(serializers.ModelSerializer):
         fields = ('id', 'text', 'type', 'answers',)
 
 
+class UserQuestionSerializer(QuestionSerializer):
+    """
+    Question with 'answer_id' of user, if user answered on it. Answers of user are prefetched to 'users_answers'.
+    """
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        users_answers = getattr(instance, 'users_answers', None)
+        if users_answers:
+            data['answer_id'] = users_answers[0].answer_id
+        return data
+
+
+class BulkInsertQuestionSerializer(serializers.ListSerializer):
+
+    def validate(self, attrs):
+        # foreign key would fail on commit of the whole batch, so topics are checked by one query
+        topics_ids = set(Topic.objects.filter(
+            id__in={item['topic_id'] for item in attrs}
+        ).values_list(
+            'id', flat=True
+        ))
+        errors = [
+            {} if item['topic_id'] in topics_ids else {'topic_id': ['Topic %s doesn\'t exist.' % item['topic_id']]}
+            for item in attrs
+        ]
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return attrs
+
+    def create(self, validated_data):
+        from interview.apps.answers.models import Answer
+        from interview.apps.users_answers.models import UserTopicProgress
+
+        with transaction.atomic():
+            questions_answers = [item.pop('answers', []) for item in validated_data]
+            questions = bulk_create_in_transaction(Question, [Question(**item) for item in validated_data])
+            Answer.objects.bulk_create([
+                Answer(text=text, question_id=question.id)
+                for question, answers in zip(questions, questions_answers)
+                for text in answers
+            ])
+            # bulk insert doesn't send 'post_save' signal
+            topics_ids = {question.topic_id for question in questions}
+            UserTopicProgress.objects.refresh_total(topics_ids)
+            Topic.objects.touch(topics_ids)
+        return questions
+
+    def update(self, instance, validated_data):
+        pass
+
+
 class InsertQuestionSerializer(serializers.Serializer):
 
     text = serializers.CharField(max_length=1024)
@@ -67,50 +122,67 @@ class InsertQuestionSerializer(serializers.Serializer):
     )
     topic_id = serializers.IntegerField()
 
+    class Meta:
+        list_serializer_class = BulkInsertQuestionSerializer
+
     def __init__(self, instance=None, data=empty, **kwargs):
         super().__init__(instance, data, **kwargs)
 
         self.__answers = None
 
-    def create(self, validated_data):
-        self.__validate_answers(validated_data)
-        question = Question.objects.create(**validated_data)
-        self.__create_answers(question.id)
-        return question
-
-    def update(self, instance, validated_data):
-        self.__validate_answers(validated_data)
-        self.__delete_answers(instance.id)
-        self.__create_answers(instance.id)
-        instance.text = validated_data.get('text', instance.text)
-        instance.type = validated_data.get('type', instance.type)
-        instance.save()
-        return instance
-
-    def __validate_answers(self, validated_data):
-        self.__answers = validated_data.pop('answers', [])
-
-        count_answers = len(self.__answers)
-        is_enumerate_type = Question.is_enumerate_type(validated_data['type'])
+    def validate(self, attrs):
+        type_option = attrs.get('type', getattr(self.instance, 'type', None))
+        count_answers = len(attrs.get('answers', []))
+        is_enumerate_type = Question.is_enumerate_type(type_option)
 
         if count_answers < 1 and is_enumerate_type:
             raise serializers.ValidationError('This \'type\' can\'t be used together an empty \'answers\'')
         elif count_answers > 0 and not is_enumerate_type:
             raise serializers.ValidationError('This \'type\' can\'t be used together a not empty \'answers\'')
 
+        return attrs
+
+    def create(self, validated_data):
+        self.__answers = validated_data.pop('answers', [])
+        with transaction.atomic():
+            question = Question.objects.create(**validated_data)
+            self.__create_answers(question.id)
+        return question
+
+    def update(self, instance, validated_data):
+        self.__answers = validated_data.pop('answers', [])
+        with transaction.atomic():
+            self.__reconcile_answers(instance.id)
+            instance.text = validated_data.get('text', instance.text)
+            instance.type = validated_data.get('type', instance.type)
+            instance.save()
+        return instance
+
     def __create_answers(self, question_id):
         from interview.apps.answers.models import Answer
 
-        for text in self.__answers:
-            Answer.objects.create(**{
-                'text': text,
-                'question_id': question_id,
-            })
+        Answer.objects.bulk_create([
+            Answer(text=text, question_id=question_id)
+            for text in self.__answers
+        ])
 
-    @staticmethod
-    def __delete_answers(question_id):
+    def __reconcile_answers(self, question_id):
+        """
+        Keep answers which texts are unchanged (with their ids and users answers),
+        delete the rest and insert the new ones by set-based statements.
+        """
         from interview.apps.answers.models import Answer
 
-        answers = Answer.objects.filter(question_id=question_id)
-        for answer in answers:
-            answer.delete()
+        new_answers = Counter(self.__answers)
+        deleted_answers_ids = []
+        for answer_id, text in Answer.objects.filter(question_id=question_id).values_list('id', 'text'):
+            if new_answers[text] > 0:
+                new_answers[text] -= 1
+            else:
+                deleted_answers_ids.append(answer_id)
+
+        if deleted_answers_ids:
+            Answer.objects.filter(id__in=deleted_answers_ids).delete()
+
+        self.__answers = list(new_answers.elements())
+        self.__create_answers(question_id)
@@ -4,16 +4,18 @@ from drf_yasg import openapi
 from drf_yasg.openapi import Parameter
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework import status
-from rest_framework.authentication import TokenAuthentication
+from rest_framework.decorators import action
 from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
 from rest_framework.viewsets import ViewSet
 
+from common.django_rest_framework.authentication import CachedTokenAuthentication
+from common.instrumentation import measure
 from interview.apps.questions.models import Question, QuestionSerializer, InsertQuestionSerializer
 
 
 class QuestionViewSet(ViewSet):
-    authentication_classes = (TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,)
     permission_classes = (IsAdminUser,)
 
     __path_param_question_id = Parameter(
@@ -42,6 +44,27 @@ class QuestionViewSet(ViewSet):
         else:
             return Response(question_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    @swagger_auto_schema(
+        request_body=InsertQuestionSerializer(many=True),
+        responses={
+            **__response_list,
+            **__response_400,
+        }
+    )
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        questions_serializer = InsertQuestionSerializer(data=request.data, many=True)
+        if questions_serializer.is_valid():
+            questions = questions_serializer.save()
+            questions = Question.objects.prefetch_related('answers').filter(
+                id__in=[question.id for question in questions]
+            ).order_by('id')
+            with measure('serialize'):
+                questions_data = QuestionSerializer(questions, many=True).data
+            return Response(questions_data, status=status.HTTP_200_OK)
+        else:
+            return Response(questions_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
     @swagger_auto_schema(
         manual_parameters=[__path_param_question_id],
         request_body=InsertQuestionSerializer,
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class TopicConfig(AppConfig):
     name = 'interview.apps.topics'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,82 @@
+"""
+Cache of serialized topic trees keyed by revisions of topics.
+
+Changes of topic, its questions or answers touch the topic (increase its revision and modification time in database),
+and trees are cached under keys with them, so stale trees just become unreachable in every process at once
+and expire by timeout of cache backend. ETag of topics views is computed from the same revisions before trees
+are read, so a response is never older than its ETag, whichever process has served it.
+"""
+import threading
+from typing import Iterable, List
+
+from django.conf import settings
+from django.core.cache import caches
+
+from common.instrumentation import measure
+from common.metrics import registry
+from interview.apps.topics.models import Topic, TopicSerializer
+
+REVISION_FIELDS = ('id', 'revision', 'modified_at')
+
+__cache_requests = registry.counter('topics_cache_requests_total', 'Lookups of topic trees in cache.', ('result',))
+
+__counters_lock = threading.Lock()
+__counters = {
+    'hits': 0,
+    'misses': 0,
+}
+
+
+def __get_cache():
+    return caches[getattr(settings, 'TOPICS_CACHE_ALIAS', 'default')]
+
+
+def __tree_key(topic: Topic) -> str:
+    return 'topic:%s:tree:%s:%s' % (topic.id, topic.revision, topic.modified_at.isoformat())
+
+
+def __count(hits: int, misses: int):
+    with __counters_lock:
+        __counters['hits'] += hits
+        __counters['misses'] += misses
+    if hits:
+        __cache_requests.inc(hits, result='hit')
+    if misses:
+        __cache_requests.inc(misses, result='miss')
+
+
+def get_stats() -> dict:
+    """
+    Get hits and misses counters of the topic trees cache (of the current process).
+    """
+    with __counters_lock:
+        return dict(__counters)
+
+
+def get_topics_trees(topics: Iterable[Topic]) -> List[dict]:
+    """
+    Get serialized topic trees, missed ones are loaded from database and put to cache.
+    :param topics: topics with loaded REVISION_FIELDS (e.g. Topic.objects.only(*REVISION_FIELDS)),
+    missed trees are loaded from the same database.
+    :return: serialized topic trees in order of topics (topics deleted meanwhile are skipped).
+    """
+    cache = __get_cache()
+    topics = list(topics)
+
+    tree_keys = {topic.id: __tree_key(topic) for topic in topics}
+    cached_trees = cache.get_many(tree_keys.values())
+    trees = {topic_id: cached_trees[key] for topic_id, key in tree_keys.items() if key in cached_trees}
+
+    missed_topics_ids = [topic.id for topic in topics if topic.id not in trees]
+    __count(len(topics) - len(missed_topics_ids), len(missed_topics_ids))
+
+    if missed_topics_ids:
+        missed_topics = Topic.objects.using(topics[0]._state.db).with_questions().filter(id__in=missed_topics_ids)
+        missed_trees = {}
+        with measure('serialize'):
+            for topic in missed_topics:
+                # topic could be changed after its revision was read, so the tree is cached under its own revision
+                trees[topic.id] = missed_trees[__tree_key(topic)] = TopicSerializer(topic).data
+        cache.set_many(missed_trees)
+
+    return [trees[topic.id] for topic in topics if topic.id in trees]
@@ -0,0 +1,258 @@
+import codecs
+import json
+import os
+import time
+from typing import Iterator
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.exceptions import ValidationError
+
+from common.db.bulk import bulk_create_in_transaction
+from interview.apps.answers.models import Answer
+from interview.apps.questions.models import InsertQuestionSerializer, Question
+from interview.apps.topics.models import Topic, TopicSerializer, TopicsImport
+
+NDJSON_FORMAT = 'ndjson'
+JSON_FORMAT = 'json'
+
+_read_size = 2 ** 20
+
+
+def _detect_format(path: str) -> str:
+    with open(path, 'rb') as stream:
+        while True:
+            block = stream.read(_read_size)
+            if not block:
+                return NDJSON_FORMAT
+            block = block.lstrip(codecs.BOM_UTF8 + b' \t\r\n')
+            if block:
+                return JSON_FORMAT if block.startswith(b'[') else NDJSON_FORMAT
+
+
+def _read_ndjson(stream, offset: int) -> Iterator[tuple]:
+    """
+    Yield (record, error, offset after record) of lines starting at byte offset, a wrong line is an error of record.
+    """
+    stream.seek(offset)
+    for line in stream:
+        offset += len(line)
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line), None, offset
+        except ValueError as error:
+            yield None, 'Invalid JSON: %s' % error, offset
+
+
+def _read_json_array(stream, offset: int) -> Iterator[tuple]:
+    """
+    Yield (record, None, offset after record) of items of JSON array starting at byte offset
+    (0 or offset after an item), decoding by blocks, so the whole file isn't loaded to memory.
+    """
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder('utf-8')()
+    is_started = offset > 0
+    stream.seek(offset)
+    if offset == 0 and stream.read(len(codecs.BOM_UTF8)) == codecs.BOM_UTF8:
+        offset = len(codecs.BOM_UTF8)
+    stream.seek(offset)
+    buffer = ''
+    position = 0
+    is_eof = False
+
+    def consume(count: int):
+        # offsets are in bytes of file, but the buffer is decoded text
+        nonlocal buffer, position, offset
+        offset += len(buffer[position:position + count].encode('utf-8'))
+        position += count
+        if position > _read_size:
+            buffer, position = buffer[position:], 0
+
+    while True:
+        while position < len(buffer) and buffer[position] in ' \t\r\n':
+            consume(1)
+        if position == len(buffer):
+            if is_eof:
+                raise CommandError('Unexpected end of JSON array at byte %d.' % offset)
+            block = stream.read(_read_size)
+            is_eof = not block
+            buffer += text_decoder.decode(block, final=is_eof)
+            continue
+
+        char = buffer[position]
+        if not is_started:
+            if char != '[':
+                raise CommandError('JSON array is expected at byte %d.' % offset)
+            is_started = True
+            consume(1)
+        elif char == ']':
+            return
+        elif char == ',':
+            consume(1)
+        else:
+            try:
+                record, end = decoder.raw_decode(buffer, position)
+            except ValueError as error:
+                if is_eof:
+                    raise CommandError('Invalid JSON at byte %d: %s' % (offset, error))
+                # the item isn't read completely yet
+                block = stream.read(_read_size)
+                is_eof = not block
+                buffer += text_decoder.decode(block, final=is_eof)
+                continue
+            consume(end - position)
+            yield record, None, offset
+
+
+class Command(BaseCommand):
+    help = 'Import topics with questions and answers from JSON array or NDJSON file of topics trees ' \
+           '(format of topics export, ids of file are ignored). Records are validated by rules of topics ' \
+           'and questions API and inserted by batches in transactions. Position in file is saved to checkpoint ' \
+           'in database in transaction of every batch, so interrupted import is continued by --resume. ' \
+           'Progress and throughput are reported to stderr.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('file', type=str, help='Path of JSON array or NDJSON file.')
+        parser.add_argument('--batch-size', type=int, default=500, help='Count of topics in one transaction.')
+        parser.add_argument('--resume', action='store_true', help='Continue import from checkpoint.')
+        parser.add_argument('--restart', action='store_true',
+                            help='Remove checkpoint and import the file from the start.')
+        parser.add_argument('--skip-invalid', action='store_true',
+                            help='Report invalid records to stderr and continue, otherwise import is stopped '
+                                 'on the first one (committed batches are kept in checkpoint).')
+        parser.add_argument('--progress-seconds', type=float, default=5.0, help='Interval of progress reports.')
+
+    def handle(self, *args, **options):
+        path = os.path.abspath(options['file'])
+        if not os.path.isfile(path):
+            raise CommandError('File %s doesn\'t exist.' % path)
+        if options['restart']:
+            TopicsImport.objects.filter(file=path).delete()
+
+        checkpoint = TopicsImport.objects.filter(file=path).first()
+        if checkpoint is not None:
+            if not options['resume']:
+                raise CommandError('Checkpoint of %s exists, use --resume to continue import or --restart.' % path)
+            self.stderr.write('Resume from byte %d after %d records.' % (checkpoint.offset, checkpoint.records))
+        else:
+            # the checkpoint is inserted with the first batch
+            checkpoint = TopicsImport(file=path, format=_detect_format(path))
+
+        read = _read_json_array if checkpoint.format == JSON_FORMAT else _read_ndjson
+        topic_serializer = TopicSerializer()
+        question_serializer = InsertQuestionSerializer()
+        started_at = reported_at = time.perf_counter()
+        rows_count = 0
+        batch = []
+
+        def commit(offset: int):
+            nonlocal rows_count
+            with transaction.atomic():
+                counts = self.__insert(batch)
+                checkpoint.offset = offset
+                for name, count in counts.items():
+                    setattr(checkpoint, name, getattr(checkpoint, name) + count)
+                    rows_count += count
+                checkpoint.save()
+            batch.clear()
+
+        with open(path, 'rb') as stream:
+            offset = checkpoint.offset
+            for record, error, end_offset in read(stream, offset):
+                try:
+                    if error is not None:
+                        raise ValidationError(error)
+                    batch.append(self.__validate(record, topic_serializer, question_serializer))
+                except ValidationError as validation_error:
+                    message = 'Record #%d is invalid: %s' % (
+                        checkpoint.records + 1, json.dumps(validation_error.detail)
+                    )
+                    if not options['skip_invalid']:
+                        # the invalid record is the first one to import after fix of file
+                        commit(offset)
+                        raise CommandError(message)
+                    checkpoint.invalid += 1
+                    self.stderr.write(message)
+                checkpoint.records += 1
+                offset = end_offset
+
+                if len(batch) >= options['batch_size']:
+                    commit(offset)
+
+                    now = time.perf_counter()
+                    if now - reported_at >= options['progress_seconds']:
+                        reported_at = now
+                        self.__report('Imported', checkpoint, rows_count, now - started_at)
+            commit(offset)
+
+        self.__report('Done', checkpoint, rows_count, time.perf_counter() - started_at)
+
+    @staticmethod
+    def __validate(record, topic_serializer: TopicSerializer, question_serializer: InsertQuestionSerializer) -> tuple:
+        """
+        Validate record by serializers of API (built once, so their fields aren't built for every record).
+        Answers are texts or objects with text, topic of questions isn't inserted yet.
+        :return: validated topic and its questions.
+        """
+        topic = topic_serializer.run_validation(record)
+        questions = record.get('questions') or []
+        if not isinstance(questions, list):
+            raise ValidationError({'questions': ['Expected a list of items.']})
+
+        validated_questions = []
+        errors = []
+        for question in questions:
+            if isinstance(question, dict) and isinstance(question.get('answers'), list):
+                question = {
+                    **question,
+                    'answers': [
+                        answer.get('text') if isinstance(answer, dict) else answer
+                        for answer in question['answers']
+                    ],
+                    'topic_id': 0,
+                }
+            elif isinstance(question, dict):
+                question = {**question, 'topic_id': 0}
+            try:
+                validated_questions.append(question_serializer.run_validation(question))
+                errors.append({})
+            except ValidationError as error:
+                errors.append(error.detail)
+        if any(errors):
+            raise ValidationError({'questions': errors})
+        return topic, validated_questions
+
+    @staticmethod
+    def __insert(batch: list) -> dict:
+        """
+        Insert topics of batch with their questions and answers, it's called in transaction of checkpoint.
+        """
+        if not batch:
+            return {'topics': 0, 'questions': 0, 'answers': 0}
+
+        topics = bulk_create_in_transaction(Topic, [Topic(**topic) for topic, _ in batch])
+        questions_answers = []
+        questions = []
+        for topic, (_, topic_questions) in zip(topics, batch):
+            for question in topic_questions:
+                questions_answers.append(question.pop('answers', []))
+                question['topic_id'] = topic.id
+                questions.append(Question(**question))
+        questions = bulk_create_in_transaction(Question, questions)
+        answers = Answer.objects.bulk_create([
+            Answer(text=text, question_id=question.id)
+            for question, answers in zip(questions, questions_answers)
+            for text in answers
+        ])
+        # bulk insert doesn't send 'post_save' signal, but topics are new: nobody has progress in them,
+        # and their trees are cached under their own revisions
+        return {'topics': len(topics), 'questions': len(questions), 'answers': len(answers)}
+
+    def __report(self, prefix: str, checkpoint: TopicsImport, rows_count: int, duration: float):
+        self.stderr.write('%s: %d records (%d invalid), %d topics, %d questions, %d answers in %.1f s '
+                          '(%.0f rows/s).' % (
+                              prefix, checkpoint.records, checkpoint.invalid, checkpoint.topics,
+                              checkpoint.questions, checkpoint.answers, duration,
+                              rows_count / duration if duration else 0
+                          ))
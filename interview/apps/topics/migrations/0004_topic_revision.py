@@ -0,0 +1,24 @@
+# Generated by Django 3.1.14 on 2026-10-18 17:39
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('topics', '0003_auto_20200814_0149'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='topic',
+            name='modified_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name='topic',
+            name='revision',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 3.1.14 on 2026-10-18 17:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('topics', '0004_topic_revision'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='topic',
+            index=models.Index(fields=['start_date', 'finish_date'], name='topics_start_finish_date'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 3.1.14 on 2026-10-18 18:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('topics', '0005_topic_dates_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TopicsImport',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('file', models.CharField(max_length=1024, unique=True)),
+                ('format', models.CharField(max_length=16)),
+                ('offset', models.BigIntegerField(default=0)),
+                ('records', models.IntegerField(default=0)),
+                ('invalid', models.IntegerField(default=0)),
+                ('topics', models.IntegerField(default=0)),
+                ('questions', models.IntegerField(default=0)),
+                ('answers', models.IntegerField(default=0)),
+                ('modified_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'topics_imports',
+            },
+        ),
+    ]
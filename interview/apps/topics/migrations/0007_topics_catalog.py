@@ -0,0 +1,23 @@
+# Generated by Django 3.1.14 on 2026-10-18 18:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('topics', '0006_topicsimport'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TopicsCatalog',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('deleted_at', models.DateTimeField()),
+            ],
+            options={
+                'db_table': 'topics_catalog',
+            },
+        ),
+    ]
@@ -1,9 +1,91 @@
 from django.db import models
+from django.db.models import Count, Exists, F, Max, OuterRef, Prefetch, Subquery, Sum
+from django.utils import timezone
 from rest_framework import serializers
 
 from common.transform import trunc_to8char
 
 
+class TopicQuerySet(models.QuerySet):
+
+    def with_questions(self):
+        """
+        Load the whole topic tree (questions and their answers) in a fixed number of queries.
+        """
+        return self.prefetch_related('questions__answers')
+
+    def with_user_answers(self, user_id):
+        """
+        Load the whole topic tree with answers of user on questions (in 'users_answers' attribute of question).
+        """
+        from interview.apps.users_answers.models import UserAnswer
+
+        return self.with_questions().prefetch_related(
+            Prefetch('questions__answer', queryset=UserAnswer.objects.filter(user_id=user_id), to_attr='users_answers')
+        )
+
+    def passed_by_user(self, user_id):
+        """
+        Filter topics, all questions of which are answered by user.
+        """
+        return self.filter(id__in=self.__passed_topics_ids(user_id))
+
+    def active_for_user(self, user_id, date):
+        """
+        Filter topics with questions, which are open at the date and aren't passed by user.
+        """
+        from interview.apps.questions.models import Question
+
+        return self.filter(
+            start_date__lte=date,
+            finish_date__gte=date
+        ).filter(
+            Exists(Question.objects.filter(topic_id=OuterRef('id')))
+        ).exclude(
+            id__in=self.__passed_topics_ids(user_id)
+        )
+
+    @staticmethod
+    def __passed_topics_ids(user_id):
+        from interview.apps.users_answers.models import UserTopicProgress
+
+        return UserTopicProgress.objects.filter(
+            user_id=user_id,
+            total_count__gt=0,
+            answered_count__gte=F('total_count')
+        ).values(
+            'topic_id'
+        )
+
+    def touch(self, topics_ids):
+        """
+        Increase revisions of topics, which trees were changed.
+        """
+        self.filter(
+            id__in=topics_ids
+        ).update(
+            revision=F('revision') + 1,
+            modified_at=timezone.now()
+        )
+
+    def revision(self) -> tuple:
+        """
+        Get cheap revision marker of topics of queryset by one aggregate query.
+        Modification time of the left topics goes back after deletion, so time of the last deletion is counted too.
+        :return: marker string and last modification time (or None for empty queryset).
+        """
+        revision = self.aggregate(
+            count=Count('id'),
+            max_id=Max('id'),
+            revision=Sum('revision'),
+            modified_at=Max('modified_at'),
+            # uncorrelated subquery is wrapped into aggregate to be read by the same query
+            deleted_at=Max(Subquery(TopicsCatalog.objects.values('deleted_at')[:1]))
+        )
+        marker = '%(count)s:%(max_id)s:%(revision)s:%(modified_at)s:%(deleted_at)s' % revision
+        return marker, max(filter(None, (revision['modified_at'], revision['deleted_at'])), default=None)
+
+
 class Topic(models.Model):
 
     id = models.AutoField(primary_key=True)
@@ -11,9 +93,16 @@ class Topic(models.Model):
     start_date = models.DateField(blank=False)
     finish_date = models.DateField(blank=False)
     description = models.CharField(max_length=512)
+    revision = models.PositiveIntegerField(default=0)
+    modified_at = models.DateTimeField(default=timezone.now)
+
+    objects = TopicQuerySet.as_manager()
 
     class Meta:
         db_table = "topics"
+        indexes = [
+            models.Index(fields=['start_date', 'finish_date'], name='topics_start_finish_date'),
+        ]
 
     def __str__(self):
         return "%s [" \
@@ -33,6 +122,78 @@ class Topic(models.Model):
                )
 
 
+class TopicsCatalogQuerySet(models.QuerySet):
+
+    def mark_deleted(self):
+        """
+        Save time of deletion of topic to the only row of catalog.
+        """
+        deleted_at = timezone.now()
+        if not self.filter(id=1).update(deleted_at=deleted_at):
+            self.get_or_create(id=1, defaults={'deleted_at': deleted_at})
+
+
+class TopicsCatalog(models.Model):
+    """
+    The only row with time of the last deletion of topics, so 'Last-Modified' of topics lists doesn't go back.
+    """
+
+    id = models.AutoField(primary_key=True)
+    deleted_at = models.DateTimeField()
+
+    objects = TopicsCatalogQuerySet.as_manager()
+
+    class Meta:
+        db_table = "topics_catalog"
+
+    def __str__(self):
+        return "%s [" \
+               "id: %s, " \
+               "deleted_at: %s, " \
+               "]" %\
+               (
+                   self.__class__.__name__,
+                   self.id,
+                   self.deleted_at,
+               )
+
+
+class TopicsImport(models.Model):
+    """
+    Checkpoint of import of topics file (import_topics command): position in file after the last committed batch
+    and counts of imported rows. It's saved in transaction of batch, so resumed import never repeats a batch.
+    """
+
+    id = models.AutoField(primary_key=True)
+    file = models.CharField(max_length=1024, unique=True)
+    format = models.CharField(max_length=16)
+    offset = models.BigIntegerField(default=0)
+    records = models.IntegerField(default=0)
+    invalid = models.IntegerField(default=0)
+    topics = models.IntegerField(default=0)
+    questions = models.IntegerField(default=0)
+    answers = models.IntegerField(default=0)
+    modified_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "topics_imports"
+
+    def __str__(self):
+        return "%s [" \
+               "id: %s, " \
+               "file: %s, " \
+               "offset: %s, " \
+               "records: %s, " \
+               "]" %\
+               (
+                   self.__class__.__name__,
+                   self.id,
+                   self.file,
+                   self.offset,
+                   self.records,
+               )
+
+
 class TopicSerializer(serializers.ModelSerializer):
     from interview.apps.questions.models import QuestionSerializer
 
@@ -47,3 +208,9 @@ class TopicSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError('Field \'start_date\' can\'t be modified.')
         else:
             return super().update(instance, validated_data)
+
+
+class UserTopicSerializer(TopicSerializer):
+    from interview.apps.questions.models import UserQuestionSerializer
+
+    questions = UserQuestionSerializer(many=True, read_only=True, allow_null=True)
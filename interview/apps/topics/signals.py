@@ -0,0 +1,36 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from interview.apps.answers.models import Answer
+from interview.apps.questions.models import Question
+from interview.apps.topics.models import Topic, TopicsCatalog
+
+
+def _topics_changed(topics_ids):
+    # cached trees are keyed by revisions of topics
+    Topic.objects.touch(topics_ids)
+
+
+@receiver(post_save, sender=Topic)
+@receiver(post_delete, sender=Topic)
+def invalidate_topic_tree(sender, instance, **kwargs):
+    _topics_changed([instance.id])
+
+
+@receiver(post_delete, sender=Topic)
+def mark_topic_deleted(sender, instance, **kwargs):
+    # the deleted topic isn't counted in modification time of topics lists anymore
+    TopicsCatalog.objects.mark_deleted()
+
+
+@receiver(post_save, sender=Question)
+@receiver(post_delete, sender=Question)
+def invalidate_question_topic_tree(sender, instance, **kwargs):
+    _topics_changed([instance.topic_id])
+
+
+@receiver(post_save, sender=Answer)
+@receiver(post_delete, sender=Answer)
+def invalidate_answer_topic_tree(sender, instance, **kwargs):
+    # on cascade deletion question can be already deleted, then its own signal invalidates topic
+    _topics_changed(list(Question.objects.filter(id=instance.question_id).values_list('topic_id', flat=True)))
@@ -1,25 +1,53 @@
 from datetime import datetime
 
-from django.db.models import ProtectedError, Count, F, Q
+from django.db.models import ProtectedError
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils.decorators import method_decorator
 from drf_yasg import openapi
 from drf_yasg.openapi import Parameter
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework import status
-from rest_framework.authentication import TokenAuthentication
-from rest_framework.decorators import api_view
+from rest_framework.decorators import api_view, action
 from rest_framework.permissions import IsAdminUser
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 from rest_framework.viewsets import ViewSet
 
+from common.asynchronous import as_async_view
+from common.conditional import conditional_get
+from common.db.routers import is_user_pinned, use_replica
+from common.django_rest_framework.authentication import CachedTokenAuthentication
+from common.django_rest_framework.pagination import IdCursorPagination
 from common.enum import CustomEnum
-from interview.apps.questions.models import Question
-from interview.apps.topics.models import Topic, TopicSerializer
-from interview.apps.users_answers.models import UserAnswer
+from common.instrumentation import measure
+from common.streaming import iterate_by_chunks, json_array_stream, ndjson_stream
+from interview.apps.topics.cache import REVISION_FIELDS, get_topics_trees
+from interview.apps.topics.models import Topic, TopicSerializer, UserTopicSerializer
+from interview.apps.users_answers.models import AnswerPicks, QuestionPicksSerializer, UserAnswer
+
+
+def _topics_revision(request):
+    return Topic.objects.revision()
+
+
+def _topic_revision(request, pk):
+    try:
+        topic = Topic.objects.filter(pk=int(pk)).values('revision', 'modified_at').first()
+    except ValueError:
+        return None
+    if topic is None:
+        return None
+    return '%(revision)s:%(modified_at)s' % topic, topic['modified_at']
+
+
+class ExportOutputType(CustomEnum):
+    JSON = 'json'
+    NDJSON = 'ndjson'
 
 
 class TopicViewSet(ViewSet):
-    authentication_classes = (TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,)
     permission_classes = (IsAdminUser,)
 
     __path_param_topic_id = Parameter(
@@ -33,13 +61,53 @@ class TopicViewSet(ViewSet):
     __response_400 = {status.HTTP_400_BAD_REQUEST: 'Received wrong topic object.'}
     __response_404 = {status.HTTP_404_NOT_FOUND: 'Topic not found.'}
 
+    __export_chunk_size = 500
+
     @swagger_auto_schema(
+        manual_parameters=IdCursorPagination.manual_parameters,
         responses={**__response_list}
     )
+    @method_decorator(use_replica())
+    @method_decorator(conditional_get(_topics_revision))
     def list(self, request):
-        topics = Topic.objects.all()
-        topics_serializer = TopicSerializer(topics, many=True)
-        return Response(topics_serializer.data, status=status.HTTP_200_OK)
+        if IdCursorPagination.is_requested(request):
+            paginator = IdCursorPagination()
+            topics = paginator.paginate_queryset(Topic.objects.only(*REVISION_FIELDS), request, view=self)
+            return paginator.get_paginated_response(get_topics_trees(topics))
+        else:
+            return Response(get_topics_trees(Topic.objects.only(*REVISION_FIELDS)), status=status.HTTP_200_OK)
+
+    @swagger_auto_schema(
+        manual_parameters=[
+            Parameter(
+                'output',
+                in_=openapi.IN_QUERY,
+                description='Output format: JSON array (default) or newline delimited JSON.',
+                type=openapi.TYPE_STRING,
+                enum=ExportOutputType.values()
+            ),
+        ],
+        responses={
+            status.HTTP_200_OK: TopicSerializer(many=True),
+            status.HTTP_400_BAD_REQUEST: 'Received wrong output format.',
+        }
+    )
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        output_type = request.query_params.get('output', ExportOutputType.JSON.value)
+        if not ExportOutputType.has_value(output_type):
+            return Response(status=status.HTTP_400_BAD_REQUEST)
+
+        topics = iterate_by_chunks(Topic.objects.with_questions(), self.__export_chunk_size)
+        renderer = JSONRenderer()
+
+        def render(topic):
+            return renderer.render(TopicSerializer(topic).data)
+
+        if output_type == ExportOutputType.NDJSON.value:
+            return StreamingHttpResponse(ndjson_stream(topics, render), content_type='application/x-ndjson')
+        else:
+            return StreamingHttpResponse(json_array_stream(topics, render), content_type='application/json')
 
     @swagger_auto_schema(
         manual_parameters=[__path_param_topic_id],
@@ -48,10 +116,34 @@ class TopicViewSet(ViewSet):
             **__response_404,
         }
     )
+    @method_decorator(use_replica())
+    @method_decorator(conditional_get(_topic_revision))
     def retrieve(self, request, pk):
-        topic = get_object_or_404(Topic, pk=pk)
-        topic_serializer = TopicSerializer(topic)
-        return Response(topic_serializer.data, status=status.HTTP_200_OK)
+        try:
+            topics = get_topics_trees(Topic.objects.only(*REVISION_FIELDS).filter(pk=int(pk)))
+        except ValueError:
+            raise Http404
+        if not topics:
+            raise Http404
+        return Response(topics[0], status=status.HTTP_200_OK)
+
+    @swagger_auto_schema(
+        manual_parameters=[__path_param_topic_id],
+        responses={
+            status.HTTP_200_OK: QuestionPicksSerializer(many=True),
+            **__response_404,
+        }
+    )
+    @action(detail=True, methods=['get'])
+    @method_decorator(use_replica())
+    def stats(self, request, pk):
+        try:
+            questions = AnswerPicks.objects.of_topic(int(pk))
+        except ValueError:
+            raise Http404
+        if not questions and not Topic.objects.filter(pk=pk).exists():
+            raise Http404
+        return Response(QuestionPicksSerializer(questions, many=True).data, status=status.HTTP_200_OK)
 
     @swagger_auto_schema(
         request_body=TopicSerializer,
@@ -108,6 +200,29 @@ class UserTopicType(CustomEnum):
     PASSED = 'passed'
 
 
+def _today():
+    return datetime.now().date()
+
+
+def _is_users_topics_pinned(request):
+    return is_user_pinned(request.query_params.get('user_id'))
+
+
+def _users_topics_revision(request):
+    try:
+        user_id = int(request.query_params.get('user_id'))
+    except (TypeError, ValueError):
+        return None
+
+    topics_marker, topics_modified_at = Topic.objects.revision()
+    answers_marker, answers_modified_at = UserAnswer.objects.revision(user_id)
+    today = _today()
+    marker = '%s|%s|%s' % (topics_marker, answers_marker, today)
+    # active topics are changed by date too
+    day_started_at = datetime.combine(today, datetime.min.time()).astimezone()
+    return marker, max(filter(None, (topics_modified_at, answers_modified_at, day_started_at)))
+
+
 @swagger_auto_schema(
     method='GET',
     manual_parameters=[
@@ -124,13 +239,16 @@ class UserTopicType(CustomEnum):
             description='User Id',
             type=openapi.TYPE_INTEGER
         ),
+        *IdCursorPagination.manual_parameters,
     ],
     responses={
-        status.HTTP_200_OK: TopicSerializer(many=True),
+        status.HTTP_200_OK: UserTopicSerializer(many=True),
         status.HTTP_400_BAD_REQUEST: 'Received wrong parameters for filtering.'
     }
 )
 @api_view(['GET'])
+@use_replica(_is_users_topics_pinned)
+@conditional_get(_users_topics_revision)
 def get_users_topics(request):
     try:
         user_topic_type = request.query_params.get('type')
@@ -142,67 +260,25 @@ def get_users_topics(request):
         is_active_type = (user_topic_type == UserTopicType.ACTIVE.value)
 
         if is_active_type:
-            topics_ids = Question.objects.values(
-                'topic_id'
-            ).annotate(
-                total_questions=Count('id'),
-                passed_questions=Count('id', filter=Q(answer__user_id=user_id))
-            ).filter(
-                total_questions__gt=F('passed_questions')
-            ).values_list(
-                'topic_id',
-                flat=True
-            )
-        else:
-            topics_ids = Question.objects.values(
-                'topic_id'
-            ).annotate(
-                total_questions=Count('id'),
-                passed_questions=Count('id', filter=Q(answer__user_id=user_id))
-            ).filter(
-                total_questions__exact=F('passed_questions')
-            ).values_list(
-                'topic_id',
-                flat=True
-            )
-
-        # TODO: may be up performance [https://docs.djangoproject.com/en/3.1/ref/models/querysets/#in]
-        if is_active_type:
-            date = datetime.now().date()
-            topics = Topic.objects.filter(
-                Q(start_date__lte=date) & Q(finish_date__gte=date) &
-                Q(id__in=topics_ids)
-            )
+            topics = Topic.objects.with_user_answers(user_id).active_for_user(user_id, _today())
         else:
-            topics = Topic.objects.filter(
-                id__in=topics_ids
-            )
+            topics = Topic.objects.with_user_answers(user_id).passed_by_user(user_id)
 
-        users_answers = UserAnswer.objects.filter(
-            user_id=user_id
-        ).values_list(
-            'question_id', 'answer_id'
-        )
-        answers_on_questions = {key: value for key, value in users_answers}
+        paginator = None
+        if IdCursorPagination.is_requested(request):
+            paginator = IdCursorPagination()
+            topics = paginator.paginate_queryset(topics, request)
 
-        topics_serializer = TopicSerializer(topics, many=True)
-        topics = topics_serializer.data
+        with measure('serialize'):
+            topics_data = UserTopicSerializer(topics, many=True).data
 
-        topics = __set_users_answers_to_questions(topics, answers_on_questions)
-
-        return Response(topics, status=status.HTTP_200_OK)
+        if paginator is not None:
+            return paginator.get_paginated_response(topics_data)
+        else:
+            return Response(topics_data, status=status.HTTP_200_OK)
     except AssertionError:
         return Response(status=status.HTTP_400_BAD_REQUEST)
 
 
-def __set_users_answers_to_questions(topics: list, answers_on_questions: dict) -> list:
-    if len(answers_on_questions) > 0 and len(topics) > 0:
-        for topic in topics:
-            questions = topic.get('questions', [])
-            for question in questions:
-                answer_id = answers_on_questions.pop(question['id'], None)
-                if answer_id is not None:
-                    question['answer_id'] = answer_id
-                if len(answers_on_questions) == 0:
-                    return topics
-    return topics
+# Coroutine version of 'users-topics' for ASGI server (see ASYNC_VIEWS setting)
+get_users_topics_async = as_async_view(get_users_topics)
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class UserAnswerConfig(AppConfig):
     name = 'interview.apps.users_answers'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,250 @@
+import json
+import platform
+import random
+import time
+from datetime import datetime, timedelta
+
+import django
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from common.benchmark import fill_topics, fill_users_answers, percentile, temporary_database
+from interview.apps.questions.models import Question
+from interview.apps.topics.models import Topic
+from interview.apps.topics.views import UserTopicType
+
+
+class Command(BaseCommand):
+    help = 'Benchmark every endpoint of API through Django test client on a seeded temporary database. ' \
+           'Latency percentiles, throughput and count of SQL queries per endpoint are written to JSON file.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', type=str, default='benchmark.json', help='Path of JSON report, "-" for stdout.')
+        parser.add_argument('--samples', type=int, default=50, help='Count of measured requests per endpoint.')
+        parser.add_argument('--warmup', type=int, default=3, help='Count of not measured requests per endpoint.')
+        parser.add_argument('--endpoints', type=str, nargs='*', help='Names of endpoints to run (default all).')
+        parser.add_argument('--topics', type=int, default=20, help='Count of topics.')
+        parser.add_argument('--questions', type=int, default=10, help='Count of questions in topic.')
+        parser.add_argument('--answers', type=int, default=4, help='Count of answers on question.')
+        parser.add_argument('--users', type=int, default=1000, help='Count of users with answers.')
+        parser.add_argument('--answered-part', type=float, default=0.3, help='Part of questions answered by user.')
+        parser.add_argument('--seed', type=int, default=0, help='Seed of random generator.')
+
+    def handle(self, *args, **options):
+        self.__options = options
+        self.__rnd = random.Random(options['seed'])
+
+        endpoints = self.__get_endpoints()
+        if options['endpoints']:
+            unknown_names = set(options['endpoints']) - {name for name, *_ in endpoints}
+            if unknown_names:
+                raise CommandError('Unknown endpoints: %s.' % ', '.join(sorted(unknown_names)))
+            endpoints = [endpoint for endpoint in endpoints if endpoint[0] in options['endpoints']]
+
+        setup_test_environment()
+        try:
+            with temporary_database():
+                self.__seed()
+                results = {name: self.__measure(*endpoint) for name, *endpoint in endpoints}
+        finally:
+            teardown_test_environment()
+
+        report = {
+            'meta': {
+                'created_at': datetime.now().isoformat(timespec='seconds'),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.settings_dict['ENGINE'],
+                'dataset': {
+                    name: options[name]
+                    for name in ('topics', 'questions', 'answers', 'users', 'answered_part', 'seed')
+                },
+                'samples': options['samples'],
+                'warmup': options['warmup'],
+            },
+            'endpoints': results,
+        }
+        self.__write_report(report)
+
+        for name, result in results.items():
+            self.stdout.write(
+                '%-24s p50: %8.2f ms, p95: %8.2f ms, p99: %8.2f ms, %8.1f req/s, queries: %s, errors: %d' % (
+                    name, result['p50_ms'], result['p95_ms'], result['p99_ms'], result['throughput_rps'],
+                    result['queries']['max'], result['errors'],
+                )
+            )
+
+    def __seed(self):
+        options = self.__options
+        fill_topics(options['topics'], options['questions'], options['answers'])
+        fill_users_answers(
+            options['users'], options['answered_part'],
+            options['topics'], options['questions'], options['answers'],
+            seed=options['seed']
+        )
+
+        user = User.objects.create_superuser('benchmark', 'benchmark@mail.com', 'benchmark')
+        self.__client = APIClient()
+        self.__client.credentials(HTTP_AUTHORIZATION='Token %s' % Token.objects.create(user=user).key)
+
+    def __write_report(self, report: dict):
+        content = json.dumps(report, indent=2, sort_keys=True)
+        if self.__options['output'] == '-':
+            self.stdout.write(content)
+        else:
+            with open(self.__options['output'], 'w') as stream:
+                stream.write(content + '\n')
+            self.stderr.write('Report is written to %s.' % self.__options['output'])
+
+    def __measure(self, method, get_request, expected_status) -> dict:
+        """
+        :param method: HTTP method.
+        :param get_request: function, which prepares state (not measured) and returns path and data of request.
+        :param expected_status: status of successful response.
+        """
+        latencies = []
+        queries_counts = []
+        errors_count = 0
+
+        for i in range(self.__options['warmup'] + self.__options['samples']):
+            path, data = get_request()
+            with CaptureQueriesContext(connection) as queries:
+                started_at = time.perf_counter()
+                response = getattr(self.__client, method)(path, data=data, format='json')
+                if response.streaming:
+                    b''.join(response.streaming_content)
+                duration = time.perf_counter() - started_at
+
+            if i < self.__options['warmup']:
+                continue
+            if response.status_code != expected_status:
+                errors_count += 1
+                continue
+            latencies.append(duration)
+            queries_counts.append(len(queries))
+
+        latencies.sort()
+        return {
+            'method': method.upper(),
+            'samples': len(latencies),
+            'errors': errors_count,
+            'mean_ms': sum(latencies) / len(latencies) * 1000 if latencies else 0.0,
+            'p50_ms': percentile(latencies, 0.50) * 1000,
+            'p95_ms': percentile(latencies, 0.95) * 1000,
+            'p99_ms': percentile(latencies, 0.99) * 1000,
+            'throughput_rps': len(latencies) / sum(latencies) if latencies else 0.0,
+            'queries': {
+                'min': min(queries_counts, default=0),
+                'max': max(queries_counts, default=0),
+                'mean': sum(queries_counts) / len(queries_counts) if queries_counts else 0.0,
+            },
+        }
+
+    def __get_endpoints(self) -> list:
+        """
+        Endpoints as tuples of name, HTTP method, function of request (path and data) and expected status.
+        """
+        rnd = self.__rnd
+        options = self.__options
+        questions_count = options['topics'] * options['questions']
+        today = datetime.now().date()
+
+        def random_topic_id():
+            return rnd.randint(1, options['topics'])
+
+        def random_question_id():
+            return rnd.randint(1, questions_count)
+
+        def random_answer_id(question_id):
+            return (question_id - 1) * options['answers'] + rnd.randrange(options['answers']) + 1
+
+        def new_topic():
+            return Topic.objects.create(
+                title='Topic.',
+                start_date=today,
+                finish_date=today + timedelta(weeks=1),
+                description='Description.'
+            )
+
+        def new_question_data(topic_id):
+            return {
+                'text': 'Question.',
+                'type': Question.ONE_OPTION,
+                'answers': ['Answer #%d.' % i for i in range(options['answers'])],
+                'topic_id': topic_id,
+            }
+
+        def users_topics(user_topic_type):
+            return lambda: (reverse('users-topics-list'), {
+                'type': user_topic_type,
+                'user_id': rnd.randint(1, options['users']),
+            })
+
+        def answer():
+            question_id = random_question_id()
+            return reverse('users-answers:users-answers-list'), {
+                'user_id': rnd.randint(1, options['users']),
+                'question_id': question_id,
+                'answer_id': random_answer_id(question_id),
+            }
+
+        def answers_batch():
+            topic_id = random_topic_id()
+            questions_ids = range((topic_id - 1) * options['questions'] + 1, topic_id * options['questions'] + 1)
+            return reverse('users-answers:users-answers-batch'), {
+                'user_id': rnd.randint(1, options['users']),
+                'topic_id': topic_id,
+                'answers': [
+                    {'question_id': question_id, 'answer_id': random_answer_id(question_id)}
+                    for question_id in questions_ids
+                ],
+            }
+
+        return [
+            ('topics-list', 'get', lambda: (reverse('topics:topics-list'), None), 200),
+            ('topics-list-page', 'get', lambda: (reverse('topics:topics-list'), {'page_size': 10}), 200),
+            ('topics-detail', 'get', lambda: (reverse('topics:topics-detail', args=[random_topic_id()]), None), 200),
+            ('topics-stats', 'get', lambda: (reverse('topics:topics-stats', args=[random_topic_id()]), None), 200),
+            ('topics-export', 'get', lambda: (reverse('topics:topics-export'), None), 200),
+            ('topics-export-ndjson', 'get', lambda: (reverse('topics:topics-export'), {'output': 'ndjson'}), 200),
+            ('topics-create', 'post', lambda: (reverse('topics:topics-list'), {
+                'title': 'Topic.',
+                'start_date': today.strftime('%Y-%m-%d'),
+                'finish_date': (today + timedelta(weeks=1)).strftime('%Y-%m-%d'),
+                'description': 'Description.',
+            }), 200),
+            ('topics-update', 'put', lambda: (reverse('topics:topics-detail', args=[random_topic_id()]), {
+                'description': 'Description #%d.' % rnd.randrange(1000),
+            }), 200),
+            ('topics-delete', 'delete', lambda: (reverse('topics:topics-detail', args=[new_topic().id]), None), 200),
+            ('questions-create', 'post', lambda: (
+                reverse('questions:questions-list'), new_question_data(random_topic_id())
+            ), 200),
+            ('questions-bulk', 'post', lambda: (
+                reverse('questions:questions-bulk'), [new_question_data(random_topic_id()) for _ in range(10)]
+            ), 200),
+            ('questions-update', 'put', lambda: (
+                reverse('questions:questions-detail', args=[random_question_id()]),
+                {'text': 'Question #%d.' % rnd.randrange(1000), 'type': Question.ONE_OPTION, 'answers': [
+                    'Answer #%d.' % i for i in range(options['answers'])
+                ]}
+            ), 200),
+            ('questions-delete', 'delete', lambda: (
+                reverse('questions:questions-detail', args=[
+                    Question.objects.create(text='Question.', type=Question.CUSTOM_OPTION, topic=new_topic()).id
+                ]), None
+            ), 200),
+            ('users-topics-active', 'get', users_topics(UserTopicType.ACTIVE.value), 200),
+            ('users-topics-passed', 'get', users_topics(UserTopicType.PASSED.value), 200),
+            ('users-answers-create', 'post', answer, 200),
+            ('users-answers-batch', 'post', answers_batch, 200),
+            ('users-answers-export', 'get', lambda: (
+                reverse('users-answers:users-answers-export'), {'topic_id': random_topic_id()}
+            ), 200),
+            ('swagger-schema', 'get', lambda: (reverse('schema-swagger-ui'), {'format': 'openapi'}), 200),
+        ]
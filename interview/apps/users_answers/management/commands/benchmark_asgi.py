@@ -0,0 +1,118 @@
+import asyncio
+import json
+import random
+import time
+
+from asgiref.sync import sync_to_async
+from django.core.management.base import BaseCommand
+from django.db.backends.signals import connection_created
+from django.test import AsyncRequestFactory
+from django.urls import reverse
+
+from common.benchmark import fill_topics, format_latencies, temporary_database
+from interview.apps.topics.views import UserTopicType, get_users_topics, get_users_topics_async
+from interview.apps.users_answers.views import UserAnswerViewSet, create_user_answer_async
+
+
+class Command(BaseCommand):
+    help = 'Load test of candidate-facing endpoints (users-topics and submission of user answer): ' \
+           'synchronous views, run by Django ASGI handler in one thread, versus coroutine views, ' \
+           'at growing count of concurrent requests. Temporary SQLite database is used.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 16, 64],
+                            help='Counts of concurrent requests.')
+        parser.add_argument('--requests', type=int, default=400, help='Count of requests at every concurrency.')
+        parser.add_argument('--write-ratio', type=float, default=0.1, help='Part of answer submissions.')
+        parser.add_argument('--query-delay', type=float, default=0.002,
+                            help='Delay of every query in seconds, like network round trip of database server.')
+        parser.add_argument('--users', type=int, default=1000, help='Count of users.')
+        parser.add_argument('--topics', type=int, default=5, help='Count of topics.')
+        parser.add_argument('--questions', type=int, default=10, help='Count of questions in topic.')
+        parser.add_argument('--answers', type=int, default=4, help='Count of answers on question.')
+
+    def handle(self, *args, **options):
+        self.__delay_seconds = options['query_delay']
+
+        with temporary_database():
+            fill_topics(options['topics'], options['questions'], options['answers'])
+
+            def delay_queries(sender, connection, **kwargs):
+                if self.__delay not in connection.execute_wrappers:
+                    connection.execute_wrappers.append(self.__delay)
+
+            connection_created.connect(delay_queries)
+            try:
+                # how Django 3.1 ASGI handler calls synchronous views
+                sync_views = tuple(
+                    sync_to_async(self.__render(view), thread_sensitive=True)
+                    for view in (get_users_topics, UserAnswerViewSet.as_view({'post': 'create'}))
+                )
+                async_views = (get_users_topics_async, create_user_answer_async)
+
+                for concurrency in options['concurrency']:
+                    for name, views in (('sync', sync_views), ('async', async_views)):
+                        latencies, duration, errors_count = asyncio.run(self.__load(views, concurrency, options))
+                        self.stdout.write('%-5s concurrency: %3d %s, errors: %d' % (
+                            name, concurrency, format_latencies(latencies, duration), errors_count
+                        ))
+            finally:
+                connection_created.disconnect(delay_queries)
+
+    def __delay(self, execute, sql, params, many, context):
+        time.sleep(self.__delay_seconds)
+        return execute(sql, params, many, context)
+
+    @staticmethod
+    def __render(view):
+        def inner(request):
+            response = view(request)
+            return response.render() if callable(getattr(response, 'render', None)) else response
+
+        return inner
+
+    async def __load(self, views, concurrency, options) -> tuple:
+        users_topics_view, create_user_answer_view = views
+        factory = AsyncRequestFactory()
+        questions_count = options['topics'] * options['questions']
+        answers_count = options['answers']
+        requests = iter(range(options['requests']))
+        latencies = []
+        errors = []
+
+        async def worker(seed):
+            rnd = random.Random(seed)
+            for _ in requests:
+                user_id = rnd.randint(1, options['users'])
+                if rnd.random() < options['write_ratio']:
+                    question_id = rnd.randint(1, questions_count)
+                    request = factory.post(
+                        reverse('users-answers:users-answers-list'),
+                        data=json.dumps({
+                            'user_id': user_id,
+                            'question_id': question_id,
+                            'answer_id': (question_id - 1) * answers_count + rnd.randrange(answers_count) + 1,
+                        }),
+                        content_type='application/json'
+                    )
+                    view = create_user_answer_view
+                else:
+                    request = factory.get('%s?type=%s&user_id=%d' % (
+                        reverse('users-topics-list'), UserTopicType.ACTIVE.value, user_id
+                    ))
+                    view = users_topics_view
+
+                started_at = time.perf_counter()
+                try:
+                    response = await view(request)
+                except Exception as e:
+                    errors.append(e)
+                    continue
+                if response.status_code == 200:
+                    latencies.append(time.perf_counter() - started_at)
+                else:
+                    errors.append(response.status_code)
+
+        started_at = time.perf_counter()
+        await asyncio.gather(*(worker(seed) for seed in range(concurrency)))
+        return latencies, time.perf_counter() - started_at, len(errors)
@@ -0,0 +1,104 @@
+import os
+import random
+import threading
+import time
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection
+
+from common.benchmark import fill_topics, format_latencies, temporary_database
+from interview.apps.topics.models import Topic
+from interview.apps.users_answers.models import UserAnswer
+
+
+class Command(BaseCommand):
+    help = 'Benchmark concurrent submissions of users answers and reads of users topics on a temporary SQLite ' \
+           'database with settings of the current profile (compare runs with and without ' \
+           'INTERVIEW_DB_PROFILE=production).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=4, help='Count of threads submitting answers.')
+        parser.add_argument('--readers', type=int, default=4, help='Count of threads reading users topics.')
+        parser.add_argument('--duration', type=float, default=10.0, help='Duration of benchmark in seconds.')
+        parser.add_argument('--users', type=int, default=1000, help='Count of users.')
+        parser.add_argument('--topics', type=int, default=20, help='Count of topics.')
+        parser.add_argument('--questions', type=int, default=10, help='Count of questions in topic.')
+        parser.add_argument('--answers', type=int, default=4, help='Count of answers on question.')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('Benchmark is intended for SQLite database only.')
+
+        with temporary_database():
+            fill_topics(options['topics'], options['questions'], options['answers'])
+            self.__print_profile()
+
+            results = self.__run(options)
+
+        for name, (latencies, errors_count) in results.items():
+            self.stdout.write('%-7s %s, errors: %d' % (
+                name, format_latencies(latencies, options['duration']), errors_count
+            ))
+
+    def __print_profile(self):
+        with connection.cursor() as cursor:
+            pragmas = {}
+            for name in ('journal_mode', 'synchronous', 'busy_timeout', 'mmap_size', 'cache_size'):
+                cursor.execute('PRAGMA %s' % name)
+                pragmas[name] = cursor.fetchone()[0]
+
+        self.stdout.write('profile: %s, engine: %s, conn_max_age: %s' % (
+            os.environ.get('INTERVIEW_DB_PROFILE', 'default'),
+            connection.settings_dict['ENGINE'],
+            connection.settings_dict['CONN_MAX_AGE'],
+        ))
+        self.stdout.write(', '.join('%s: %s' % item for item in pragmas.items()))
+
+    def __run(self, options) -> dict:
+        questions_count = options['topics'] * options['questions']
+        answers_count = options['answers']
+        users_count = options['users']
+        today = datetime.now().date()
+
+        def write(rnd):
+            question_id = rnd.randint(1, questions_count)
+            answer_id = (question_id - 1) * answers_count + rnd.randrange(answers_count) + 1
+            UserAnswer.objects.upsert(rnd.randint(1, users_count), question_id, answer_id)
+
+        def read(rnd):
+            user_id = rnd.randint(1, users_count)
+            # queries only, serialization is CPU bound and isn't affected by database settings
+            list(Topic.objects.with_user_answers(user_id).active_for_user(user_id, today))
+
+        results = {'writes': ([], []), 'reads': ([], [])}
+        deadline = time.perf_counter() + options['duration']
+        threads = [
+            threading.Thread(target=self.__work, args=(write, seed, deadline, *results['writes']))
+            for seed in range(options['writers'])
+        ] + [
+            threading.Thread(target=self.__work, args=(read, -seed - 1, deadline, *results['reads']))
+            for seed in range(options['readers'])
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        return {name: (latencies, len(errors)) for name, (latencies, errors) in results.items()}
+
+    @staticmethod
+    def __work(operation, seed, deadline, latencies: list, errors: list):
+        rnd = random.Random(seed)
+        try:
+            while time.perf_counter() < deadline:
+                started_at = time.perf_counter()
+                try:
+                    operation(rnd)
+                except OperationalError as e:
+                    # "database is locked" after busy timeout
+                    errors.append(e)
+                else:
+                    latencies.append(time.perf_counter() - started_at)
+        finally:
+            connection.close()
@@ -0,0 +1,76 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from interview.apps.users_answers.models import UserAnswer, ExportUsersAnswersSerializer
+from interview.apps.users_answers.views import ExportOutputType, export_stream
+
+
+class Command(BaseCommand):
+    help = 'Export answers of users on questions of topic (or modified in time range) with texts of questions ' \
+           'and answers as CSV or NDJSON. Rows are read by chunks of bounded queries, so memory doesn\'t depend ' \
+           'on count of rows. Progress and throughput are reported to stderr.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--topic', type=int, help='Topic id.')
+        parser.add_argument('--modified-from', type=str,
+                            help='Answers modified at or after the time (ISO 8601, e.g. 2026-10-01T00:00).')
+        parser.add_argument('--modified-to', type=str, help='Answers modified before the time (ISO 8601).')
+        parser.add_argument('--format', choices=ExportOutputType.values(), default=ExportOutputType.CSV.value,
+                            help='Output format.')
+        parser.add_argument('--output', type=str, default='-', help='Path of output file, "-" for stdout.')
+        parser.add_argument('--chunk-size', type=int, default=10000, help='Count of rows in one query.')
+        parser.add_argument('--progress-seconds', type=float, default=5.0, help='Interval of progress reports.')
+
+    def handle(self, *args, **options):
+        export_serializer = ExportUsersAnswersSerializer(data={
+            name: value
+            for name, value in (
+                ('topic_id', options['topic']),
+                ('modified_from', options['modified_from']),
+                ('modified_to', options['modified_to']),
+            )
+            if value is not None
+        })
+        if not export_serializer.is_valid():
+            raise CommandError(' '.join(
+                '%s: %s' % (name, ' '.join(errors)) for name, errors in export_serializer.errors.items()
+            ))
+
+        rows_count = 0
+
+        def count_rows(chunks):
+            nonlocal rows_count
+            for chunk in chunks:
+                rows_count += len(chunk)
+                yield chunk
+
+        chunks = UserAnswer.objects.export(chunk_size=options['chunk_size'], **export_serializer.validated_data)
+        stream = export_stream(options['format'], count_rows(chunks))
+
+        output = sys.stdout.buffer if options['output'] == '-' else open(options['output'], 'wb')
+        started_at = reported_at = time.perf_counter()
+        bytes_count = 0
+        try:
+            for content in stream:
+                output.write(content)
+                bytes_count += len(content)
+
+                now = time.perf_counter()
+                if now - reported_at >= options['progress_seconds']:
+                    reported_at = now
+                    self.__report('Exported', rows_count, bytes_count, now - started_at)
+        finally:
+            if output is not sys.stdout.buffer:
+                output.close()
+            else:
+                output.flush()
+
+        self.__report('Done', rows_count, bytes_count, time.perf_counter() - started_at)
+
+    def __report(self, prefix: str, rows_count: int, bytes_count: int, duration: float):
+        self.stderr.write('%s: %d rows, %.1f MB in %.1f s (%.0f rows/s, %.1f MB/s).' % (
+            prefix, rows_count, bytes_count / 2 ** 20, duration,
+            rows_count / duration if duration else 0, bytes_count / 2 ** 20 / duration if duration else 0
+        ))
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from interview.apps.questions.models import Question
+from interview.apps.users_answers.models import AnswerPicks
+
+
+class Command(BaseCommand):
+    help = 'Rebuild counters of picks of answers from users answers, by batches of questions.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Count of questions in one transaction.')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+
+        questions_count = 0
+        last_question_id = None
+        while True:
+            questions_ids = Question.objects.values_list('id', flat=True).order_by('id')
+            if last_question_id is not None:
+                questions_ids = questions_ids.filter(id__gt=last_question_id)
+            questions_ids = list(questions_ids[:batch_size])
+            if not questions_ids:
+                break
+
+            AnswerPicks.objects.rebuild(questions_ids)
+
+            questions_count += len(questions_ids)
+            last_question_id = questions_ids[-1]
+            self.stdout.write('Rebuilt picks of answers on %d questions.' % questions_count)
+
+        self.stdout.write(self.style.SUCCESS('Done: %d questions.' % questions_count))
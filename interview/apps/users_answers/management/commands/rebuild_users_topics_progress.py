@@ -0,0 +1,72 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+
+from interview.apps.questions.models import Question
+from interview.apps.users_answers.models import UserAnswer, UserTopicProgress
+
+
+class Command(BaseCommand):
+    help = 'Rebuild progress of users in topics from users answers, by batches of users.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Count of users in one transaction.')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+
+        totals = dict(Question.objects.values(
+            'topic_id'
+        ).annotate(
+            total_count=Count('id')
+        ).values_list(
+            'topic_id', 'total_count'
+        ).order_by())
+
+        users_count = 0
+        last_user_id = None
+        while True:
+            users_ids = UserAnswer.objects.values_list('user_id', flat=True).distinct().order_by('user_id')
+            if last_user_id is not None:
+                users_ids = users_ids.filter(user_id__gt=last_user_id)
+            users_ids = list(users_ids[:batch_size])
+            if not users_ids:
+                break
+
+            self.__rebuild_users(users_ids, totals)
+
+            users_count += len(users_ids)
+            last_user_id = users_ids[-1]
+            self.stdout.write('Rebuilt progress of %d users.' % users_count)
+
+        deleted_count, _ = UserTopicProgress.objects.exclude(
+            user_id__in=UserAnswer.objects.values('user_id')
+        ).delete()
+
+        self.stdout.write(self.style.SUCCESS(
+            'Done: %d users, %d stale progress rows deleted.' % (users_count, deleted_count)
+        ))
+
+    @staticmethod
+    def __rebuild_users(users_ids, totals):
+        answered = UserAnswer.objects.filter(
+            user_id__in=users_ids
+        ).values(
+            'user_id', 'question__topic_id'
+        ).annotate(
+            answered_count=Count('id')
+        ).values_list(
+            'user_id', 'question__topic_id', 'answered_count'
+        ).order_by()
+
+        with transaction.atomic():
+            UserTopicProgress.objects.filter(user_id__in=users_ids).delete()
+            UserTopicProgress.objects.bulk_create([
+                UserTopicProgress(
+                    user_id=user_id,
+                    topic_id=topic_id,
+                    answered_count=answered_count,
+                    total_count=totals.get(topic_id, 0)
+                )
+                for user_id, topic_id, answered_count in answered
+            ])
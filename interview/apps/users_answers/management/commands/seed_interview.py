@@ -0,0 +1,248 @@
+import argparse
+import multiprocessing
+import random
+import time
+from datetime import datetime, timedelta
+from itertools import accumulate
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, connections, transaction
+from django.utils import timezone
+
+from interview.apps.answers.models import Answer
+from interview.apps.questions.models import Question
+from interview.apps.topics.models import Topic
+from interview.apps.users_answers.models import AnswerPicks, UserAnswer, UserTopicProgress
+
+# plan of dataset, it's set before start of worker processes and inherited by them
+_plan = {}
+
+
+def _parse_range(value: str) -> tuple:
+    try:
+        low, _, high = value.partition(':')
+        low, high = int(low), int(high or low)
+    except ValueError:
+        raise argparse.ArgumentTypeError('Range must be "min:max" or a single number.')
+    if low < 0 or low > high:
+        raise argparse.ArgumentTypeError('Range must be "min:max" with 0 <= min <= max.')
+    return low, high
+
+
+def _insert_rows(model, fields_names, rows, batch_size):
+    """
+    Insert rows of already prepared database values by batches of 'executemany'.
+    """
+    if not rows:
+        return
+    quote_name = connection.ops.quote_name
+    sql = 'INSERT INTO %s (%s) VALUES (%s)' % (
+        quote_name(model._meta.db_table),
+        ', '.join(quote_name(model._meta.get_field(name).column) for name in fields_names),
+        ', '.join(['%s'] * len(fields_names))
+    )
+    with connection.cursor() as cursor:
+        for offset in range(0, len(rows), batch_size):
+            cursor.executemany(sql, rows[offset:offset + batch_size])
+
+
+def _seed_topics(chunk) -> int:
+    """
+    Insert topics of chunk with their questions and answers in one transaction.
+    """
+    index, start, end = chunk
+    rnd = random.Random('%s:topics:%d' % (_plan['seed'], index))
+    date_field = Topic._meta.get_field('start_date')
+    modified_at = Topic._meta.get_field('modified_at').get_db_prep_value(_plan['now'], connection)
+    types = (Question.ONE_OPTION, Question.MULTIPLE_OPTION)
+
+    topics_rows, questions_rows, answers_rows = [], [], []
+    for topic_index in range(start, end):
+        topic_id = topic_index + 1
+        start_date = _plan['today'] + timedelta(days=rnd.randint(-60, 30))
+        finish_date = start_date + timedelta(days=rnd.randint(7, 90))
+        topics_rows.append((
+            topic_id, 'Topic #%d.' % topic_id,
+            date_field.get_db_prep_value(start_date, connection), date_field.get_db_prep_value(finish_date, connection),
+            'Description of topic #%d.' % topic_id, 0, modified_at,
+        ))
+
+        first_question_id = _plan['first_questions_ids'][topic_index]
+        for question_id in range(first_question_id, first_question_id + _plan['questions_counts'][topic_index]):
+            questions_rows.append((question_id, 'Question #%d.' % question_id, rnd.choice(types), topic_id))
+
+            first_answer_id = _plan['first_answers_ids'][question_id - 1]
+            for answer_id in range(first_answer_id, first_answer_id + _plan['answers_counts'][question_id - 1]):
+                answers_rows.append((answer_id, 'Answer #%d.' % (answer_id - first_answer_id + 1), question_id))
+
+    batch_size = _plan['batch_size']
+    with transaction.atomic():
+        _insert_rows(
+            Topic,
+            ('id', 'title', 'start_date', 'finish_date', 'description', 'revision', 'modified_at'),
+            topics_rows,
+            batch_size
+        )
+        _insert_rows(Question, ('id', 'text', 'type', 'topic'), questions_rows, batch_size)
+        _insert_rows(Answer, ('id', 'text', 'question'), answers_rows, batch_size)
+    connection.close()
+    return len(topics_rows) + len(questions_rows) + len(answers_rows)
+
+
+def _pick_topics(rnd, count) -> list:
+    topics_count = len(_plan['questions_counts'])
+    if _plan['popularity'] == 'uniform':
+        return rnd.sample(range(topics_count), count)
+
+    picked = set()
+    while len(picked) < count:
+        picked.update(rnd.choices(range(topics_count), cum_weights=_plan['cum_weights'], k=count - len(picked)))
+    return list(picked)
+
+
+def _seed_users(chunk) -> int:
+    """
+    Insert answers of users of chunk in one transaction: every user answers on a part of questions
+    of a few random topics.
+    """
+    index, start, end = chunk
+    rnd = random.Random('%s:users:%d' % (_plan['seed'], index))
+    modified_at = UserAnswer._meta.get_field('modified_at').get_db_prep_value(_plan['now'], connection)
+    low, high = _plan['topics_per_user']
+    topics_count = len(_plan['questions_counts'])
+
+    rows = []
+    for user_id in range(start + 1, end + 1):
+        for topic_index in _pick_topics(rnd, min(rnd.randint(low, high), topics_count)):
+            first_question_id = _plan['first_questions_ids'][topic_index]
+            for question_id in range(first_question_id, first_question_id + _plan['questions_counts'][topic_index]):
+                if rnd.random() < _plan['answered_part']:
+                    answer_id = _plan['first_answers_ids'][question_id - 1] + \
+                                rnd.randrange(_plan['answers_counts'][question_id - 1])
+                    rows.append((user_id, question_id, answer_id, modified_at))
+
+    with transaction.atomic():
+        _insert_rows(UserAnswer, ('user_id', 'question', 'answer', 'modified_at'), rows, _plan['batch_size'])
+    connection.close()
+    return len(rows)
+
+
+class Command(BaseCommand):
+    help = 'Generate reproducible synthetic dataset (topics, questions, answers, users answers) by batched inserts ' \
+           'with explicit ids in transaction chunks, optionally in parallel worker processes. ' \
+           'The same seed, distributions and chunk size produce the same dataset regardless of count of workers.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--topics', type=int, default=1000, help='Count of topics.')
+        parser.add_argument('--questions', type=_parse_range, default=(20, 40),
+                            help='Uniform range of count of questions in topic, "min:max".')
+        parser.add_argument('--answers', type=_parse_range, default=(2, 5),
+                            help='Uniform range of count of answers on question, "min:max" (min >= 1).')
+        parser.add_argument('--users', type=int, default=10000, help='Count of users.')
+        parser.add_argument('--topics-per-user', type=_parse_range, default=(1, 5),
+                            help='Uniform range of count of topics, which user answers, "min:max".')
+        parser.add_argument('--answered-part', type=float, default=0.8,
+                            help='Probability to answer on every question of chosen topic.')
+        parser.add_argument('--popularity', choices=('uniform', 'zipf'), default='uniform',
+                            help='Distribution of topics chosen by users.')
+        parser.add_argument('--seed', type=int, default=0, help='Seed of dataset.')
+        parser.add_argument('--chunk-size', type=int, default=100,
+                            help='Count of topics or users in one transaction.')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Count of rows in one insert.')
+        parser.add_argument('--workers', type=int, default=1,
+                            help='Count of worker processes (SQLite serializes writers, so they wait for each '
+                                 'other up to busy timeout).')
+        parser.add_argument('--clear', action='store_true', help='Delete existing data before generation.')
+
+    def handle(self, *args, **options):
+        if options['answers'][0] < 1:
+            raise CommandError('Every question must have at least one answer.')
+
+        if options['clear']:
+            self.__clear()
+        elif Topic.objects.exists() or UserAnswer.objects.exists():
+            raise CommandError('Database isn\'t empty, use --clear to delete existing data.')
+
+        self.__make_plan(options)
+        self.stdout.write('Plan: %d topics, %d questions, %d answers, %d users.' % (
+            options['topics'], len(_plan['answers_counts']), sum(_plan['answers_counts']), options['users']
+        ))
+
+        chunk_size = options['chunk_size']
+        self.__run('topics', _seed_topics, [
+            (index, start, min(start + chunk_size, options['topics']))
+            for index, start in enumerate(range(0, options['topics'], chunk_size))
+        ], options['workers'])
+        self.__run('users answers', _seed_users, [
+            (index, start, min(start + chunk_size, options['users']))
+            for index, start in enumerate(range(0, options['users'], chunk_size))
+        ], options['workers'])
+
+        self.__reset_sequences()
+
+        started_at = time.perf_counter()
+        call_command('rebuild_users_topics_progress', batch_size=10000, stdout=self.stdout)
+        self.stdout.write('Progress is rebuilt in %.1f s.' % (time.perf_counter() - started_at))
+
+        started_at = time.perf_counter()
+        call_command('rebuild_answers_picks', batch_size=10000, stdout=self.stdout)
+        self.stdout.write('Picks of answers are rebuilt in %.1f s.' % (time.perf_counter() - started_at))
+
+    @staticmethod
+    def __make_plan(options):
+        rnd = random.Random('%s:plan' % options['seed'])
+        questions_counts = [rnd.randint(*options['questions']) for _ in range(options['topics'])]
+        answers_counts = [rnd.randint(*options['answers']) for _ in range(sum(questions_counts))]
+
+        _plan.clear()
+        _plan.update({
+            'seed': options['seed'],
+            'today': datetime.now().date(),
+            'now': timezone.now(),
+            'batch_size': options['batch_size'],
+            'questions_counts': questions_counts,
+            'answers_counts': answers_counts,
+            'first_questions_ids': list(accumulate([1] + questions_counts[:-1])),
+            'first_answers_ids': list(accumulate([1] + answers_counts[:-1])),
+            'topics_per_user': options['topics_per_user'],
+            'answered_part': options['answered_part'],
+            'popularity': options['popularity'],
+            # Zipf's law with exponent 1 by order of topics
+            'cum_weights': list(accumulate(1 / rank for rank in range(1, options['topics'] + 1))),
+        })
+
+    def __run(self, name, func, chunks, workers_count):
+        started_at = time.perf_counter()
+        rows_count = 0
+
+        if workers_count > 1:
+            # workers open their own connections
+            connections.close_all()
+            with multiprocessing.get_context('fork').Pool(workers_count) as pool:
+                for count in pool.imap_unordered(func, chunks):
+                    rows_count += count
+        else:
+            for chunk in chunks:
+                rows_count += func(chunk)
+
+        duration = time.perf_counter() - started_at
+        self.stdout.write('Inserted %s: %d rows in %.1f s (%.0f rows/s).' % (
+            name, rows_count, duration, rows_count / duration if duration else 0
+        ))
+
+    @staticmethod
+    def __clear():
+        quote_name = connection.ops.quote_name
+        with transaction.atomic(), connection.cursor() as cursor:
+            for model in (AnswerPicks, UserTopicProgress, UserAnswer, Answer, Question, Topic):
+                cursor.execute('DELETE FROM %s' % quote_name(model._meta.db_table))
+
+    @staticmethod
+    def __reset_sequences():
+        # explicit ids don't move sequences of PostgreSQL and Oracle
+        statements = connection.ops.sequence_reset_sql(no_style(), [Topic, Question, Answer])
+        with connection.cursor() as cursor:
+            for statement in statements:
+                cursor.execute(statement)
@@ -0,0 +1,37 @@
+# Generated by Django 3.1.14 on 2026-10-18 17:31
+
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def delete_duplicated_users_answers(apps, schema_editor):
+    """
+    Keep only the latest answer of user on question, before adding unique constraint.
+    """
+    UserAnswer = apps.get_model('users_answers', 'UserAnswer')
+    db_alias = schema_editor.connection.alias
+
+    latest_ids = UserAnswer.objects.using(db_alias).values(
+        'user_id', 'question_id'
+    ).annotate(
+        latest_id=Max('id')
+    ).values_list(
+        'latest_id',
+        flat=True
+    )
+    UserAnswer.objects.using(db_alias).exclude(id__in=latest_ids).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users_answers', '0006_auto_20200817_0347'),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_duplicated_users_answers, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='useranswer',
+            constraint=models.UniqueConstraint(fields=('user_id', 'question'), name='users_answers_user_question_unique'),
+        ),
+    ]
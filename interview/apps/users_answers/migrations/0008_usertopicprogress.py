@@ -0,0 +1,70 @@
+# Generated by Django 3.1.14 on 2026-10-18 17:34
+
+from django.db import migrations, models
+from django.db.models import Count
+import django.db.models.deletion
+
+
+def fill_users_topics_progress(apps, schema_editor):
+    Question = apps.get_model('questions', 'Question')
+    UserAnswer = apps.get_model('users_answers', 'UserAnswer')
+    UserTopicProgress = apps.get_model('users_answers', 'UserTopicProgress')
+    db_alias = schema_editor.connection.alias
+
+    totals = dict(Question.objects.using(db_alias).values(
+        'topic_id'
+    ).annotate(
+        total_count=Count('id')
+    ).values_list(
+        'topic_id', 'total_count'
+    ))
+    answered = UserAnswer.objects.using(db_alias).values(
+        'user_id', 'question__topic_id'
+    ).annotate(
+        answered_count=Count('id')
+    ).values_list(
+        'user_id', 'question__topic_id', 'answered_count'
+    ).order_by()
+
+    users_topics_progress = []
+    for user_id, topic_id, answered_count in answered.iterator():
+        users_topics_progress.append(UserTopicProgress(
+            user_id=user_id,
+            topic_id=topic_id,
+            answered_count=answered_count,
+            total_count=totals.get(topic_id, 0)
+        ))
+        if len(users_topics_progress) >= 1000:
+            UserTopicProgress.objects.using(db_alias).bulk_create(users_topics_progress)
+            users_topics_progress = []
+    UserTopicProgress.objects.using(db_alias).bulk_create(users_topics_progress)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('questions', '0004_auto_20200814_0149'),
+        ('topics', '0003_auto_20200814_0149'),
+        ('users_answers', '0007_useranswer_unique_user_question'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserTopicProgress',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('user_id', models.IntegerField()),
+                ('answered_count', models.IntegerField(default=0)),
+                ('total_count', models.IntegerField(default=0)),
+                ('topic', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='users_progress', to='topics.topic')),
+            ],
+            options={
+                'db_table': 'users_topics_progress',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='usertopicprogress',
+            constraint=models.UniqueConstraint(fields=('user_id', 'topic'), name='users_topics_progress_user_topic_unique'),
+        ),
+        migrations.RunPython(fill_users_topics_progress, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 3.1.14 on 2026-10-18 17:40
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users_answers', '0008_usertopicprogress'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='useranswer',
+            name='modified_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 3.1.14 on 2026-10-18 17:46
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('questions', '0004_auto_20200814_0149'),
+        ('users_answers', '0009_useranswer_modified_at'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='useranswer',
+            name='question',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='answer', to='questions.question'),
+        ),
+        migrations.AlterField(
+            model_name='useranswer',
+            name='user_id',
+            field=models.IntegerField(),
+        ),
+        migrations.AddIndex(
+            model_name='useranswer',
+            index=models.Index(fields=['question', 'answer'], name='users_answers_question_answer'),
+        ),
+    ]
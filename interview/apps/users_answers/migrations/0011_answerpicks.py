@@ -0,0 +1,56 @@
+# Generated by Django 3.1.14 on 2026-10-18 18:06
+
+from django.db import migrations, models
+from django.db.models import Count
+import django.db.models.deletion
+
+
+def fill_answers_picks(apps, schema_editor):
+    UserAnswer = apps.get_model('users_answers', 'UserAnswer')
+    AnswerPicks = apps.get_model('users_answers', 'AnswerPicks')
+    db_alias = schema_editor.connection.alias
+
+    picks = UserAnswer.objects.using(db_alias).values(
+        'question_id', 'answer_id'
+    ).annotate(
+        picks=Count('id')
+    ).values_list(
+        'question_id', 'answer_id', 'picks'
+    ).order_by()
+
+    answers_picks = []
+    for question_id, answer_id, count in picks.iterator():
+        answers_picks.append(AnswerPicks(question_id=question_id, answer_id=answer_id, picks=count))
+        if len(answers_picks) >= 1000:
+            AnswerPicks.objects.using(db_alias).bulk_create(answers_picks)
+            answers_picks = []
+    AnswerPicks.objects.using(db_alias).bulk_create(answers_picks)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('answers', '0004_auto_20200814_0149'),
+        ('questions', '0004_auto_20200814_0149'),
+        ('users_answers', '0010_useranswer_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnswerPicks',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('picks', models.IntegerField(default=0)),
+                ('answer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='picks', to='answers.answer')),
+                ('question', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='answers_picks', to='questions.question')),
+            ],
+            options={
+                'db_table': 'answers_picks',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='answerpicks',
+            constraint=models.UniqueConstraint(fields=('question', 'answer'), name='answers_picks_question_answer_unique'),
+        ),
+        migrations.RunPython(fill_answers_picks, migrations.RunPython.noop),
+    ]
@@ -1,19 +1,204 @@
-from django.db import models
+from collections import Counter
+from itertools import groupby
+from operator import itemgetter
+from typing import Iterator, List
+
+from django.db import models, connections, router, transaction
+from django.db.models import Count, F, Max, OuterRef, Subquery
+from django.db.models.functions import Cast, Coalesce
+from django.utils import timezone
 from rest_framework import serializers
 
+from common.streaming import iterate_values_by_chunks
 from interview.apps.answers.models import Answer, AnswerSerializer
 from interview.apps.questions.models import Question, QuestionSerializer
+from interview.apps.topics.models import Topic
+
+# columns of export of users answers and fields of them
+EXPORT_COLUMNS = (
+    ('id', 'id'),
+    ('user_id', 'user_id'),
+    ('topic_id', 'question__topic_id'),
+    ('question_id', 'question_id'),
+    ('question_text', 'question__text'),
+    ('answer_id', 'answer_id'),
+    ('answer_text', 'answer__text'),
+    ('modified_at', 'modified_at_text'),
+)
+
+
+def _utc_text_to_iso(value: str) -> str:
+    # UTC time as text of database ('YYYY-MM-DD HH:MM:SS[.ffffff][+00]') is much cheaper than datetime objects
+    value = value[:10] + 'T' + value[11:]
+    return value + ':00' if value.endswith('+00') else value + '+00:00'
+
+
+class UserAnswerQuerySet(models.QuerySet):
+
+    def upsert(self, user_id, question_id, answer_id):
+        """
+        Insert answer of user on question, or replace answer of the existing one.
+        """
+        self.upsert_many(user_id, {question_id: answer_id})
+
+    def upsert_many(self, user_id, answers_on_questions: dict):
+        """
+        Insert answers of user on questions, or replace answers of the existing ones, by bulk statements.
+        Progress of user in topics of questions and picks of answers are updated in the same transaction.
+        :param user_id: user id.
+        :param answers_on_questions: answers ids by questions ids.
+        """
+        connection = connections[router.db_for_write(self.model)]
+        with transaction.atomic(using=connection.alias):
+            # The first statement is a write one: SQLite takes the write lock before the reads below,
+            # other databases lock progress rows, so concurrent submissions of user are serialized.
+            UserTopicProgress.objects.ensure(user_id, answers_on_questions.keys())
+
+            questions = Question.objects.filter(
+                id__in=answers_on_questions.keys()
+            ).annotate(
+                previous_answer_id=Subquery(
+                    self.filter(user_id=user_id, question_id=OuterRef('id')).values('answer_id')[:1]
+                )
+            ).values_list(
+                'id', 'topic_id', 'previous_answer_id'
+            )
+            created_by_topics = Counter()
+            picks = Counter()
+            for question_id, topic_id, previous_answer_id in questions:
+                answer_id = answers_on_questions[question_id]
+                if previous_answer_id is None:
+                    created_by_topics[topic_id] += 1
+                elif previous_answer_id != answer_id:
+                    picks[question_id, previous_answer_id] -= 1
+                if previous_answer_id != answer_id:
+                    picks[question_id, answer_id] += 1
+
+            self.__upsert_rows(connection, user_id, answers_on_questions)
+
+            UserTopicProgress.objects.add_answered(user_id, created_by_topics)
+            AnswerPicks.objects.add_picks(picks)
+
+    def __upsert_rows(self, connection, user_id, answers_on_questions: dict):
+        modified_at = timezone.now()
+        if connection.vendor not in {'sqlite', 'postgresql', 'mysql'}:
+            for question_id, answer_id in answers_on_questions.items():
+                self.update_or_create(
+                    user_id=user_id,
+                    question_id=question_id,
+                    defaults={'answer_id': answer_id, 'modified_at': modified_at}
+                )
+            return
+
+        quote_name = connection.ops.quote_name
+        table = quote_name(self.model._meta.db_table)
+        fields = [self.model._meta.get_field(name) for name in ('user_id', 'question', 'answer', 'modified_at')]
+        user_column, question_column, answer_column, modified_at_column = (
+            quote_name(field.column) for field in fields
+        )
+
+        if connection.vendor == 'mysql':
+            on_conflict = 'ON DUPLICATE KEY UPDATE %s' % ', '.join(
+                '%s = VALUES(%s)' % (column, column) for column in (answer_column, modified_at_column)
+            )
+        else:
+            on_conflict = 'ON CONFLICT (%s, %s) DO UPDATE SET %s' % (
+                user_column, question_column, ', '.join(
+                    '%s = EXCLUDED.%s' % (column, column) for column in (answer_column, modified_at_column)
+                )
+            )
+
+        modified_at = fields[-1].get_db_prep_value(modified_at, connection)
+        rows = [
+            (user_id, question_id, answer_id, modified_at)
+            for question_id, answer_id in answers_on_questions.items()
+        ]
+        batch_size = max(connection.ops.bulk_batch_size(fields, rows), 1)
+
+        with connection.cursor() as cursor:
+            for offset in range(0, len(rows), batch_size):
+                batch = rows[offset:offset + batch_size]
+                cursor.execute(
+                    'INSERT INTO %s (%s, %s, %s, %s) VALUES %s %s' % (
+                        table, user_column, question_column, answer_column, modified_at_column,
+                        ', '.join(['(%s, %s, %s, %s)'] * len(batch)),
+                        on_conflict
+                    ),
+                    [value for row in batch for value in row]
+                )
+
+    def export(self, topic_id=None, modified_from=None, modified_to=None, chunk_size=10000) -> Iterator[List[tuple]]:
+        """
+        Iterate answers of users joined with their questions and answers (values of EXPORT_COLUMNS, modification
+        time in ISO format) by chunks of bounded queries, so memory doesn't depend on count of rows.
+        Answers on topic are iterated by answers on questions of it (in order of index on question and answer,
+        then id), otherwise by id.
+        :param topic_id: only answers on questions of the topic.
+        :param modified_from: only answers modified at or after the time.
+        :param modified_to: only answers modified before the time.
+        :param chunk_size: count of rows in chunk.
+        :return: iterator over lists of rows.
+        """
+        queryset = self.annotate(modified_at_text=Cast('modified_at', output_field=models.CharField()))
+        if modified_from is not None:
+            queryset = queryset.filter(modified_at__gte=modified_from)
+        if modified_to is not None:
+            queryset = queryset.filter(modified_at__lt=modified_to)
+
+        if topic_id is None:
+            querysets = [queryset]
+        else:
+            # chunks of the whole topic are sorted by id on every query, chunks of one answer are read from index
+            answers = Answer.objects.using(self.db).filter(
+                question__topic_id=topic_id
+            ).values_list(
+                'question_id', 'id'
+            ).order_by(
+                'question_id', 'id'
+            )
+            querysets = (
+                queryset.filter(question_id=question_id, answer_id=answer_id) for question_id, answer_id in answers
+            )
+
+        fields = [field for _, field in EXPORT_COLUMNS]
+        for answer_queryset in querysets:
+            for chunk in iterate_values_by_chunks(answer_queryset, fields, chunk_size):
+                yield [row[:-1] + (_utc_text_to_iso(row[-1]),) for row in chunk]
+
+    def revision(self, user_id) -> tuple:
+        """
+        Get cheap revision marker of answers of user by one aggregate query.
+        :return: marker string and last modification time (or None if user hasn't answers).
+        """
+        revision = self.filter(
+            user_id=user_id
+        ).aggregate(
+            count=Count('id'),
+            modified_at=Max('modified_at')
+        )
+        marker = '%(count)s:%(modified_at)s' % revision
+        return marker, revision['modified_at']
 
 
 class UserAnswer(models.Model):
 
     id = models.AutoField(primary_key=True)
-    user_id = models.IntegerField(db_index=True)
-    question = models.ForeignKey(to=Question, related_name='answer', on_delete=models.CASCADE)
+    # user_id and question_id are indexed by unique constraint and composite index
+    user_id = models.IntegerField()
+    question = models.ForeignKey(to=Question, related_name='answer', on_delete=models.CASCADE, db_index=False)
     answer = models.ForeignKey(to=Answer, on_delete=models.CASCADE)
+    modified_at = models.DateTimeField(default=timezone.now)
+
+    objects = UserAnswerQuerySet.as_manager()
 
     class Meta:
         db_table = "users_answers"
+        constraints = [
+            models.UniqueConstraint(fields=['user_id', 'question'], name='users_answers_user_question_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['question', 'answer'], name='users_answers_question_answer'),
+        ]
 
     def __str__(self):
         return "%s [" \
@@ -31,6 +216,271 @@ class UserAnswer(models.Model):
                )
 
 
+class UserTopicProgressQuerySet(models.QuerySet):
+
+    def ensure(self, user_id, questions_ids):
+        """
+        Create (if not exist) progress rows of user for topics of questions, then lock them till end of transaction.
+        """
+        connection = connections[router.db_for_write(self.model)]
+        topics_ids = Question.objects.filter(id__in=questions_ids).values('topic_id')
+
+        if connection.vendor in {'sqlite', 'postgresql', 'mysql'}:
+            quote_name = connection.ops.quote_name
+            columns = [
+                quote_name(self.model._meta.get_field(name).column)
+                for name in ('user_id', 'topic', 'answered_count', 'total_count')
+            ]
+            questions_table = quote_name(Question._meta.db_table)
+            questions_topic_column = quote_name(Question._meta.get_field('topic').column)
+            topics_ids_sql, topics_ids_params = topics_ids.query.get_compiler(connection=connection).as_sql()
+
+            if connection.vendor == 'mysql':
+                insert, on_conflict = 'INSERT IGNORE', ''
+            else:
+                insert, on_conflict = 'INSERT', 'ON CONFLICT (%s, %s) DO NOTHING' % (columns[0], columns[1])
+
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    '%s INTO %s (%s) SELECT %%s, %s, 0, COUNT(*) FROM %s WHERE %s IN (%s) GROUP BY %s %s' % (
+                        insert, quote_name(self.model._meta.db_table), ', '.join(columns),
+                        questions_topic_column, questions_table, questions_topic_column, topics_ids_sql,
+                        questions_topic_column, on_conflict
+                    ),
+                    [user_id, *topics_ids_params]
+                )
+        else:
+            totals = Question.objects.filter(
+                topic_id__in=topics_ids
+            ).values(
+                'topic_id'
+            ).annotate(
+                total_count=Count('id')
+            ).values_list(
+                'topic_id', 'total_count'
+            )
+            self.bulk_create(
+                [
+                    UserTopicProgress(user_id=user_id, topic_id=topic_id, answered_count=0, total_count=total_count)
+                    for topic_id, total_count in totals
+                ],
+                ignore_conflicts=True
+            )
+
+        if connection.features.has_select_for_update:
+            list(self.select_for_update().filter(user_id=user_id, topic_id__in=topics_ids).values_list('id'))
+
+    def add_answered(self, user_id, answered_by_topics: dict):
+        """
+        Increase answered questions count of user by topics.
+        :param answered_by_topics: count of new answered questions by topics ids.
+        """
+        for topic_id, answered_count in answered_by_topics.items():
+            if answered_count != 0:
+                self.filter(
+                    user_id=user_id,
+                    topic_id=topic_id
+                ).update(
+                    answered_count=F('answered_count') + answered_count
+                )
+
+    def forget_answer(self, answer_id, question_id):
+        """
+        Decrease answered questions count of users, which have chosen the answer (before its deletion).
+        """
+        self.filter(
+            topic__questions=question_id,
+            user_id__in=UserAnswer.objects.filter(answer_id=answer_id).values('user_id')
+        ).update(
+            answered_count=F('answered_count') - 1
+        )
+
+    def refresh_total(self, topics_ids):
+        """
+        Recount questions of topics for all progress rows of them.
+        """
+        self.filter(
+            topic_id__in=topics_ids
+        ).update(
+            total_count=Coalesce(
+                Subquery(
+                    Question.objects.filter(
+                        topic_id=OuterRef('topic_id')
+                    ).values(
+                        'topic_id'
+                    ).annotate(
+                        count=Count('id')
+                    ).values('count')[:1]
+                ),
+                0
+            )
+        )
+
+
+class UserTopicProgress(models.Model):
+
+    id = models.AutoField(primary_key=True)
+    user_id = models.IntegerField()
+    topic = models.ForeignKey(to=Topic, related_name='users_progress', on_delete=models.CASCADE)
+    answered_count = models.IntegerField(default=0)
+    total_count = models.IntegerField(default=0)
+
+    objects = UserTopicProgressQuerySet.as_manager()
+
+    class Meta:
+        db_table = "users_topics_progress"
+        constraints = [
+            models.UniqueConstraint(fields=['user_id', 'topic'], name='users_topics_progress_user_topic_unique'),
+        ]
+
+    def __str__(self):
+        return "%s [" \
+               "id: %s, " \
+               "user_id: %s, " \
+               "topic_id: %s, " \
+               "answered_count: %s, " \
+               "total_count: %s, " \
+               "]" %\
+               (
+                   self.__class__.__name__,
+                   self.id,
+                   self.user_id,
+                   self.topic_id,
+                   self.answered_count,
+                   self.total_count,
+               )
+
+
+class AnswerPicksQuerySet(models.QuerySet):
+
+    def add_picks(self, picks: dict):
+        """
+        Change counters of picks of answers by one statement per batch (rows are created, if not exist).
+        :param picks: changes of picks count by tuples of question id and answer id.
+        """
+        picks = {key: count for key, count in picks.items() if count != 0}
+        if not picks:
+            return
+
+        connection = connections[router.db_for_write(self.model)]
+        if connection.vendor not in {'sqlite', 'postgresql', 'mysql'}:
+            for (question_id, answer_id), count in picks.items():
+                self.get_or_create(question_id=question_id, answer_id=answer_id)
+                self.filter(answer_id=answer_id).update(picks=F('picks') + count)
+            return
+
+        quote_name = connection.ops.quote_name
+        table = quote_name(self.model._meta.db_table)
+        fields = [self.model._meta.get_field(name) for name in ('question', 'answer', 'picks')]
+        question_column, answer_column, picks_column = (quote_name(field.column) for field in fields)
+
+        if connection.vendor == 'mysql':
+            on_conflict = 'ON DUPLICATE KEY UPDATE %s = %s + VALUES(%s)' % (picks_column, picks_column, picks_column)
+        else:
+            on_conflict = 'ON CONFLICT (%s, %s) DO UPDATE SET %s = %s.%s + EXCLUDED.%s' % (
+                question_column, answer_column, picks_column, table, picks_column, picks_column
+            )
+
+        rows = [(question_id, answer_id, count) for (question_id, answer_id), count in sorted(picks.items())]
+        batch_size = max(connection.ops.bulk_batch_size(fields, rows), 1)
+
+        with connection.cursor() as cursor:
+            for offset in range(0, len(rows), batch_size):
+                batch = rows[offset:offset + batch_size]
+                cursor.execute(
+                    'INSERT INTO %s (%s, %s, %s) VALUES %s %s' % (
+                        table, question_column, answer_column, picks_column,
+                        ', '.join(['(%s, %s, %s)'] * len(batch)),
+                        on_conflict
+                    ),
+                    [value for row in batch for value in row]
+                )
+
+    def of_topic(self, topic_id) -> list:
+        """
+        Get picks of answers on questions of topic (answers without picks are skipped).
+        :return: list of questions with total picks and list of answers with picks and share of question picks.
+        """
+        picks = self.filter(
+            question__topic_id=topic_id,
+            picks__gt=0
+        ).values_list(
+            'question_id', 'answer_id', 'picks'
+        ).order_by(
+            'question_id', 'answer_id'
+        )
+
+        questions = []
+        for question_id, answers in groupby(picks, key=itemgetter(0)):
+            answers = [(answer_id, count) for _, answer_id, count in answers]
+            total = sum(count for _, count in answers)
+            questions.append({
+                'question_id': question_id,
+                'picks': total,
+                'answers': [
+                    {'answer_id': answer_id, 'picks': count, 'share': count / total}
+                    for answer_id, count in answers
+                ],
+            })
+        return questions
+
+    def rebuild(self, questions_ids):
+        """
+        Recount picks of answers on questions from users answers.
+        """
+        picks = UserAnswer.objects.filter(
+            question_id__in=questions_ids
+        ).values(
+            'question_id', 'answer_id'
+        ).annotate(
+            picks=Count('id')
+        ).values_list(
+            'question_id', 'answer_id', 'picks'
+        ).order_by()
+
+        with transaction.atomic(using=router.db_for_write(self.model)):
+            self.filter(question_id__in=questions_ids).delete()
+            self.bulk_create([
+                AnswerPicks(question_id=question_id, answer_id=answer_id, picks=count)
+                for question_id, answer_id, count in picks
+            ])
+
+
+class AnswerPicks(models.Model):
+    """
+    Count of users, which have chosen the answer on question.
+    """
+
+    id = models.AutoField(primary_key=True)
+    # question_id is indexed by unique constraint
+    question = models.ForeignKey(to=Question, related_name='answers_picks', on_delete=models.CASCADE, db_index=False)
+    answer = models.ForeignKey(to=Answer, related_name='picks', on_delete=models.CASCADE)
+    picks = models.IntegerField(default=0)
+
+    objects = AnswerPicksQuerySet.as_manager()
+
+    class Meta:
+        db_table = "answers_picks"
+        constraints = [
+            models.UniqueConstraint(fields=['question', 'answer'], name='answers_picks_question_answer_unique'),
+        ]
+
+    def __str__(self):
+        return "%s [" \
+               "id: %s, " \
+               "question_id: %s, " \
+               "answer_id: %s, " \
+               "picks: %s, " \
+               "]" %\
+               (
+                   self.__class__.__name__,
+                   self.id,
+                   self.question_id,
+                   self.answer_id,
+                   self.picks,
+               )
+
+
 class UserAnswerSerializer(serializers.ModelSerializer):
 
     question = QuestionSerializer(many=False, read_only=True, allow_null=False)
@@ -41,27 +491,110 @@ class UserAnswerSerializer(serializers.ModelSerializer):
         fields = ('user_id', 'question', 'answer',)
 
 
+class AnswerPicksSerializer(serializers.Serializer):
+
+    answer_id = serializers.IntegerField()
+    picks = serializers.IntegerField()
+    share = serializers.FloatField()
+
+
+class QuestionPicksSerializer(serializers.Serializer):
+
+    question_id = serializers.IntegerField()
+    picks = serializers.IntegerField()
+    answers = AnswerPicksSerializer(many=True)
+
+
 class CreateUserAnswerSerializer(serializers.Serializer):
 
     user_id = serializers.IntegerField()
     question_id = serializers.IntegerField()
     answer_id = serializers.IntegerField()
 
+    def validate(self, attrs):
+        # picks of answer are counted by the upsert, so the answer has to be on the question
+        if not Answer.objects.filter(id=attrs['answer_id'], question_id=attrs['question_id']).exists():
+            raise serializers.ValidationError(
+                'Answer %s isn\'t an answer on question %s.' % (attrs['answer_id'], attrs['question_id'])
+            )
+        return attrs
+
+    def create(self, validated_data):
+        UserAnswer.objects.upsert(**validated_data)
+        return UserAnswer.objects.select_related(
+            'question', 'answer'
+        ).prefetch_related(
+            'question__answers'
+        ).get(
+            user_id=validated_data['user_id'],
+            question_id=validated_data['question_id']
+        )
+
+    def update(self, instance, validated_data):
+        pass
+
+
+class ExportUsersAnswersSerializer(serializers.Serializer):
+
+    topic_id = serializers.IntegerField(required=False)
+    modified_from = serializers.DateTimeField(required=False)
+    modified_to = serializers.DateTimeField(required=False)
+
+    def validate(self, attrs):
+        if not attrs:
+            raise serializers.ValidationError('Topic or range of modification time is required.')
+        return attrs
+
     def create(self, validated_data):
-        return UserAnswer.objects.create(**validated_data)
+        pass
 
     def update(self, instance, validated_data):
         pass
 
 
-class UpdateUserAnswerSerializer(serializers.Serializer):
+class AnswerOnQuestionSerializer(serializers.Serializer):
 
+    question_id = serializers.IntegerField()
     answer_id = serializers.IntegerField()
 
     def create(self, validated_data):
         pass
 
     def update(self, instance, validated_data):
-        instance.answer_id = validated_data.get('answer_id', instance.answer_id)
-        instance.save()
-        return instance
+        pass
+
+
+class CreateUserAnswersBatchSerializer(serializers.Serializer):
+
+    user_id = serializers.IntegerField()
+    topic_id = serializers.IntegerField()
+    answers = AnswerOnQuestionSerializer(many=True, allow_empty=False)
+
+    def validate(self, attrs):
+        answers_on_questions = {item['question_id']: item['answer_id'] for item in attrs['answers']}
+        if len(answers_on_questions) != len(attrs['answers']):
+            raise serializers.ValidationError('Every question can be answered only once in \'answers\'.')
+
+        questions_of_answers = dict(Answer.objects.filter(
+            id__in=answers_on_questions.values(),
+            question__topic_id=attrs['topic_id']
+        ).values_list(
+            'id', 'question_id'
+        ))
+        for question_id, answer_id in answers_on_questions.items():
+            if questions_of_answers.get(answer_id) != question_id:
+                raise serializers.ValidationError(
+                    'Answer %s isn\'t an answer on question %s of topic %s.' % (
+                        answer_id, question_id, attrs['topic_id']
+                    )
+                )
+
+        attrs['answers'] = answers_on_questions
+        return attrs
+
+    def create(self, validated_data):
+        UserAnswer.objects.upsert_many(validated_data['user_id'], validated_data['answers'])
+        return validated_data['answers']
+
+    def update(self, instance, validated_data):
+        pass
@@ -0,0 +1,23 @@
+from django.db.models.signals import post_save, post_delete, pre_delete
+from django.dispatch import receiver
+
+from interview.apps.answers.models import Answer
+from interview.apps.questions.models import Question
+from interview.apps.users_answers.models import UserTopicProgress
+
+
+@receiver(post_save, sender=Question)
+def refresh_progress_total_on_question_save(sender, instance, created, **kwargs):
+    if created:
+        UserTopicProgress.objects.refresh_total([instance.topic_id])
+
+
+@receiver(post_delete, sender=Question)
+def refresh_progress_total_on_question_delete(sender, instance, **kwargs):
+    UserTopicProgress.objects.refresh_total([instance.topic_id])
+
+
+@receiver(pre_delete, sender=Answer)
+def forget_answer_in_progress(sender, instance, **kwargs):
+    # users answers are deleted by cascade, so progress is decreased before it
+    UserTopicProgress.objects.forget_answer(instance.id, instance.question_id)
@@ -1,7 +1,14 @@
+from django.conf import settings
+from django.urls import path
+
 from common.django_rest_framework.routers import path_with_actions
-from .views import UserAnswerViewSet
+from .views import UserAnswerViewSet, create_user_answer_async
 
 app_name = 'users-answers'
 urlpatterns = [
     path_with_actions(r'', UserAnswerViewSet, 'users-answers'),
 ]
+
+if settings.ASYNC_VIEWS:
+    # submission of answer is served by coroutine view, other actions stay synchronous
+    urlpatterns.insert(0, path(r'', create_user_answer_async, name='users-answers-list'))
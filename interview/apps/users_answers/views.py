@@ -1,15 +1,48 @@
-from django.db.models import Q
+import json
+from typing import Iterable, Iterator
+
+from django.db import router
+from django.http import StreamingHttpResponse
+from django.utils.decorators import method_decorator
+from drf_yasg.openapi import Parameter
 from drf_yasg.utils import swagger_auto_schema
+from drf_yasg import openapi
 from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
 from rest_framework.viewsets import ViewSet
 
+from common.asynchronous import as_async_view
+from common.db.routers import pin_user, use_replica
+from common.enum import CustomEnum
+from common.streaming import csv_stream, ndjson_chunks_stream
 from interview.apps.users_answers.models import UserAnswer, UserAnswerSerializer, CreateUserAnswerSerializer, \
-    UpdateUserAnswerSerializer
+    CreateUserAnswersBatchSerializer, ExportUsersAnswersSerializer, EXPORT_COLUMNS
+
+
+class ExportOutputType(CustomEnum):
+    CSV = 'csv'
+    NDJSON = 'ndjson'
+
+
+def export_stream(output_type: str, chunks: Iterable[list]) -> Iterator[bytes]:
+    """
+    Stream chunks of exported users answers (see UserAnswerQuerySet.export) as CSV with header or NDJSON.
+    """
+    columns = [name for name, _ in EXPORT_COLUMNS]
+    if output_type == ExportOutputType.NDJSON.value:
+        return ndjson_chunks_stream(
+            chunks,
+            lambda row: json.dumps(dict(zip(columns, row)), ensure_ascii=False, separators=(',', ':')).encode()
+        )
+    return csv_stream(columns, chunks)
 
 
 class UserAnswerViewSet(ViewSet):
 
+    __export_chunk_size = 10000
+
     @swagger_auto_schema(
         request_body=CreateUserAnswerSerializer,
         responses={
@@ -20,23 +53,71 @@ class UserAnswerViewSet(ViewSet):
     def create(self, request):
         user_answer_serializer = CreateUserAnswerSerializer(data=request.data)
         if user_answer_serializer.is_valid():
-            users_answers = UserAnswer.objects.filter(
-                Q(user_id=user_answer_serializer.validated_data['user_id']) &
-                Q(question_id=user_answer_serializer.validated_data['question_id'])
-            )
-
-            user_answer = next(iter(users_answers), None)
-            if user_answer is not None:
-                answer_id = user_answer_serializer.validated_data['answer_id']
-                user_answer_serializer = UpdateUserAnswerSerializer(
-                    user_answer,
-                    {'answer_id': answer_id},
-                    partial=True
-                )
-                if not user_answer_serializer.is_valid():
-                    return Response(user_answer_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-
             user_answer = user_answer_serializer.save()
+            pin_user(user_answer.user_id)
             return Response(UserAnswerSerializer(user_answer).data, status=status.HTTP_200_OK)
         else:
             return Response(user_answer_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    @swagger_auto_schema(
+        request_body=CreateUserAnswersBatchSerializer,
+        responses={
+            status.HTTP_200_OK: openapi.Schema(
+                description='Answers ids by questions ids.',
+                type=openapi.TYPE_OBJECT,
+                additional_properties=openapi.Schema(type=openapi.TYPE_INTEGER)
+            ),
+            status.HTTP_400_BAD_REQUEST: 'Received wrong users answers object.'
+        }
+    )
+    @action(detail=False, methods=['post'])
+    def batch(self, request):
+        users_answers_serializer = CreateUserAnswersBatchSerializer(data=request.data)
+        if users_answers_serializer.is_valid():
+            answers_on_questions = users_answers_serializer.save()
+            pin_user(users_answers_serializer.validated_data['user_id'])
+            return Response(answers_on_questions, status=status.HTTP_200_OK)
+        else:
+            return Response(users_answers_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    @swagger_auto_schema(
+        query_serializer=ExportUsersAnswersSerializer,
+        manual_parameters=[
+            Parameter(
+                'output',
+                in_=openapi.IN_QUERY,
+                description='Output format: CSV with header (default) or newline delimited JSON.',
+                type=openapi.TYPE_STRING,
+                enum=ExportOutputType.values()
+            ),
+        ],
+        responses={
+            status.HTTP_200_OK: 'Stream of users answers with texts of questions and answers.',
+            status.HTTP_400_BAD_REQUEST: 'Received wrong filter or output format.',
+        }
+    )
+    @action(detail=False, methods=['get'], permission_classes=[IsAdminUser])
+    @method_decorator(use_replica())
+    def export(self, request):
+        output_type = request.query_params.get('output', ExportOutputType.CSV.value)
+        if not ExportOutputType.has_value(output_type):
+            return Response(status=status.HTTP_400_BAD_REQUEST)
+
+        export_serializer = ExportUsersAnswersSerializer(data=request.query_params)
+        if not export_serializer.is_valid():
+            return Response(export_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        # content is streamed after return from view, so database is chosen now
+        chunks = UserAnswer.objects.using(router.db_for_read(UserAnswer)).export(
+            chunk_size=self.__export_chunk_size,
+            **export_serializer.validated_data
+        )
+        if output_type == ExportOutputType.NDJSON.value:
+            return StreamingHttpResponse(export_stream(output_type, chunks), content_type='application/x-ndjson')
+        response = StreamingHttpResponse(export_stream(output_type, chunks), content_type='text/csv; charset=utf-8')
+        response['Content-Disposition'] = 'attachment; filename="users-answers.csv"'
+        return response
+
+
+# Coroutine version of answer submission for ASGI server (see ASYNC_VIEWS setting)
+create_user_answer_async = as_async_view(UserAnswerViewSet.as_view({'post': 'create'}))
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/3.1/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -42,6 +43,7 @@ INSTALLED_APPS = [
     'rest_framework',
     'rest_framework.authtoken',
     'drf_yasg',
+    'common.django_rest_framework.apps.DjangoRestFrameworkConfig',
     'interview.apps.topics.apps.TopicConfig',
     'interview.apps.questions.apps.QuestionConfig',
     'interview.apps.answers.apps.AnswerConfig',
@@ -49,17 +51,45 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'common.instrumentation.RequestInstrumentationMiddleware',
+    'common.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'common.profiling.ProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'common.db.routers.ReplicaPinMiddleware',
 ]
 
 ROOT_URLCONF = 'interview.urls'
 
+# Per-request instrumentation (common.instrumentation.RequestInstrumentationMiddleware): Server-Timing header
+# with SQL, serialization and rendering time, log of requests exceeding thresholds with repeated SQL statements
+SERVER_TIMING_HEADER = True
+SLOW_REQUEST_SECONDS = 1.0
+SLOW_REQUEST_QUERIES = 50
+SLOW_REQUEST_STATEMENTS = 5
+
+# Metrics (common.metrics) at '/metrics/' in Prometheus text format, only for admins (token of staff user).
+# Processes of pre-fork server flush snapshots of their metrics to the directory (if it's set), and they are merged
+# on scrape, snapshots of dead processes are archived without gauges
+METRICS_DIR = os.environ.get('INTERVIEW_METRICS_DIR') or None
+METRICS_FLUSH_SECONDS = 1.0
+
+# Profiling of requests (common.profiling.ProfilingMiddleware): admin requests with 'X-Profile' header or 'profile'
+# query parameter ('cprofile' or 'sampling') and random part of requests of views from sample rates, e.g.
+# {'users-topics-list': 0.001}, artifacts (pstats and collapsed stacks) are written to the directory
+PROFILING_DIR = BASE_DIR / 'profiles'
+PROFILING_DEFAULT_MODE = 'sampling'
+PROFILING_SAMPLE_RATES = {}
+PROFILING_SAMPLING_INTERVAL = 0.005
+
+# Serve candidate-facing endpoints (users-topics, submission of user answer) by coroutine views under ASGI server
+ASYNC_VIEWS = os.environ.get('INTERVIEW_ASYNC_VIEWS') == '1'
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -89,6 +119,79 @@ DATABASES = {
     }
 }
 
+# Opt-in production profile of SQLite (INTERVIEW_DB_PROFILE=production): WAL journal lets readers work
+# concurrently with a writer, writers wait for the lock up to 'timeout' seconds instead of failing
+# with "database is locked", connections are persistent.
+SQLITE_PRODUCTION_PROFILE = {
+    'ENGINE': 'common.db.backends.sqlite3',
+    'CONN_MAX_AGE': 600,
+    'OPTIONS': {
+        'timeout': 20,
+        'pragmas': {
+            'journal_mode': 'WAL',
+            'synchronous': 'NORMAL',
+            'mmap_size': 256 * 1024 * 1024,
+            'cache_size': -64 * 1024,  # in KiB
+            'temp_store': 'MEMORY',
+        },
+    },
+}
+
+if os.environ.get('INTERVIEW_DB_PROFILE') == 'production':
+    DATABASES['default'].update(SQLITE_PRODUCTION_PROFILE)
+
+# Read replica, a copy of primary database kept up to date by external replication (e.g. Litestream for SQLite).
+# Read-only views read from replicas, clients read own writes from primary during REPLICA_PIN_SECONDS.
+# Without replica database the alias isn't used by reads, and its test database is separate from primary one
+# without replication, so tests of routing see from which database data was read.
+if os.environ.get('INTERVIEW_REPLICA_DB'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': os.environ['INTERVIEW_REPLICA_DB'],
+        'TEST': {'MIRROR': 'default'},
+    }
+    REPLICA_DATABASES = ['replica']
+else:
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': BASE_DIR / 'replica.sqlite3',
+        'TEST': {'MIRROR': None},
+    }
+    REPLICA_DATABASES = []
+REPLICA_PIN_SECONDS = 5
+REPLICA_PIN_COOKIE = 'primary_pin'
+
+DATABASE_ROUTERS = ['common.db.routers.ReplicaRouter']
+
+
+# Cache
+# https://docs.djangoproject.com/en/3.1/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'default',
+    },
+    # serialized topic trees keyed by revisions of topics, so per process cache is never stale,
+    # to share trees between processes use file based (or memcached, redis) backend:
+    # 'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': BASE_DIR / 'cache' / 'topics',
+    'topics': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'topics',
+        'TIMEOUT': 60 * 60 * 24,
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    },
+}
+
+TOPICS_CACHE_ALIAS = 'topics'
+
+# tokens are forgotten on their deletion and on changes of users only in this cache, so in production
+# it has to be shared by processes (checked by 'manage.py check --deploy'), local memory is for development
+AUTH_TOKEN_CACHE_ALIAS = 'default'
+AUTH_TOKEN_CACHE_TIMEOUT = 5 * 60
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.1/ref/settings/#auth-password-validators
@@ -131,12 +234,13 @@ STATIC_URL = '/static/'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'common.django_rest_framework.authentication.CachedTokenAuthentication',
     ],
 }
 
 
 SWAGGER_SETTINGS = {
+   'DEFAULT_INFO': 'interview.urls.api_info',
    'SECURITY_DEFINITIONS': {
       'Token': {
             'type': 'apiKey',
@@ -145,3 +249,7 @@ SWAGGER_SETTINGS = {
       },
    },
 }
+
+# Schema generated by 'python manage.py generate_swagger --overwrite swagger.json', it's served instead of
+# live generation, when DEBUG is off
+SWAGGER_SCHEMA_FILE = BASE_DIR / 'swagger.json'
@@ -1,15 +1,32 @@
+import csv
+import io
+import json
+import os
+import tempfile
 from datetime import datetime, timedelta
-from unittest import TestCase
+from unittest import TestCase, mock
 
+from django.conf import settings
 from django.contrib.auth.models import User
-from django.test import tag
+from django.core.cache import caches
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import override_settings, tag
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import parse_http_date
 from factory import Faker
 from rest_framework.authtoken.models import Token
 from rest_framework.test import APITestCase, APIClient
 
+from common.django_rest_framework.checks import check_auth_token_cache
+from interview.apps.answers.models import Answer
 from interview.apps.questions.models import Question
+from interview.apps.topics.models import Topic, TopicsCatalog, TopicsImport
 from interview.apps.topics.views import UserTopicType
+from interview.apps.users_answers.models import UserAnswer, EXPORT_COLUMNS
 from interview.tests.factories import TopicFactory, QuestionFactory, AnswerFactory
 
 
@@ -29,6 +46,101 @@ class AuthApiTestCase(APITestCase):
         self.client.force_authenticate(user=None, token=None)
 
 
+@tag('api')
+class CachedTokenAuthenticationTestCase(AuthApiTestCase):
+
+    def setUp(self) -> None:
+        super().setUp()
+
+        caches[settings.AUTH_TOKEN_CACHE_ALIAS].clear()
+        self.client.credentials(HTTP_AUTHORIZATION='Token %s' % self.token.key)
+
+    def test_token_is_resolved_once(self):
+        response = self.client.get(reverse('topics:topics-detail', args=[0]))
+        assert (response.status_code == 404)
+
+        # only revision and topic queries of the view
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('topics:topics-detail', args=[0]))
+        assert (response.status_code == 404)
+
+    def test_deleted_token_is_rejected(self):
+        response = self.client.get(reverse('topics:topics-detail', args=[0]))
+        assert (response.status_code == 404)
+
+        Token.objects.filter(key=self.token.key).delete()
+
+        response = self.client.get(reverse('topics:topics-detail', args=[0]))
+        assert (response.status_code == 401)
+
+    def test_inactive_user_is_rejected(self):
+        response = self.client.get(reverse('topics:topics-detail', args=[0]))
+        assert (response.status_code == 404)
+
+        user = User.objects.get(id=self.user.id)
+        user.is_active = False
+        user.save()
+
+        response = self.client.get(reverse('topics:topics-detail', args=[0]))
+        assert (response.status_code == 401)
+
+    def test_not_admin_is_forbidden(self):
+        user = User.objects.create_user('user', 'user@mail.com', 'passwd123')
+        self.client.credentials(HTTP_AUTHORIZATION='Token %s' % Token.objects.create(user=user).key)
+
+        # the second request is authenticated by cached user
+        for _ in range(2):
+            response = self.client.get(reverse('topics:topics-detail', args=[0]))
+            assert (response.status_code == 403)
+
+    def test_credentials_are_not_cached(self):
+        response = self.client.get(reverse('topics:topics-detail', args=[0]))
+        assert (response.status_code == 404)
+
+        cached = caches[settings.AUTH_TOKEN_CACHE_ALIAS].get('auth-token:%s' % self.token.key)
+        assert (self.user.password not in cached)
+        assert (self.user.id in cached)
+
+    def test_local_cache_is_reported_on_deploy(self):
+        assert ([error.id for error in check_auth_token_cache(None)] == ['interview.E001'])
+        with override_settings(AUTH_TOKEN_CACHE_TIMEOUT=0):
+            assert (check_auth_token_cache(None) == [])
+
+
+@tag('api')
+class SwaggerSchemaTestCase(APITestCase):
+
+    def test_live_schema(self):
+        with override_settings(SWAGGER_SCHEMA_FILE=None):
+            response = self.client.get(reverse('schema-swagger-ui'), data={'format': 'openapi'})
+        assert (response.status_code == 200)
+        assert (not response.streaming)
+        assert json.loads(response.content).get('paths')
+
+    def test_prebuilt_schema(self):
+        with tempfile.TemporaryDirectory() as directory:
+            schema_file = os.path.join(directory, 'swagger.json')
+            with open(schema_file, 'w') as stream:
+                stream.write('{"swagger": "2.0", "paths": {}}')
+
+            with override_settings(SWAGGER_SCHEMA_FILE=schema_file):
+                response = self.client.get(reverse('schema-swagger-ui'), data={'format': 'openapi'})
+                assert (response.status_code == 200)
+                assert response.streaming
+                assert (json.loads(b''.join(response.streaming_content)) == {'swagger': '2.0', 'paths': {}})
+                etag = response['ETag']
+
+                response = self.client.get(
+                    reverse('schema-swagger-ui'), data={'format': 'openapi'}, HTTP_IF_NONE_MATCH=etag
+                )
+                assert (response.status_code == 304)
+
+                # UI page itself is rendered by drf-yasg
+                response = self.client.get(reverse('schema-swagger-ui'))
+                assert (response.status_code == 200)
+                assert (not response.streaming)
+
+
 class DatabaseFilling(TestCase):
     """
     Filling database. Create: 3 topics, 3 question with 3 answers for topic.
@@ -193,6 +305,184 @@ class AdminApiFlowTestCase(AuthApiTestCase, DatabaseFilling, TopicHelper):
         assert (response.status_code == 200)
         assert (topics_count - 1 == self._get_topics_count())
 
+    def test_paginate_topics(self):
+        response = self.client.get(reverse('topics:topics-list'))
+        assert (response.status_code == 200)
+        topics_ids = [topic['id'] for topic in response.data]
+        assert_list(topics_ids)
+
+        new_topic = None
+        paginated_topics_ids = []
+        response = self.client.get(reverse('topics:topics-list'), data={'page_size': 2})
+        while True:
+            assert (response.status_code == 200)
+            assert isinstance(response.data, dict)
+            results = response.data.get('results')
+            assert isinstance(results, list)
+            assert (len(results) <= 2)
+            paginated_topics_ids += [topic['id'] for topic in results]
+
+            if len(paginated_topics_ids) == 2:
+                # inserts don't shift the following pages
+                new_topic = TopicFactory()
+
+            next_link = response.data.get('next')
+            if next_link is None:
+                break
+            response = self.client.get(next_link)
+
+        assert (topics_ids + [new_topic.id] == paginated_topics_ids)
+
+    def test_export_topics(self):
+        response = self.client.get(reverse('topics:topics-list'))
+        assert (response.status_code == 200)
+        topics = json.loads(json.dumps(response.data))
+
+        response = self.client.get(reverse('topics:topics-export'))
+        assert (response.status_code == 200)
+        assert response.streaming
+        assert (json.loads(b''.join(response.streaming_content)) == topics)
+
+        response = self.client.get(reverse('topics:topics-export'), data={'output': 'ndjson'})
+        assert (response.status_code == 200)
+        lines = b''.join(response.streaming_content).splitlines()
+        assert ([json.loads(line) for line in lines] == topics)
+
+        response = self.client.get(reverse('topics:topics-export'), data={'output': 'xml'})
+        assert (response.status_code == 400)
+
+    def test_import_topics(self):
+        def without_ids(topic):
+            return {
+                **{key: value for key, value in topic.items() if key not in ('id', 'questions')},
+                'questions': [
+                    (question['text'], question['type'], [answer['text'] for answer in question['answers']])
+                    for question in topic['questions']
+                ],
+            }
+
+        response = self.client.get(reverse('topics:topics-export'))
+        assert (response.status_code == 200)
+        content = b''.join(response.streaming_content)
+        topics = json.loads(content)
+        last_topic_id = max(topic['id'] for topic in topics)
+
+        def get_imported_topics():
+            response = self.client.get(reverse('topics:topics-list'))
+            assert (response.status_code == 200)
+            return [without_ids(topic) for topic in response.data if topic['id'] > last_topic_id]
+
+        with tempfile.TemporaryDirectory() as directory:
+            # JSON array (export of topics) is imported by batches, batch is committed with checkpoint,
+            # so the batch of failed checkpoint isn't imported twice by resume
+            path = os.path.join(directory, 'topics.json')
+            with open(path, 'wb') as stream:
+                stream.write(content)
+            save = TopicsImport.save
+
+            def save_first(checkpoint, *args, **kwargs):
+                if checkpoint.topics > 2:
+                    raise OSError('crash')
+                save(checkpoint, *args, **kwargs)
+
+            with mock.patch.object(TopicsImport, 'save', autospec=True, side_effect=save_first):
+                with self.assertRaises(OSError):
+                    call_command('import_topics', path, batch_size=2, stderr=open(os.devnull, 'w'))
+            assert (get_imported_topics() == [without_ids(topic) for topic in topics[:2]])
+            call_command('import_topics', path, batch_size=2, resume=True, stderr=open(os.devnull, 'w'))
+            assert (get_imported_topics() == [without_ids(topic) for topic in topics])
+
+            # checkpoint is kept after import
+            checkpoint = TopicsImport.objects.get(file=path)
+            assert (checkpoint.offset == len(content.rstrip()) - 1)
+            assert ((checkpoint.records, checkpoint.topics, checkpoint.questions) == (3, 3, 9))
+            with self.assertRaises(CommandError):
+                call_command('import_topics', path, stderr=open(os.devnull, 'w'))
+
+            # import is stopped on invalid record and continued after fix of file
+            last_topic_id = max(topic['id'] for topic in self.client.get(reverse('topics:topics-list')).data)
+            invalid_topic = {**topics[1], 'questions': [{**topics[1]['questions'][0], 'answers': []}]}
+            path = os.path.join(directory, 'topics.ndjson')
+            lines = [json.dumps(topic) for topic in (topics[0], invalid_topic, topics[2])]
+            with open(path, 'w') as stream:
+                stream.write('\n'.join(lines) + '\n')
+            with self.assertRaisesMessage(CommandError, 'Record #2 is invalid'):
+                call_command('import_topics', path, batch_size=1, stderr=open(os.devnull, 'w'))
+            assert (get_imported_topics() == [without_ids(topics[0])])
+
+            lines[1] = json.dumps(topics[1])
+            with open(path, 'w') as stream:
+                stream.write('\n'.join(lines) + '\n')
+            call_command('import_topics', path, resume=True, stderr=open(os.devnull, 'w'))
+            assert (get_imported_topics() == [without_ids(topic) for topic in topics])
+
+            # invalid records are reported and skipped
+            last_topic_id = max(topic['id'] for topic in self.client.get(reverse('topics:topics-list')).data)
+            path = os.path.join(directory, 'invalid.ndjson')
+            with open(path, 'w') as stream:
+                stream.write('\n'.join(['{"title": ', json.dumps(invalid_topic), json.dumps(topics[2])]) + '\n')
+            stderr = io.StringIO()
+            call_command('import_topics', path, skip_invalid=True, stderr=stderr)
+            assert (get_imported_topics() == [without_ids(topics[2])])
+            assert ('Record #1 is invalid' in stderr.getvalue())
+            assert ('Record #2 is invalid' in stderr.getvalue())
+
+    def test_conditional_get_topics(self):
+        (first_topic_id,) = self._get_first_topic('id')
+
+        for path in (reverse('topics:topics-list'), reverse('topics:topics-detail', args=[first_topic_id])):
+            response = self.client.get(path)
+            assert (response.status_code == 200)
+            etag = response['ETag']
+            assert etag
+
+            response = self.client.get(path, HTTP_IF_NONE_MATCH=etag)
+            assert (response.status_code == 304)
+            assert not response.content
+
+            QuestionFactory(topic_id=first_topic_id)
+
+            response = self.client.get(path, HTTP_IF_NONE_MATCH=etag)
+            assert (response.status_code == 200)
+            assert (response['ETag'] != etag)
+
+    def test_last_modified_of_topics_after_deletion(self):
+        # modification times are in the past, so the deletion isn't in the same second of 'Last-Modified'
+        hour_ago = timezone.now() - timedelta(hours=1)
+        newer_topic = TopicFactory()
+        Topic.objects.update(modified_at=hour_ago - timedelta(hours=1))
+        Topic.objects.filter(id=newer_topic.id).update(modified_at=hour_ago)
+        TopicsCatalog.objects.update(deleted_at=hour_ago)
+        path = reverse('topics:topics-list')
+
+        response = self.client.get(path)
+        assert (response.status_code == 200)
+        last_modified = response['Last-Modified']
+        response = self.client.get(path, HTTP_IF_MODIFIED_SINCE=last_modified)
+        assert (response.status_code == 304)
+
+        newer_topic.delete()
+        response = self.client.get(path, HTTP_IF_MODIFIED_SINCE=last_modified)
+        assert (response.status_code == 200)
+        assert (newer_topic.id not in [topic['id'] for topic in response.data])
+        assert (parse_http_date(response['Last-Modified']) > parse_http_date(last_modified))
+
+    def test_cached_topic_follows_revision(self):
+        (first_topic_id, questions,) = self._get_first_topic('id', 'questions')
+        path = reverse('topics:topics-detail', args=[first_topic_id])
+        response = self.client.get(path)
+        assert (response.status_code == 200)
+
+        # change is handled by another process, so nothing is invalidated in cache of this one
+        Question.objects.filter(id=questions[0]['id']).update(text='Changed.')
+        Topic.objects.touch([first_topic_id])
+
+        response = self.client.get(path)
+        assert (response.status_code == 200)
+        assert (response.data['questions'][0]['text'] == 'Changed.')
+        (listed_questions,) = self._get_topic_by_id(first_topic_id, 'questions')
+        assert (listed_questions[0]['text'] == 'Changed.')
+
     def test_create_questions(self):
         (first_topic_id,) = self._get_first_topic('id')
 
@@ -259,6 +549,58 @@ class AdminApiFlowTestCase(AuthApiTestCase, DatabaseFilling, TopicHelper):
         (before_first_topic_questions,) = self._get_topic_by_id(first_topic_id, 'questions')
         assert (len(after_first_topic_questions) == len(before_first_topic_questions))
 
+    def test_bulk_create_questions(self):
+        (first_topic_id, after_first_topic_questions,) = self._get_first_topic('id', 'questions')
+
+        questions = [
+            {
+                'text': 'Question #%d.' % i,
+                'type': Question.ONE_OPTION,
+                'topic_id': first_topic_id,
+                'answers': ['One answer.', 'Two answer.'],
+            }
+            for i in range(3)
+        ]
+        wrong_question = {
+            'text': 'Question #X.',
+            'type': Question.CUSTOM_OPTION,
+            'topic_id': first_topic_id,
+            'answers': ['One answer.'],
+        }
+
+        response = self.client.post(
+            reverse('questions:questions-bulk'),
+            data=questions + [wrong_question],
+            format='json'
+        )
+        assert (response.status_code == 400)
+        (before_first_topic_questions,) = self._get_topic_by_id(first_topic_id, 'questions')
+        assert (len(after_first_topic_questions) == len(before_first_topic_questions))
+
+        # unknown topic is reported for its item instead of failure of the whole batch on commit
+        response = self.client.post(
+            reverse('questions:questions-bulk'),
+            data=questions + [{**questions[0], 'topic_id': 9999}],
+            format='json'
+        )
+        assert (response.status_code == 400)
+        assert (response.data['non_field_errors'][:3] == [{}] * 3)
+        assert ('topic_id' in response.data['non_field_errors'][3])
+
+        # questions are inserted by batch, so count of queries doesn't depend on count of questions
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(reverse('questions:questions-bulk'), data=questions[:1], format='json')
+        assert (response.status_code == 200)
+        with self.assertNumQueries(len(queries)):
+            response = self.client.post(reverse('questions:questions-bulk'), data=questions, format='json')
+        assert (response.status_code == 200)
+        assert_list(response.data)
+        assert ([question['text'] for question in response.data] == [question['text'] for question in questions])
+        assert all(len(question['answers']) == 2 for question in response.data)
+
+        (before_first_topic_questions,) = self._get_topic_by_id(first_topic_id, 'questions')
+        assert (len(after_first_topic_questions) + len(questions) + 1 == len(before_first_topic_questions))
+
     def test_update_question(self):
         (first_topic_id, first_topic_questions,) = self._get_first_topic('id', 'questions')
         assert_list(first_topic_questions)
@@ -321,6 +663,31 @@ class AdminApiFlowTestCase(AuthApiTestCase, DatabaseFilling, TopicHelper):
         first_question_answers = first_question[0].get('answers', None)
         assert (len(first_question_answers) == first_topic_first_question_answers_count)
 
+    def test_update_question_keeps_unchanged_answers(self):
+        (first_topic_questions,) = self._get_first_topic('questions')
+        first_question = first_topic_questions[0]
+        answers = first_question.get('answers')
+        assert (len(answers) > 1)
+
+        kept_answers, changed_answer = answers[:-1], answers[-1]
+        changed_answer_text = changed_answer['text'][:256] + ' Fixed.'
+        response = self.client.put(
+            reverse('questions:questions-detail', args=[first_question['id']]),
+            data={
+                'text': first_question['text'],
+                'type': first_question['type'],
+                'answers': [answer['text'] for answer in kept_answers] + [changed_answer_text],
+            },
+            format='json'
+        )
+        assert (response.status_code == 200)
+
+        updated_answers = {answer['id']: answer['text'] for answer in response.data.get('answers')}
+        assert (len(updated_answers) == len(answers))
+        assert all(updated_answers.get(answer['id']) == answer['text'] for answer in kept_answers)
+        assert (changed_answer['id'] not in updated_answers)
+        assert (changed_answer_text in updated_answers.values())
+
     def test_delete_questions(self):
         (first_topic_id, first_topic_questions,) = self._get_first_topic('id', 'questions')
 
@@ -369,11 +736,11 @@ class UserApiFlowTestCase(AuthApiTestCase, DatabaseFilling, TopicHelper):
 
         return question_id, answer_id
 
-    def __pass_question(self, question_id, answer_id):
+    def __pass_question(self, question_id, answer_id, user_id=None):
         response = self.client.post(
             reverse('users-answers:users-answers-list'),
             data={
-                'user_id': self.user_id,
+                'user_id': self.user_id if user_id is None else user_id,
                 'question_id': question_id,
                 'answer_id': answer_id,
             },
@@ -404,3 +771,249 @@ class UserApiFlowTestCase(AuthApiTestCase, DatabaseFilling, TopicHelper):
         assert_list(questions)
         passed_question = next(iter(filter(lambda question: question.get('id', None) == question_id, questions)))
         assert (answer_id == passed_question.get('answer_id', None))
+
+    def test_conditional_get_users_topics(self):
+        path = reverse('users-topics-list')
+        data = {'type': UserTopicType.ACTIVE.value, 'user_id': self.user_id}
+
+        response = self.client.get(path, data=data)
+        assert (response.status_code == 200)
+        etag = response['ETag']
+
+        response = self.client.get(path, data=data, HTTP_IF_NONE_MATCH=etag)
+        assert (response.status_code == 304)
+
+        # the same state of another user is another representation
+        response = self.client.get(path, data=dict(data, user_id=self.user_id + 1), HTTP_IF_NONE_MATCH=etag)
+        assert (response.status_code == 200)
+
+        question_id, answer_id = self.__get_question_and_answer_ids(response.data[0]['questions'][0])
+        self.__pass_question(question_id, answer_id)
+
+        response = self.client.get(path, data=data, HTTP_IF_NONE_MATCH=etag)
+        assert (response.status_code == 200)
+        assert (response['ETag'] != etag)
+
+    def test_last_modified_of_users_topics_after_date_change(self):
+        today = datetime.now().date()
+        topic = TopicFactory(start_date=today, finish_date=today)
+        AnswerFactory(question=QuestionFactory(topic=topic))
+        path = reverse('users-topics-list')
+        data = {'type': UserTopicType.ACTIVE.value, 'user_id': self.user_id}
+
+        response = self.client.get(path, data=data)
+        assert (response.status_code == 200)
+        assert (topic.id in [user_topic['id'] for user_topic in response.data])
+        last_modified = response['Last-Modified']
+        response = self.client.get(path, data=data, HTTP_IF_MODIFIED_SINCE=last_modified)
+        assert (response.status_code == 304)
+
+        # the topic isn't active anymore since midnight
+        with mock.patch('interview.apps.topics.views._today', return_value=today + timedelta(days=1)):
+            response = self.client.get(path, data=data, HTTP_IF_MODIFIED_SINCE=last_modified)
+        assert (response.status_code == 200)
+        assert (topic.id not in [user_topic['id'] for user_topic in response.data])
+
+    def test_pass_user_topic_by_batch(self):
+        user_active_topics = self._get_users_topics(self.user_id, is_active_not_passed=True)
+        user_passed_topics_count = len(self._get_users_topics(self.user_id, is_active_not_passed=False))
+        assert_list(user_active_topics)
+
+        first_topic = user_active_topics[0]
+        questions = first_topic.get('questions', None)
+        assert_list(questions)
+        answers = [
+            {'question_id': question_id, 'answer_id': answer_id}
+            for question_id, answer_id in map(self.__get_question_and_answer_ids, questions)
+        ]
+
+        response = self.client.post(
+            reverse('users-answers:users-answers-batch'),
+            data={
+                'user_id': self.user_id,
+                'topic_id': first_topic['id'],
+                'answers': answers + [{'question_id': answers[0]['question_id'], 'answer_id': answers[1]['answer_id']}],
+            },
+            format='json'
+        )
+        assert (response.status_code == 400)
+        assert (user_passed_topics_count == len(self._get_users_topics(self.user_id, is_active_not_passed=False)))
+
+        response = self.client.post(
+            reverse('users-answers:users-answers-batch'),
+            data={
+                'user_id': self.user_id,
+                'topic_id': first_topic['id'],
+                'answers': answers,
+            },
+            format='json'
+        )
+        assert (response.status_code == 200)
+        assert (response.data == {answer['question_id']: answer['answer_id'] for answer in answers})
+
+        user_passed_topics = self._get_users_topics(self.user_id, is_active_not_passed=False)
+        assert (user_passed_topics_count + 1 == len(user_passed_topics))
+
+    def test_user_topic_progress_follows_questions(self):
+        user_active_topics = self._get_users_topics(self.user_id, is_active_not_passed=True)
+        assert_list(user_active_topics)
+        first_topic = user_active_topics[0]
+        questions = first_topic.get('questions', None)
+        assert_list(questions)
+
+        questions_and_answers = list(map(self.__get_question_and_answer_ids, questions))
+        for args in questions_and_answers:
+            self.__pass_question(*args)
+
+        def is_passed_topic():
+            passed_topics = self._get_users_topics(self.user_id, is_active_not_passed=False)
+            return first_topic['id'] in [topic['id'] for topic in passed_topics]
+
+        assert is_passed_topic()
+
+        new_question = QuestionFactory(topic_id=first_topic['id'])
+        AnswerFactory(question=new_question)
+        assert not is_passed_topic()
+
+        new_question.delete()
+        assert is_passed_topic()
+
+        question_id, answer_id = questions_and_answers[0]
+        Answer.objects.filter(id=answer_id).delete()
+        assert not is_passed_topic()
+
+        self.__pass_question(*self.__get_question_and_answer_ids(questions[0], is_reversed_answers=True))
+        assert is_passed_topic()
+
+    def test_answers_picks(self):
+        first_topic = self._get_users_topics(self.user_id, is_active_not_passed=True)[0]
+        questions = first_topic['questions']
+        first_question_id, first_answer_id = self.__get_question_and_answer_ids(questions[0])
+        _, last_answer_id = self.__get_question_and_answer_ids(questions[0], is_reversed_answers=True)
+
+        self.__pass_question(first_question_id, first_answer_id)
+        self.__pass_question(first_question_id, first_answer_id, user_id=self.user_id + 1)
+        # changed answer isn't counted twice
+        self.__pass_question(first_question_id, last_answer_id)
+        self.__pass_question(first_question_id, last_answer_id)
+        response = self.client.post(
+            reverse('users-answers:users-answers-batch'),
+            data={
+                'user_id': self.user_id + 2,
+                'topic_id': first_topic['id'],
+                'answers': [
+                    {'question_id': question_id, 'answer_id': answer_id}
+                    for question_id, answer_id in map(self.__get_question_and_answer_ids, questions)
+                ],
+            },
+            format='json'
+        )
+        assert (response.status_code == 200)
+
+        self.authenticate()
+        path = reverse('topics:topics-stats', args=[first_topic['id']])
+        response = self.client.get(path)
+        assert (response.status_code == 200)
+        assert (response.data[0] == {
+            'question_id': first_question_id,
+            'picks': 3,
+            'answers': [
+                {'answer_id': first_answer_id, 'picks': 2, 'share': 2 / 3},
+                {'answer_id': last_answer_id, 'picks': 1, 'share': 1 / 3},
+            ],
+        })
+        assert ([question['picks'] for question in response.data[1:]] == [1] * (len(questions) - 1))
+
+        # incrementally maintained counters are the same as rebuilt ones
+        call_command('rebuild_answers_picks', batch_size=2, stdout=open(os.devnull, 'w'))
+        assert (self.client.get(path).data == response.data)
+
+        response = self.client.get(reverse('topics:topics-stats', args=[TopicFactory().id]))
+        assert (response.status_code == 200)
+        assert (response.data == [])
+
+        response = self.client.get(reverse('topics:topics-stats', args=[0]))
+        assert (response.status_code == 404)
+
+    def test_answer_of_another_question_is_rejected(self):
+        first_topic = self._get_users_topics(self.user_id, is_active_not_passed=True)[0]
+        first_question_id, _ = self.__get_question_and_answer_ids(first_topic['questions'][0])
+        _, other_answer_id = self.__get_question_and_answer_ids(first_topic['questions'][1])
+
+        response = self.client.post(
+            reverse('users-answers:users-answers-list'),
+            data={'user_id': self.user_id, 'question_id': first_question_id, 'answer_id': other_answer_id},
+            format='json'
+        )
+        assert (response.status_code == 400)
+
+        # the answer isn't counted as picked
+        self.authenticate()
+        response = self.client.get(reverse('topics:topics-stats', args=[first_topic['id']]))
+        assert (response.status_code == 200)
+        assert (response.data == [])
+
+    def test_export_users_answers(self):
+        first_topic = self._get_users_topics(self.user_id, is_active_not_passed=True)[0]
+        questions = first_topic['questions']
+        for args in map(self.__get_question_and_answer_ids, questions):
+            self.__pass_question(*args)
+        self.__pass_question(*self.__get_question_and_answer_ids(questions[0]), user_id=self.user_id + 1)
+        # answer on another topic isn't exported
+        another_topic = self._get_users_topics(self.user_id, is_active_not_passed=True)[1]
+        self.__pass_question(*self.__get_question_and_answer_ids(another_topic['questions'][0]))
+
+        path = reverse('users-answers:users-answers-export')
+        response = self.client.get(path, data={'topic_id': first_topic['id']})
+        assert (response.status_code == 401)
+
+        self.authenticate()
+        response = self.client.get(path)
+        assert (response.status_code == 400)
+        response = self.client.get(path, data={'topic_id': first_topic['id'], 'output': 'xml'})
+        assert (response.status_code == 400)
+
+        response = self.client.get(path, data={'topic_id': first_topic['id']})
+        assert (response.status_code == 200)
+        assert response.streaming
+        assert (response['Content-Type'] == 'text/csv; charset=utf-8')
+        rows = list(csv.DictReader(io.StringIO(b''.join(response.streaming_content).decode())))
+
+        answers = {question['id']: question['answers'][0] for question in questions}
+        assert (sorted((int(row['user_id']), int(row['question_id'])) for row in rows) == sorted(
+            [(self.user_id, question['id']) for question in questions] + [(self.user_id + 1, questions[0]['id'])]
+        ))
+        for row in rows:
+            question_id = int(row['question_id'])
+            question = next(question for question in questions if question['id'] == question_id)
+            assert (int(row['topic_id']) == first_topic['id'])
+            assert (row['question_text'] == question['text'])
+            assert (int(row['answer_id']) == answers[question_id]['id'])
+            assert (row['answer_text'] == answers[question_id]['text'])
+            assert (datetime.fromisoformat(row['modified_at']).tzinfo is not None)
+
+        # chunks of bounded queries don't depend on size
+        for chunk_size in (1, 2):
+            chunks = list(UserAnswer.objects.export(topic_id=first_topic['id'], chunk_size=chunk_size))
+            assert (all(len(chunk) <= chunk_size for chunk in chunks))
+            assert ([[str(value) for value in row] for chunk in chunks for row in chunk] == [
+                [row[column] for column, _ in EXPORT_COLUMNS] for row in rows
+            ])
+
+        # the same rows by range of modification time in NDJSON
+        response = self.client.get(path, data={
+            'modified_from': (datetime.now() - timedelta(hours=1)).isoformat(),
+            'modified_to': (datetime.now() + timedelta(hours=1)).isoformat(),
+            'output': 'ndjson',
+        })
+        assert (response.status_code == 200)
+        items = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        assert (len(items) == len(rows) + 1)
+        assert ({str(item['id']): {key: str(value) for key, value in item.items()} for item in items
+                 if item['topic_id'] == first_topic['id']} == {row['id']: row for row in rows})
+
+        response = self.client.get(path, data={'modified_from': (datetime.now() + timedelta(hours=1)).isoformat()})
+        assert (response.status_code == 200)
+        assert (b''.join(response.streaming_content).splitlines() == [b','.join(
+            column.encode() for column, _ in EXPORT_COLUMNS
+        )])
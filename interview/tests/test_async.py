@@ -0,0 +1,123 @@
+import asyncio
+import json
+import os
+import tempfile
+from urllib.parse import urlencode
+
+from django.http import HttpResponse
+from django.test import AsyncRequestFactory, TransactionTestCase, override_settings, tag
+from django.urls import path, reverse
+
+from interview.apps.topics.views import UserTopicType, get_users_topics_async
+from interview.apps.users_answers.views import create_user_answer_async
+from interview.tests.factories import QuestionFactory, AnswerFactory
+
+_rendezvous = {}
+
+
+async def _rendezvous_view(request):
+    # responds only when both of concurrent requests are in the view at the same time
+    _rendezvous['arrived'] += 1
+    if _rendezvous['arrived'] == 2:
+        _rendezvous['event'].set()
+    try:
+        await asyncio.wait_for(_rendezvous['event'].wait(), 5)
+    except asyncio.TimeoutError:
+        return HttpResponse(status=504)
+    return HttpResponse()
+
+
+urlpatterns = [
+    path('users-topics/', get_users_topics_async, name='users-topics-list'),
+    path('rendezvous/', _rendezvous_view),
+]
+
+
+@tag('api', 'async')
+class AsyncViewsTestCase(TransactionTestCase):
+    """
+    Coroutine views run database code in thread pool, so data must be committed to be seen by them.
+    """
+
+    user_id = 666
+
+    def setUp(self) -> None:
+        super().setUp()
+
+        self.question = QuestionFactory()
+        self.answer = AnswerFactory(question=self.question)
+        self.factory = AsyncRequestFactory()
+
+    def __get_request(self, user_topic_type):
+        # AsyncRequestFactory of Django 3.1 drops 'data' of GET request, so query string is in path
+        return self.factory.get('%s?%s' % (
+            reverse('users-topics-list'),
+            urlencode({'type': user_topic_type, 'user_id': self.user_id})
+        ))
+
+    async def __get_passed_topics(self) -> list:
+        response = await get_users_topics_async(self.__get_request(UserTopicType.PASSED.value))
+        assert (response.status_code == 200)
+        return json.loads(response.content)
+
+    async def test_pass_user_topic(self):
+        assert (await self.__get_passed_topics() == [])
+
+        response = await create_user_answer_async(self.factory.post(
+            reverse('users-answers:users-answers-list'),
+            data={
+                'user_id': self.user_id,
+                'question_id': self.question.id,
+                'answer_id': self.answer.id,
+            },
+            content_type='application/json'
+        ))
+        assert (response.status_code == 200)
+
+        passed_topics = await self.__get_passed_topics()
+        assert ([topic['id'] for topic in passed_topics] == [self.question.topic_id])
+        assert (passed_topics[0]['questions'][0]['answer_id'] == self.answer.id)
+
+    async def test_wrong_parameters(self):
+        response = await get_users_topics_async(self.__get_request('unknown'))
+        assert (response.status_code == 400)
+
+    async def test_concurrent_requests(self):
+        results = await asyncio.gather(*(self.__get_passed_topics() for _ in range(16)))
+        assert all(result == [] for result in results)
+
+
+@tag('api', 'async')
+@override_settings(ROOT_URLCONF=__name__)
+class AsgiMiddlewareTestCase(TransactionTestCase):
+    """
+    Requests go through ASGI handler with middlewares of settings (unlike requests of AsyncRequestFactory).
+    """
+
+    async def test_middlewares_do_not_serialize_coroutine_views(self):
+        # a synchronous middleware would run the rest of chain in the single thread of synchronous code,
+        # and the first request would wait for the second one in vain
+        _rendezvous.update(arrived=0, event=asyncio.Event())
+        responses = await asyncio.gather(*(self.async_client.get('/rendezvous/') for _ in range(2)))
+        assert ([response.status_code for response in responses] == [200, 200])
+
+    async def __get_users_topics(self):
+        return await self.async_client.get('/users-topics/?%s' % urlencode({
+            'type': UserTopicType.PASSED.value, 'user_id': 1
+        }))
+
+    async def test_queries_of_coroutine_view_are_measured(self):
+        response = await self.__get_users_topics()
+        assert (response.status_code == 200)
+        assert (response['Server-Timing'].startswith('db;desc="'))
+        assert (not response['Server-Timing'].startswith('db;desc="0 queries"'))
+
+    async def test_sampled_requests_are_profiled(self):
+        with tempfile.TemporaryDirectory() as directory, override_settings(
+            PROFILING_DIR=directory, PROFILING_SAMPLE_RATES={'users-topics-list': 1.0}
+        ):
+            response = await self.__get_users_topics()
+            assert (response.status_code == 200)
+            artifacts = os.listdir(directory)
+        assert (len(artifacts) == 1)
+        assert (artifacts[0].endswith('.collapsed'))
@@ -0,0 +1,170 @@
+import os
+import random
+import time
+from datetime import datetime, timedelta
+from unittest import skipUnless
+
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Count, F, Q
+from django.test import TestCase, tag
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIRequestFactory
+
+from interview.apps.answers.models import Answer
+from interview.apps.questions.models import Question
+from interview.apps.topics.models import Topic, TopicSerializer
+from interview.apps.topics.views import UserTopicType, get_users_topics
+from interview.apps.users_answers.models import UserAnswer
+
+
+def legacy_get_users_topics(user_id, is_active_type) -> list:
+    """
+    Implementation of 'users-topics' before user-topic progress table and prefetching of users answers.
+    ATTENTION! Its 'total_questions' counts rows of questions joined with answers of all users,
+    so with many users its result differs from the current one; it's used only for timing.
+    """
+    topics_ids = Question.objects.values(
+        'topic_id'
+    ).annotate(
+        total_questions=Count('id'),
+        passed_questions=Count('id', filter=Q(answer__user_id=user_id))
+    )
+    if is_active_type:
+        topics_ids = topics_ids.filter(total_questions__gt=F('passed_questions'))
+    else:
+        topics_ids = topics_ids.filter(total_questions__exact=F('passed_questions'))
+    topics_ids = topics_ids.values_list('topic_id', flat=True)
+
+    if is_active_type:
+        date = datetime.now().date()
+        topics = Topic.objects.filter(Q(start_date__lte=date) & Q(finish_date__gte=date) & Q(id__in=topics_ids))
+    else:
+        topics = Topic.objects.filter(id__in=topics_ids)
+
+    answers_on_questions = dict(UserAnswer.objects.filter(user_id=user_id).values_list('question_id', 'answer_id'))
+
+    topics = TopicSerializer(topics, many=True).data
+    for topic in topics:
+        for question in topic.get('questions', []):
+            answer_id = answers_on_questions.get(question['id'])
+            if answer_id is not None:
+                question['answer_id'] = answer_id
+    return topics
+
+
+@tag('benchmark')
+@skipUnless(os.environ.get('INTERVIEW_BENCHMARK'), 'Set INTERVIEW_BENCHMARK=1 to run benchmarks.')
+class UsersTopicsBenchmarkTestCase(TestCase):
+    """
+    Compare legacy and current 'users-topics' implementations. Dataset size is configured by environment:
+    INTERVIEW_BENCHMARK_USERS (10000), INTERVIEW_BENCHMARK_QUESTIONS (1000), INTERVIEW_BENCHMARK_SAMPLES (20).
+    """
+
+    users_count = int(os.environ.get('INTERVIEW_BENCHMARK_USERS', 10000))
+    questions_count = int(os.environ.get('INTERVIEW_BENCHMARK_QUESTIONS', 1000))
+    samples_count = int(os.environ.get('INTERVIEW_BENCHMARK_SAMPLES', 20))
+    questions_per_topic = 20
+    answers_per_question = 4
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+
+        rnd = random.Random(0)
+        today = datetime.now().date()
+        topics_count = max(cls.questions_count // cls.questions_per_topic, 1)
+
+        Topic.objects.bulk_create([
+            Topic(
+                id=topic_id,
+                title='Topic #%d.' % topic_id,
+                start_date=today - timedelta(weeks=1),
+                finish_date=today + timedelta(weeks=1),
+                description='Description.'
+            )
+            for topic_id in range(1, topics_count + 1)
+        ])
+        Question.objects.bulk_create([
+            Question(
+                id=question_id,
+                text='Question #%d.' % question_id,
+                type=Question.ONE_OPTION,
+                topic_id=(question_id - 1) % topics_count + 1
+            )
+            for question_id in range(1, cls.questions_count + 1)
+        ])
+        Answer.objects.bulk_create([
+            Answer(
+                id=(question_id - 1) * cls.answers_per_question + i + 1,
+                text='Answer #%d.' % i,
+                question_id=question_id
+            )
+            for question_id in range(1, cls.questions_count + 1)
+            for i in range(cls.answers_per_question)
+        ], batch_size=10000)
+
+        questions_by_topics = {}
+        for question_id in range(1, cls.questions_count + 1):
+            questions_by_topics.setdefault((question_id - 1) % topics_count + 1, []).append(question_id)
+
+        # every user passes one topic and answers on a half of another one
+        users_answers = []
+        for user_id in range(1, cls.users_count + 1):
+            passed_topic_id, started_topic_id = rnd.sample(range(1, topics_count + 1), min(2, topics_count))
+            started_questions = questions_by_topics[started_topic_id]
+            for question_id in questions_by_topics[passed_topic_id] + started_questions[:len(started_questions) // 2]:
+                answer_index = rnd.randrange(cls.answers_per_question)
+                users_answers.append(UserAnswer(
+                    user_id=user_id,
+                    question_id=question_id,
+                    answer_id=(question_id - 1) * cls.answers_per_question + answer_index + 1
+                ))
+            if len(users_answers) >= 10000:
+                UserAnswer.objects.bulk_create(users_answers)
+                users_answers = []
+        UserAnswer.objects.bulk_create(users_answers)
+
+        call_command('rebuild_users_topics_progress', batch_size=5000, stdout=open(os.devnull, 'w'))
+
+    @staticmethod
+    def __measure(func) -> tuple:
+        with CaptureQueriesContext(connection) as queries:
+            started_at = time.perf_counter()
+            func()
+            duration = time.perf_counter() - started_at
+        return duration, len(queries)
+
+    def test_users_topics(self):
+        factory = APIRequestFactory()
+        users_ids = random.Random(1).sample(range(1, self.users_count + 1), min(self.samples_count, self.users_count))
+
+        print('\nusers: %d, questions: %d, users answers: %d' % (
+            self.users_count, self.questions_count, UserAnswer.objects.count()
+        ))
+        for user_topic_type in UserTopicType.values():
+            is_active_type = (user_topic_type == UserTopicType.ACTIVE.value)
+            results = {'legacy': [], 'current': []}
+
+            for user_id in users_ids:
+                results['legacy'].append(self.__measure(
+                    lambda: legacy_get_users_topics(user_id, is_active_type)
+                ))
+
+                request = factory.get(reverse('users-topics-list'), data={'type': user_topic_type, 'user_id': user_id})
+                results['current'].append(self.__measure(
+                    lambda: get_users_topics(request).data
+                ))
+
+            for name, measurements in results.items():
+                durations = sorted(duration for duration, _ in measurements)
+                queries_counts = {queries_count for _, queries_count in measurements}
+                print('%-7s %-7s mean: %8.2f ms, max: %8.2f ms, queries: %s' % (
+                    user_topic_type, name,
+                    sum(durations) / len(durations) * 1000,
+                    durations[-1] * 1000,
+                    '/'.join(map(str, sorted(queries_counts))),
+                ))
+
+            assert (len({queries_count for _, queries_count in results['current']}) == 1)
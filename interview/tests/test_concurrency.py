@@ -0,0 +1,65 @@
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connection, OperationalError
+from django.test import TransactionTestCase, tag
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from interview.apps.users_answers.models import UserAnswer
+from interview.tests.factories import QuestionFactory, AnswerFactory
+
+
+@tag('api', 'concurrency')
+class UserAnswerConcurrencyTestCase(TransactionTestCase):
+    """
+    Concurrent submissions of the same user on the same question must leave exactly one user answer.
+    """
+
+    user_id = 666
+    threads_count = 8
+    submissions_count = 64
+    retry_seconds = 30.0
+
+    def setUp(self) -> None:
+        super().setUp()
+
+        self.question = QuestionFactory()
+        self.answers_ids = [AnswerFactory(question=self.question).id for _ in range(3)]
+
+    def __submit(self, index) -> int:
+        answer_id = self.answers_ids[index % len(self.answers_ids)]
+        deadline = time.monotonic() + self.retry_seconds
+        attempt = 0
+        try:
+            while time.monotonic() < deadline:
+                try:
+                    response = APIClient().post(
+                        reverse('users-answers:users-answers-list'),
+                        data={
+                            'user_id': self.user_id,
+                            'question_id': self.question.id,
+                            'answer_id': answer_id,
+                        },
+                        format='json'
+                    )
+                    return response.status_code
+                except OperationalError:
+                    # shared cache in-memory SQLite test database raises "table is locked" instead of waiting
+                    # for busy timeout, so back off with jitter, otherwise threads keep colliding in lockstep
+                    attempt += 1
+                    time.sleep(random.uniform(0, min(0.1, 0.001 * 2 ** attempt)))
+            return 0
+        finally:
+            connection.close()
+
+    def test_concurrent_submissions(self):
+        with ThreadPoolExecutor(max_workers=self.threads_count) as executor:
+            statuses = list(executor.map(self.__submit, range(self.submissions_count)))
+
+        assert all(status == 200 for status in statuses)
+
+        users_answers = UserAnswer.objects.filter(user_id=self.user_id, question_id=self.question.id)
+        assert (users_answers.count() == 1)
+        assert (users_answers.get().answer_id in self.answers_ids)
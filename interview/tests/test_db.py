@@ -0,0 +1,39 @@
+import os
+import tempfile
+
+from django.db import connections
+from django.test import SimpleTestCase, tag
+
+from common.db.backends.sqlite3.base import DatabaseWrapper
+
+
+@tag('db')
+class SqlitePragmasTestCase(SimpleTestCase):
+    """
+    Custom SQLite backend applies pragmas from OPTIONS to every new connection.
+    """
+
+    def test_pragmas_of_new_connection(self):
+        with tempfile.TemporaryDirectory() as directory:
+            settings_dict = {
+                **connections['default'].settings_dict,
+                'NAME': os.path.join(directory, 'pragmas.sqlite3'),
+                'OPTIONS': {
+                    'timeout': 7,
+                    'pragmas': {
+                        'journal_mode': 'WAL',
+                        'synchronous': 'NORMAL',
+                    },
+                },
+            }
+            wrapper = DatabaseWrapper(settings_dict, alias='pragmas')
+            try:
+                with wrapper.cursor() as cursor:
+                    pragmas = {}
+                    for name in ('journal_mode', 'synchronous', 'busy_timeout'):
+                        cursor.execute('PRAGMA %s' % name)
+                        pragmas[name] = cursor.fetchone()[0]
+            finally:
+                wrapper.close()
+
+        assert (pragmas == {'journal_mode': 'wal', 'synchronous': 1, 'busy_timeout': 7000})
@@ -0,0 +1,73 @@
+import re
+from datetime import datetime
+from unittest import skipUnless
+
+from django.db import connection
+from django.db.models import QuerySet
+from django.test import TestCase, tag
+
+from interview.apps.answers.models import Answer
+from interview.apps.questions.models import Question
+from interview.apps.topics.models import Topic
+from interview.apps.users_answers.models import UserAnswer, UserTopicProgress
+from interview.tests.test_queries import fill_database
+
+
+@tag('api', 'explain')
+@skipUnless(connection.vendor == 'sqlite', 'Query plans are checked for SQLite only.')
+class QueryPlanTestCase(TestCase):
+    """
+    Hot queries must search by indexes. Test fails if query plan of any of them contains full scan of table.
+    """
+
+    user_id = 666
+
+    # "SCAN users_answers" (SQLite >= 3.36) or "SCAN TABLE users_answers", but not "SCAN ... USING INDEX ..."
+    __full_scan_pattern = re.compile(r'^SCAN (TABLE )?(?P<table>\w+)$')
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+
+        fill_database(3, 3, 3)
+        cls.question = Question.objects.first()
+        cls.answer = Answer.objects.filter(question=cls.question).first()
+        UserAnswer.objects.upsert(cls.user_id, cls.question.id, cls.answer.id)
+
+    @staticmethod
+    def __get_query_plan(queryset: QuerySet) -> list:
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+            return [row[-1] for row in cursor.fetchall()]
+
+    def __assert_no_full_scan(self, queryset: QuerySet):
+        query_plan = self.__get_query_plan(queryset)
+        full_scans = [detail for detail in query_plan if self.__full_scan_pattern.match(detail)]
+        assert not full_scans, 'Full scan in query plan:\n%s\nof query:\n%s' % ('\n'.join(query_plan), queryset.query)
+
+    def test_active_users_topics(self):
+        self.__assert_no_full_scan(Topic.objects.active_for_user(self.user_id, datetime.now().date()))
+
+    def test_passed_users_topics(self):
+        self.__assert_no_full_scan(Topic.objects.passed_by_user(self.user_id))
+
+    def test_topics_tree(self):
+        topics_ids = list(Topic.objects.values_list('id', flat=True))
+        questions_ids = list(Question.objects.values_list('id', flat=True))
+
+        self.__assert_no_full_scan(Question.objects.filter(topic_id__in=topics_ids))
+        self.__assert_no_full_scan(Answer.objects.filter(question_id__in=questions_ids))
+        self.__assert_no_full_scan(UserAnswer.objects.filter(user_id=self.user_id, question_id__in=questions_ids))
+
+    def test_users_answers(self):
+        self.__assert_no_full_scan(UserAnswer.objects.filter(user_id=self.user_id))
+        self.__assert_no_full_scan(UserAnswer.objects.filter(question_id=self.question.id, answer_id=self.answer.id))
+        self.__assert_no_full_scan(UserAnswer.objects.filter(answer_id=self.answer.id).values('user_id'))
+
+    def test_users_topics_progress(self):
+        self.__assert_no_full_scan(UserTopicProgress.objects.filter(user_id=self.user_id))
+        self.__assert_no_full_scan(UserTopicProgress.objects.filter(
+            topic__questions=self.question.id,
+            user_id__in=UserAnswer.objects.filter(answer_id=self.answer.id).values('user_id')
+        ))
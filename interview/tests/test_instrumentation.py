@@ -0,0 +1,89 @@
+import re
+
+from django.core.cache import caches
+from django.db import connection
+from django.test import SimpleTestCase, override_settings, tag
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from common.instrumentation import RequestMetrics
+from interview.apps.topics.views import UserTopicType
+from interview.tests.test_api import AuthApiTestCase
+from interview.tests.test_queries import fill_database
+
+
+@tag('instrumentation')
+class RequestMetricsTestCase(SimpleTestCase):
+
+    def test_repeated_statements(self):
+        metrics = RequestMetrics()
+        for ids_count in (1, 2, 3):
+            metrics.add_query('SELECT * FROM "answers" WHERE "question_id" IN (%s)' % ', '.join(['%s'] * ids_count), 0.001)
+        metrics.add_query('SELECT * FROM "topics" WHERE "id" = %s', 0.001)
+        metrics.add_query('SELECT * FROM "topics" WHERE "id" = %s', 0.001)
+        metrics.add_query('SELECT COUNT(*) FROM "topics"', 0.001)
+
+        assert (metrics.queries_count == 6)
+        assert (metrics.repeated_statements(5) == [
+            ('SELECT * FROM "answers" WHERE "question_id" IN (%s, ...)', 2),
+            ('SELECT * FROM "topics" WHERE "id" = %s', 2),
+        ])
+        assert (metrics.repeated_statements(1) == [('SELECT * FROM "answers" WHERE "question_id" IN (%s, ...)', 2)])
+
+
+@tag('api', 'instrumentation')
+class RequestInstrumentationMiddlewareTestCase(AuthApiTestCase):
+
+    def setUp(self) -> None:
+        super().setUp()
+
+        caches['default'].clear()
+        self.authenticate()
+        fill_database(2, 3, 2)
+
+    def __get_users_topics(self):
+        return self.client.get(reverse('users-topics-list'), data={
+            'type': UserTopicType.ACTIVE.value,
+            'user_id': 666,
+        })
+
+    @staticmethod
+    def __parse_server_timing(header: str) -> dict:
+        timings = {}
+        for timing in header.split(', '):
+            name, *params = timing.split(';')
+            timings[name] = dict(param.split('=', 1) for param in params)
+        return timings
+
+    def test_server_timing_header(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.__get_users_topics()
+        assert (response.status_code == 200)
+
+        timings = self.__parse_server_timing(response['Server-Timing'])
+        assert (set(timings) == {'db', 'serialize', 'render', 'total'})
+        assert (timings['db']['desc'] == '"%d queries"' % len(queries))
+        for timing in timings.values():
+            assert (re.fullmatch(r'\d+\.\d{2}', timing['dur']))
+        assert (float(timings['total']['dur']) >= float(timings['db']['dur']))
+
+    @override_settings(SERVER_TIMING_HEADER=False)
+    def test_server_timing_header_disabled(self):
+        response = self.__get_users_topics()
+        assert (response.status_code == 200)
+        assert (not response.has_header('Server-Timing'))
+
+    def test_fast_request_isnt_logged(self):
+        with self.assertRaises(AssertionError):
+            with self.assertLogs('common.instrumentation', level='WARNING'):
+                self.__get_users_topics()
+
+    @override_settings(SLOW_REQUEST_QUERIES=1)
+    def test_slow_request_is_logged(self):
+        with self.assertLogs('common.instrumentation', level='WARNING') as logs:
+            response = self.client.get(reverse('topics:topics-list'))
+        assert (response.status_code == 200)
+
+        assert (len(logs.output) == 1)
+        assert ('Slow request GET %s (200)' % reverse('topics:topics-list') in logs.output[0])
+        assert ('serialize' in logs.output[0])
@@ -0,0 +1,148 @@
+import multiprocessing
+import os
+import re
+import tempfile
+
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.test import SimpleTestCase, override_settings, tag
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+
+from common.metrics import Registry
+from interview.tests.test_api import AuthApiTestCase
+from interview.tests.test_queries import fill_database
+
+
+def _count_in_child(registry):
+    registry.counter('jobs_total', 'Jobs.', ('kind',)).inc(kind='child')
+    registry.gauge('workers', 'Busy workers.').inc()
+    registry.flush(force=True)
+
+
+@tag('metrics')
+class RegistryTestCase(SimpleTestCase):
+
+    def test_render(self):
+        registry = Registry()
+        jobs = registry.counter('jobs_total', 'Jobs.', ('kind',))
+        jobs.inc(kind='fast')
+        jobs.inc(2, kind='fast')
+        jobs.inc(kind='slow "one"')
+        registry.gauge('workers', 'Busy workers.').set(3)
+        duration = registry.histogram('job_seconds', 'Job duration.', buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 7.0):
+            duration.observe(value)
+
+        assert (registry.render() == '\n'.join([
+            '# HELP job_seconds Job duration.',
+            '# TYPE job_seconds histogram',
+            'job_seconds_bucket{le="0.1"} 2.0',
+            'job_seconds_bucket{le="1.0"} 3.0',
+            'job_seconds_bucket{le="+Inf"} 4.0',
+            'job_seconds_sum 7.65',
+            'job_seconds_count 4.0',
+            '# HELP jobs_total Jobs.',
+            '# TYPE jobs_total counter',
+            'jobs_total{kind="fast"} 3.0',
+            'jobs_total{kind="slow \\"one\\""} 1.0',
+            '# HELP workers Busy workers.',
+            '# TYPE workers gauge',
+            'workers 3.0',
+        ]) + '\n')
+
+    def test_validation(self):
+        registry = Registry()
+        jobs = registry.counter('jobs_total', 'Jobs.', ('kind',))
+        assert (registry.counter('jobs_total', 'Jobs.', ('kind',)) is jobs)
+
+        with self.assertRaises(ValueError):
+            registry.gauge('jobs_total', 'Jobs.')
+        with self.assertRaises(ValueError):
+            jobs.inc(kind='fast', priority='high')
+        with self.assertRaises(ValueError):
+            jobs.inc(-1, kind='fast')
+
+    def test_processes_are_merged(self):
+        with tempfile.TemporaryDirectory() as directory, override_settings(METRICS_DIR=directory):
+            registry = Registry()
+            jobs = registry.counter('jobs_total', 'Jobs.', ('kind',))
+            duration = registry.histogram('job_seconds', 'Job duration.', buckets=(1.0,))
+            jobs.inc(kind='parent')
+            duration.observe(0.5)
+            registry.gauge('workers', 'Busy workers.').inc()
+
+            # values of parent aren't inherited by child, so they aren't counted twice
+            context = multiprocessing.get_context('fork')
+            for _ in range(2):
+                process = context.Process(target=_count_in_child, args=(registry,))
+                process.start()
+                process.join()
+                assert (process.exitcode == 0)
+
+            other = Registry()
+            other.histogram('job_seconds', 'Job duration.', buckets=(1.0,)).observe(2.0)
+            other.flush(force=True)
+
+            collected = registry.collect()
+            # files of dead children are archived once
+            assert (registry.collect() == collected)
+            file_names = [name for name in os.listdir(directory) if name.endswith('.json')]
+
+        assert (collected['jobs_total']['samples'] == [[['child'], 2.0], [['parent'], 1.0]])
+        assert (collected['job_seconds']['samples'] == [[[], {'buckets': [1, 1], 'sum': 2.5}]])
+        # gauges of dead children are dropped
+        assert (collected['workers']['samples'] == [[[], 1.0]])
+        assert (len(file_names) == 3)
+        assert ('metrics-archive.json' in file_names)
+
+
+@tag('api', 'metrics')
+class MetricsEndpointTestCase(AuthApiTestCase):
+
+    def setUp(self) -> None:
+        super().setUp()
+
+        caches['default'].clear()
+        self.authenticate()
+        fill_database(2, 2, 2)
+
+    @staticmethod
+    def __get_value(content: str, sample: str) -> float:
+        match = re.search(r'^%s (\S+)$' % re.escape(sample), content, re.MULTILINE)
+        return float(match.group(1)) if match else 0.0
+
+    def test_metrics_of_requests(self):
+        requests_sample = 'http_requests_total{view="topics:topics-list",method="GET",status="200"}'
+        count_sample = 'http_request_duration_seconds_count{view="topics:topics-list"}'
+        queries_sample = 'http_request_db_queries_count{view="topics:topics-list"}'
+        miss_sample = 'topics_cache_requests_total{result="miss"}'
+        hit_sample = 'topics_cache_requests_total{result="hit"}'
+
+        content = self.client.get(reverse('metrics')).content.decode()
+        before = {
+            sample: self.__get_value(content, sample)
+            for sample in (requests_sample, count_sample, queries_sample, miss_sample, hit_sample)
+        }
+
+        for _ in range(2):
+            assert (self.client.get(reverse('topics:topics-list')).status_code == 200)
+        response = self.client.get(reverse('metrics'))
+        assert (response.status_code == 200)
+        assert (response['Content-Type'].startswith('text/plain; version=0.0.4'))
+
+        content = response.content.decode()
+        assert (self.__get_value(content, requests_sample) == before[requests_sample] + 2)
+        assert (self.__get_value(content, count_sample) == before[count_sample] + 2)
+        assert (self.__get_value(content, queries_sample) == before[queries_sample] + 2)
+        assert (self.__get_value(content, miss_sample) == before[miss_sample] + 2)
+        assert (self.__get_value(content, hit_sample) == before[hit_sample] + 2)
+        assert ('# TYPE http_response_size_bytes histogram' in content)
+
+    def test_metrics_are_only_for_admins(self):
+        self.unauthenticate()
+        assert (self.client.get(reverse('metrics')).status_code == 401)
+
+        user = User.objects.create_user('candidate', 'candidate@mail.com', 'passwd123')
+        self.client.credentials(HTTP_AUTHORIZATION='Token %s' % Token.objects.create(user=user).key)
+        assert (self.client.get(reverse('metrics')).status_code == 403)
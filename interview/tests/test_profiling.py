@@ -0,0 +1,79 @@
+import os
+import pstats
+import re
+import tempfile
+
+from django.test import override_settings, tag
+from django.urls import reverse
+
+from interview.apps.topics.views import UserTopicType
+from interview.tests.test_api import AuthApiTestCase
+
+
+@tag('api', 'profiling')
+class ProfilingMiddlewareTestCase(AuthApiTestCase):
+
+    def setUp(self) -> None:
+        super().setUp()
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+        settings_override = override_settings(PROFILING_DIR=self.directory, PROFILING_SAMPLING_INTERVAL=0.0001)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def __get_users_topics(self, **extra):
+        return self.client.get(reverse('users-topics-list'), data={
+            'type': UserTopicType.ACTIVE.value,
+            'user_id': 666,
+        }, **extra)
+
+    def test_cprofile_of_admin_request(self):
+        self.client.credentials(HTTP_AUTHORIZATION='Token %s' % self.token.key)
+
+        response = self.__get_users_topics(HTTP_X_PROFILE='cprofile')
+        assert (response.status_code == 200)
+
+        artifact = response['X-Profile-Artifact']
+        assert (re.fullmatch(r'\d{8}-\d{6}-users-topics-list-\d+-[0-9a-f]{8}\.prof', artifact))
+        assert (os.listdir(self.directory) == [artifact])
+        stats = pstats.Stats(os.path.join(self.directory, artifact))
+        assert (any(function == 'get_users_topics' for _, _, function in stats.stats))
+
+    def test_sampling_of_admin_request(self):
+        self.client.credentials(HTTP_AUTHORIZATION='Token %s' % self.token.key)
+
+        response = self.client.get(reverse('topics:topics-list'), data={'profile': 'sampling'})
+        assert (response.status_code == 200)
+
+        artifact = response['X-Profile-Artifact']
+        assert (artifact.endswith('.collapsed'))
+        with open(os.path.join(self.directory, artifact)) as stream:
+            for line in stream:
+                assert (re.fullmatch(r'[^;]+ \(.+:\d+\)(;[^;]+ \(.+:\d+\))* \d+\n', line))
+
+    def test_flag_of_not_admin_is_ignored(self):
+        response = self.__get_users_topics(HTTP_X_PROFILE='cprofile')
+        assert (response.status_code == 200)
+        assert (not response.has_header('X-Profile-Artifact'))
+
+        self.client.credentials(HTTP_AUTHORIZATION='Token wrong')
+        response = self.__get_users_topics(HTTP_X_PROFILE='cprofile')
+        assert (response.status_code == 401)
+        assert (not response.has_header('X-Profile-Artifact'))
+
+        assert (os.listdir(self.directory) == [])
+
+    def test_sampled_requests(self):
+        with override_settings(PROFILING_SAMPLE_RATES={'users-topics-list': 1.0}):
+            response = self.__get_users_topics()
+            assert (response.status_code == 200)
+            assert (not response.has_header('X-Profile-Artifact'))
+            self.client.get(reverse('topics:topics-list'))
+
+        artifacts = os.listdir(self.directory)
+        assert (len(artifacts) == 1)
+        assert ('-users-topics-list-' in artifacts[0])
+        assert (artifacts[0].endswith('.collapsed'))
@@ -0,0 +1,82 @@
+from django.test import tag
+from django.urls import reverse
+
+from interview.apps.topics.models import Topic
+from interview.apps.topics.views import UserTopicType
+from interview.tests.factories import TopicFactory, QuestionFactory, AnswerFactory
+from interview.tests.test_api import AuthApiTestCase
+
+
+def fill_database(topics_count, questions_count, answers_count):
+    """
+    Filling database. Create: topics_count topics, questions_count questions with answers_count answers for topic.
+    """
+    for _ in range(topics_count):
+        topic = TopicFactory()
+        for _ in range(questions_count):
+            question = QuestionFactory(topic=topic)
+            for _ in range(answers_count):
+                AnswerFactory(question=question)
+
+
+@tag('api', 'queries')
+class TopicQueriesTestCase(AuthApiTestCase):
+    """
+    Read path of the topics tree must run a fixed number of queries regardless of the data size.
+    Cached topic trees are read without queries for them.
+    """
+
+    scales = (
+        (1, 1, 1),
+        (3, 3, 3),
+        (8, 6, 4),
+    )
+
+    user_id = 666
+
+    def setUp(self) -> None:
+        super().setUp()
+
+        self.authenticate()
+
+    def __assert_queries_at_scales(self, num, path_func, data=None, cached_num=None):
+        for scale in self.scales:
+            with self.subTest(scale=scale):
+                fill_database(*scale)
+                path = path_func()
+                with self.assertNumQueries(num):
+                    response = self.client.get(path, data=data)
+                assert (response.status_code == 200)
+
+                if cached_num is not None:
+                    with self.assertNumQueries(cached_num):
+                        cached_response = self.client.get(path, data=data)
+                    assert (cached_response.status_code == 200)
+                    assert (cached_response.data == response.data)
+
+    def test_list_topics_queries(self):
+        # revision, topics ids, missed topics, questions, answers; then revision and topics ids
+        self.__assert_queries_at_scales(
+            5,
+            lambda: reverse('topics:topics-list'),
+            cached_num=2
+        )
+
+    def test_retrieve_topic_queries(self):
+        # revision, revision of cached tree, missed topic, questions, answers; then both revisions
+        self.__assert_queries_at_scales(
+            5,
+            lambda: reverse('topics:topics-detail', args=[Topic.objects.last().id]),
+            cached_num=2
+        )
+
+    def test_users_topics_queries(self):
+        # topics revision, users answers revision, topics, questions, answers, users answers
+        self.__assert_queries_at_scales(
+            6,
+            lambda: reverse('users-topics-list'),
+            data={
+                'type': UserTopicType.ACTIVE.value,
+                'user_id': self.user_id,
+            }
+        )
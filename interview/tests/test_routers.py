@@ -0,0 +1,96 @@
+from datetime import datetime, timedelta
+from unittest import skipIf
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TransactionTestCase, override_settings, tag
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from interview.apps.topics.models import Topic
+from interview.apps.topics.views import UserTopicType
+from interview.tests.factories import TopicFactory, QuestionFactory, AnswerFactory
+
+
+@tag('api', 'replica')
+@skipIf(settings.DATABASES.get('replica', {}).get('TEST', {}).get('MIRROR'), 'Replica mirrors primary database.')
+@override_settings(REPLICA_DATABASES=['replica'])
+class ReplicaRouterTestCase(TransactionTestCase):
+    """
+    Replica is a separate test database without replication (see settings), so data read from it shows
+    which database was used.
+    """
+
+    databases = {'default', 'replica'}
+    user_id = 666
+
+    def setUp(self) -> None:
+        super().setUp()
+
+        cache.clear()
+        user = User.objects.create_superuser('admin', 'admin@mail.com', 'passwd123')
+        self.token = Token.objects.create(user=user)
+        self.question = QuestionFactory(topic=TopicFactory(
+            start_date=(datetime.now() - timedelta(days=1)),
+            finish_date=(datetime.now() + timedelta(days=1))
+        ))
+        self.answer = AnswerFactory(question=self.question)
+
+    def __get_client(self) -> APIClient:
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION='Token %s' % self.token.key)
+        return client
+
+    def test_reads_go_to_replica(self):
+        assert Topic.objects.exists()
+        assert not Topic.objects.using('replica').exists()
+
+        response = self.__get_client().get(reverse('topics:topics-list'))
+        assert (response.status_code == 200)
+        assert (response.data == [])
+
+        # trees are read from the same database as their revisions
+        response = self.__get_client().get(reverse('topics:topics-detail', args=[self.question.topic_id]))
+        assert (response.status_code == 404)
+
+    def test_client_reads_own_writes(self):
+        client = self.__get_client()
+        response = client.put(
+            reverse('topics:topics-detail', args=[self.question.topic_id]),
+            data={'description': 'Updated.'},
+            format='json'
+        )
+        assert (response.status_code == 200)
+
+        response = client.get(reverse('topics:topics-list'))
+        assert (response.status_code == 200)
+        assert ([topic['description'] for topic in response.data] == ['Updated.'])
+
+    def test_user_reads_own_answers(self):
+        response = self.__get_client().post(
+            reverse('users-answers:users-answers-list'),
+            data={
+                'user_id': self.user_id,
+                'question_id': self.question.id,
+                'answer_id': self.answer.id,
+            },
+            format='json'
+        )
+        assert (response.status_code == 200)
+
+        # client without cookies, e.g. another device of user
+        response = self.__get_client().get(
+            reverse('users-topics-list'),
+            data={'type': UserTopicType.PASSED.value, 'user_id': self.user_id}
+        )
+        assert (response.status_code == 200)
+        assert ([topic['id'] for topic in response.data] == [self.question.topic_id])
+
+        response = self.__get_client().get(
+            reverse('users-topics-list'),
+            data={'type': UserTopicType.ACTIVE.value, 'user_id': self.user_id + 1}
+        )
+        assert (response.status_code == 200)
+        assert (response.data == [])
@@ -13,23 +13,27 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path, include
 from drf_yasg import openapi
 from drf_yasg.views import get_schema_view
-from rest_framework.authentication import TokenAuthentication
 from rest_framework.authtoken import views
 from rest_framework.permissions import AllowAny
 
-from interview.apps.topics.views import get_users_topics
+from common.django_rest_framework.authentication import CachedTokenAuthentication
+from common.metrics import metrics_view
+from common.swagger import with_prebuilt_schema
+from interview.apps.topics.views import get_users_topics, get_users_topics_async
 
+api_info = openapi.Info(
+    title="Interview API",
+    default_version='v1'
+)
 schema_view = get_schema_view(
-    openapi.Info(
-        title="Interview API",
-        default_version='v1'
-    ),
+    api_info,
     public=True,
-    authentication_classes=(TokenAuthentication,),
+    authentication_classes=(CachedTokenAuthentication,),
     permission_classes=(AllowAny,),
 )
 urlpatterns = [
@@ -37,7 +41,16 @@ urlpatterns = [
     path(r'auth-token/', views.obtain_auth_token),
     path(r'topics/', include('interview.apps.topics.urls')),
     path(r'questions/', include('interview.apps.questions.urls')),
-    path(r'users-topics/', get_users_topics, name='users-topics-list'),
+    path(
+        r'users-topics/',
+        get_users_topics_async if settings.ASYNC_VIEWS else get_users_topics,
+        name='users-topics-list'
+    ),
     path(r'users-answers/', include('interview.apps.users_answers.urls')),
-    path(r'swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
+    path(r'metrics/', metrics_view, name='metrics'),
+    path(
+        r'swagger/',
+        with_prebuilt_schema(schema_view.with_ui('swagger', cache_timeout=0)),
+        name='schema-swagger-ui'
+    ),
 ]